@@ -0,0 +1,69 @@
+"""
+Antigüedad de la gestión: días desde ULTIMA FECHA GESTION agrupados en tramos.
+
+'% BARRIDO' sólo indica si una cuenta se gestionó alguna vez; los tramos muestran
+hace cuánto, para detectar cuentas con deuda alta que llevan semanas sin contacto.
+Los días se cuentan respecto de la última gestión registrada en el archivo, de
+modo que el resultado no depende del día en que se abre el dashboard.
+"""
+import numpy as np
+import pandas as pd
+
+# (límite superior en días, etiqueta); lo que supera el último límite va a '>30'
+LIMITES_TRAMOS = [(3, '0-3'), (7, '4-7'), (15, '8-15'), (30, '16-30')]
+TRAMO_MAYOR = '>30'
+TRAMO_SIN_GESTION = 'Nunca'
+TRAMOS = [etiqueta for _, etiqueta in LIMITES_TRAMOS] + [TRAMO_MAYOR, TRAMO_SIN_GESTION]
+# Tramos que se consideran gestión vencida
+TRAMOS_VENCIDOS = [TRAMO_MAYOR, TRAMO_SIN_GESTION]
+
+DIMENSIONES = ['CAMPAÑA', 'ASESOR', 'NIVEL_RIESGO']
+
+
+def fecha_referencia(fechas_gestion):
+    """Última gestión registrada (o hoy si ninguna cuenta tiene gestión)."""
+    return (fechas_gestion.max() if fechas_gestion.notna().any() else pd.Timestamp.today()).normalize()
+
+
+def dias_sin_gestion(fechas_gestion, referencia=None):
+    """Días enteros entre cada ULTIMA FECHA GESTION y la fecha de referencia (NaN si nunca)."""
+    referencia = fecha_referencia(fechas_gestion) if referencia is None else pd.Timestamp(referencia).normalize()
+    return (referencia - fechas_gestion.dt.normalize()).dt.days
+
+
+def tramos(fechas_gestion, referencia=None):
+    """Tramo de antigüedad de cada cuenta como categórico ordenado (TRAMOS)."""
+    dias = dias_sin_gestion(fechas_gestion, referencia).to_numpy(dtype='float64')
+    limites = np.array([limite for limite, _ in LIMITES_TRAMOS], dtype='float64')
+    codigos = np.searchsorted(limites, dias, side='left')  # días > último límite -> '>30'
+    codigos[np.isnan(dias)] = len(TRAMOS) - 1
+    return pd.Series(
+        pd.Categorical.from_codes(codigos, categories=TRAMOS, ordered=True),
+        index=fechas_gestion.index, name='TRAMO_GESTION'
+    )
+
+
+def resumen(df_analisis, dimensiones=None):
+    """
+    Cuentas y deuda por tramo para cada dimensión, en formato largo:
+    DIMENSION, VALOR, TRAMO_GESTION, CUENTAS, DEUDA.
+    """
+    partes = []
+    for dimension in dimensiones or DIMENSIONES:
+        tabla = df_analisis.groupby([dimension, 'TRAMO_GESTION'], observed=True).agg(
+            CUENTAS=('TRAMO_GESTION', 'size'),
+            DEUDA=('DEUDA TOTAL', 'sum'),
+        ).reset_index().rename(columns={dimension: 'VALOR'})
+        tabla['VALOR'] = tabla['VALOR'].astype(str)
+        partes.append(tabla.assign(DIMENSION=dimension))
+    if not partes:
+        return pd.DataFrame(columns=['DIMENSION', 'VALOR', 'TRAMO_GESTION', 'CUENTAS', 'DEUDA'])
+    return pd.concat(partes, ignore_index=True)[['DIMENSION', 'VALOR', 'TRAMO_GESTION', 'CUENTAS', 'DEUDA']]
+
+
+def matriz(resumen_antiguedad, dimension, valor='CUENTAS'):
+    """Tabla VALOR x TRAMO (todas las columnas de TRAMOS, en orden) para el mapa de calor."""
+    datos = resumen_antiguedad[resumen_antiguedad['DIMENSION'] == dimension]
+    return datos.pivot_table(
+        index='VALOR', columns='TRAMO_GESTION', values=valor, aggfunc='sum', fill_value=0, observed=False
+    ).reindex(columns=TRAMOS, fill_value=0)
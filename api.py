@@ -0,0 +1,217 @@
+"""
+API HTTP local, de sólo lectura, con los agregados del dashboard.
+
+Sirve las mismas tablas que calcula procesamiento (resúmenes por campaña, asesor,
+prioridad y nivel de riesgo, KPIs y pagos por día) para que otras herramientas no
+tengan que leer la interfaz. Usa sólo la biblioteca estándar (asyncio) y funciona
+sin conexión:
+
+    python api.py --puerto 8600 "DATA TOTAL WORLDTEL NOVIEMBRE 2025.xlsx"
+
+Cada respuesta se serializa una sola vez por versión de los datos (JSON, o Arrow
+si pyarrow está instalado y se pide con ?formato=arrow) y se guarda ya comprimida
+con gzip. La ETag es la versión de los archivos, de modo que los lectores que
+repiten una consulta reciben 304 sin cuerpo mientras el Excel no cambie.
+"""
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import os
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+import procesamiento
+
+logger = logging.getLogger(__name__)
+
+EXCEL_PATH = os.path.join(os.getcwd(), "DATA TOTAL WORLDTEL NOVIEMBRE 2025.xlsx")
+TIPO_JSON = 'application/json; charset=utf-8'
+TIPO_ARROW = 'application/vnd.apache.arrow.stream'
+
+
+def _pagos_por_dia(datos):
+    calculo = procesamiento.motor_calculo(datos.motor)
+    series = [calculo.pagos_por_dia(datos.df_pagos, tipo).assign(tipo_pago=tipo) for tipo in ['PLANILLAS', 'GASTOS']]
+    return pd.concat(series, ignore_index=True)
+
+
+# Ruta -> función que arma la tabla a partir de DatosDashboard
+RECURSOS = {
+    '/kpis': lambda datos: pd.DataFrame([datos.kpis]),
+    '/campanas': lambda datos: datos.tabla_campana,
+    '/asesores': lambda datos: datos.tabla_resumen_asesor,
+    '/prioridades': lambda datos: procesamiento.motor_calculo(datos.motor).resumen_por_prioridad(datos.df),
+    '/niveles': lambda datos: datos.resumen_nivel.drop(columns='ORDEN'),
+    '/pagos': _pagos_por_dia,
+}
+
+
+def arrow_disponible():
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def serializar(tabla, formato):
+    if formato == 'arrow':
+        import pyarrow as pa
+        sink = pa.BufferOutputStream()
+        # Las categorías se envían como texto para que cualquier lector las entienda
+        tabla = pa.Table.from_pandas(tabla.astype({c: str for c in tabla.select_dtypes('category')}), preserve_index=False)
+        with pa.ipc.new_stream(sink, tabla.schema) as writer:
+            writer.write_table(tabla)
+        return sink.getvalue().to_pybytes()
+    return tabla.to_json(orient='records', date_format='iso', force_ascii=False).encode('utf-8')
+
+
+class ServicioAgregados:
+    """Mantiene la última versión de los datos y las respuestas ya serializadas."""
+
+    def __init__(self, rutas, motor='pandas'):
+        self.rutas = tuple(rutas)
+        self.motor = motor
+        self.datos = None
+        self._respuestas = {}  # (ruta, formato) -> (etag, cuerpo, cuerpo gzip)
+        self._lock = asyncio.Lock()
+
+    def _cargar(self, version):
+        df = procesamiento.cargar_excels(self.rutas)
+        return procesamiento.construir_datos(df, version=version, motor=self.motor)
+
+    async def actualizar(self):
+        """Recarga los archivos (en un hilo) sólo si cambió su versión."""
+        version = procesamiento.version_archivo(*self.rutas)
+        if self.datos is not None and self.datos.version == version:
+            return self.datos
+        async with self._lock:
+            if self.datos is None or self.datos.version != version:
+                logger.info("Cargando datos versión %s", version)
+                self.datos = await asyncio.to_thread(self._cargar, version)
+                self._respuestas = {}
+        return self.datos
+
+    async def respuesta(self, ruta, formato):
+        datos = await self.actualizar()
+        clave = (ruta, formato)
+        if clave not in self._respuestas:
+            cuerpo = await asyncio.to_thread(serializar, RECURSOS[ruta](datos), formato)
+            etag = '"' + hashlib.sha1(f'{datos.version}|{ruta}|{formato}'.encode()).hexdigest() + '"'
+            self._respuestas[clave] = (etag, cuerpo, gzip.compress(cuerpo, compresslevel=6))
+        return self._respuestas[clave]
+
+    def indice(self):
+        version = self.datos.version if self.datos is not None else None
+        formatos = ['json', 'arrow'] if arrow_disponible() else ['json']
+        return json.dumps({'version': version, 'recursos': sorted(RECURSOS), 'formatos': formatos}).encode('utf-8')
+
+
+async def _leer_peticion(reader):
+    # Sólo se aceptan GET/HEAD sin cuerpo; el límite del StreamReader acota las cabeceras
+    cabecera = await reader.readuntil(b'\r\n\r\n')
+    lineas = cabecera.decode('latin-1').split('\r\n')
+    metodo, destino, protocolo = lineas[0].split(' ', 2)
+    cabeceras = {}
+    for linea in lineas[1:]:
+        if ':' in linea:
+            nombre, valor = linea.split(':', 1)
+            cabeceras[nombre.strip().lower()] = valor.strip()
+    return metodo, destino, protocolo, cabeceras
+
+
+def _escribir(writer, estado, cabeceras, cuerpo=b'', con_cuerpo=True):
+    lineas = [f'HTTP/1.1 {estado}'] + [f'{k}: {v}' for k, v in cabeceras.items()]
+    lineas.append(f'Content-Length: {len(cuerpo)}')
+    writer.write(('\r\n'.join(lineas) + '\r\n\r\n').encode('latin-1'))
+    if con_cuerpo:
+        writer.write(cuerpo)
+
+
+async def atender(servicio, reader, writer):
+    """Atiende una conexión (con keep-alive) hasta que el cliente la cierra."""
+    try:
+        while True:
+            try:
+                metodo, destino, protocolo, cabeceras = await _leer_peticion(reader)
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError, ValueError):
+                break
+            mantener = cabeceras.get('connection', '').lower() != 'close' and protocolo == 'HTTP/1.1'
+            comunes = {'Connection': 'keep-alive' if mantener else 'close'}
+            url = urlsplit(destino)
+            formato = parse_qs(url.query).get('formato', ['json'])[0]
+            if TIPO_ARROW in cabeceras.get('accept', ''):
+                formato = 'arrow'
+
+            if metodo not in ('GET', 'HEAD'):
+                _escribir(writer, '405 Method Not Allowed', {**comunes, 'Allow': 'GET, HEAD'})
+            elif url.path == '/':
+                try:
+                    await servicio.actualizar()
+                    indice = servicio.indice()
+                except Exception:
+                    logger.exception("Error al cargar los datos para el índice")
+                    _escribir(writer, '500 Internal Server Error', comunes)
+                else:
+                    _escribir(writer, '200 OK', {**comunes, 'Content-Type': TIPO_JSON}, indice, metodo == 'GET')
+            elif url.path not in RECURSOS:
+                _escribir(writer, '404 Not Found', comunes)
+            elif formato not in ('json', 'arrow') or (formato == 'arrow' and not arrow_disponible()):
+                _escribir(writer, '406 Not Acceptable', comunes)
+            else:
+                try:
+                    etag, cuerpo, comprimido = await servicio.respuesta(url.path, formato)
+                except Exception:
+                    logger.exception("Error al calcular %s", url.path)
+                    _escribir(writer, '500 Internal Server Error', comunes)
+                else:
+                    salida = {
+                        **comunes,
+                        'Content-Type': TIPO_ARROW if formato == 'arrow' else TIPO_JSON,
+                        'ETag': etag,
+                        'Cache-Control': 'no-cache',
+                        'Vary': 'Accept, Accept-Encoding',
+                    }
+                    if etag in [e.strip() for e in cabeceras.get('if-none-match', '').split(',')]:
+                        _escribir(writer, '304 Not Modified', salida)
+                    elif 'gzip' in cabeceras.get('accept-encoding', ''):
+                        _escribir(writer, '200 OK', {**salida, 'Content-Encoding': 'gzip'}, comprimido, metodo == 'GET')
+                    else:
+                        _escribir(writer, '200 OK', salida, cuerpo, metodo == 'GET')
+            await writer.drain()
+            if not mantener:
+                break
+    finally:
+        writer.close()
+
+
+async def servir(rutas, host='127.0.0.1', puerto=8600, motor='pandas'):
+    servicio = ServicioAgregados(rutas, motor=motor)
+    # Los datos se cargan antes de aceptar conexiones
+    await servicio.actualizar()
+    servidor = await asyncio.start_server(lambda r, w: atender(servicio, r, w), host, puerto)
+    logger.info("API de agregados en http://%s:%s/", host, puerto)
+    async with servidor:
+        await servidor.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API local de sólo lectura con los agregados del dashboard")
+    parser.add_argument('excel', nargs='*', default=[EXCEL_PATH], help="Archivos WORLDTEL a servir")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--puerto', type=int, default=8600)
+    parser.add_argument('--motor', choices=['pandas', 'duckdb'], default='pandas')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    try:
+        asyncio.run(servir(args.excel, args.host, args.puerto, args.motor))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
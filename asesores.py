@@ -0,0 +1,116 @@
+"""
+Analítica de asesores: acumulados por ASESOR (nombre completo) y rankings.
+
+Los acumulados son sumas y conteos por asesor, así que el total es la suma de
+los acumulados parciales de cada archivo u hoja cargado (PERIODO). Al llegar o
+cambiar un archivo sólo se acumula ese lote (AcumuladoIncremental); los ratios
+y rankings se derivan del total.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+import periodos
+
+COLUMNAS_ACUMULADO = ['CUENTAS', 'GESTIONADOS', 'DEUDA_TOTAL', 'GASTOS_ADMIN', 'REC_PLANILLAS', 'REC_GASTOS']
+COLUMNAS_CONTEO = ['CUENTAS', 'GESTIONADOS']
+
+# Métrica del ranking -> (columna, etiqueta, formato)
+METRICAS_RANKING = {
+    'REC_PLANILLAS': ('Recaudo planillas', 'monto'),
+    'REC_GASTOS': ('Recaudo gastos', 'monto'),
+    '%GESTION': ('% Gestión', 'porcentaje'),
+    '%RECUPERO': ('% Recupero planillas', 'porcentaje'),
+    'DEUDA_TOTAL': ('Deuda bajo gestión', 'monto'),
+}
+
+
+def acumular(df):
+    """Sumas y conteos por ASESOR, la base de todos los rankings."""
+    acumulado = df.groupby('ASESOR', observed=True).agg(
+        CUENTAS=('ASESOR', 'count'),
+        GESTIONADOS=('ULTIMA FECHA GESTION', 'count'),
+        DEUDA_TOTAL=('DEUDA TOTAL', 'sum'),
+        GASTOS_ADMIN=('GASTOS ADMIN', 'sum'),
+        REC_PLANILLAS=('REC. PLANILLAS', 'sum'),
+        REC_GASTOS=('REC. GASTOS', 'sum'),
+    )
+    acumulado.index = acumulado.index.astype(str)
+    return acumulado
+
+
+def sumar(parciales):
+    """Suma de acumulados parciales (un asesor puede faltar en algunos lotes)."""
+    total = parciales[0]
+    for parcial in parciales[1:]:
+        total = total.add(parcial, fill_value=0)
+    total = total[COLUMNAS_ACUMULADO].sort_index()
+    total[COLUMNAS_CONTEO] = total[COLUMNAS_CONTEO].astype('int64')
+    return total.rename_axis('ASESOR')
+
+
+class AcumuladoIncremental:
+    """
+    Acumulados parciales por lote (PERIODO) con la versión del archivo de la que
+    salieron. actualizar sólo acumula los lotes nuevos o con otra versión y
+    descarta los que ya no se cargan; el resultado es igual a acumular(df).
+    """
+
+    def __init__(self):
+        self.parciales = {}  # lote -> (versión, acumulado)
+        self._lock = threading.Lock()
+
+    def actualizar(self, df, versiones):
+        """
+        Acumulado total de df. versiones: {lote: versión del archivo}, con los
+        lotes de df[PERIODO] (ver procesamiento.cargar_excels).
+        """
+        if not versiones:
+            return acumular(df)
+        indices = df.groupby(periodos.COLUMNA, observed=True, sort=False).indices
+        with self._lock:
+            parciales = {}
+            for lote, version in versiones.items():
+                previo = self.parciales.get(lote)
+                if previo is not None and previo[0] == version:
+                    parciales[lote] = previo
+                else:
+                    filas = indices.get(lote, np.array([], dtype=np.int64))
+                    parciales[lote] = (version, acumular(df.iloc[filas]))
+            self.parciales = parciales
+            return sumar([acumulado for _, acumulado in parciales.values()])
+
+
+def nombres_cortos(nombres):
+    """
+    Nombre corto y único para mostrar: el primer nombre, y si otro asesor comparte
+    ese prefijo se agregan palabras hasta que deje de repetirse.
+    """
+    nombres = pd.Series(pd.unique(pd.Series(nombres, dtype=str)), dtype=str)
+    palabras = nombres.str.split()
+    cortos = pd.Series(np.nan, index=nombres.index, dtype=object)
+    max_palabras = int(palabras.str.len().max()) if len(palabras) else 0
+    for n_palabras in range(1, max_palabras + 1):
+        candidato = palabras.str[:n_palabras].str.join(' ')
+        pendientes = cortos.isna()
+        unico = ~candidato[pendientes].duplicated(keep=False)
+        cortos[unico[unico].index] = candidato[unico[unico].index]
+    cortos = cortos.fillna(nombres)
+    return dict(zip(nombres, cortos))
+
+
+def ranking(acumulado):
+    """Ratios por asesor y la posición en cada métrica de METRICAS_RANKING (1 = mejor)."""
+    tabla = acumulado.copy()
+    tabla['%GESTION'] = np.where(tabla['CUENTAS'] > 0, tabla['GESTIONADOS'] / tabla['CUENTAS'] * 100, 0)
+    tabla['%RECUPERO'] = np.where(tabla['DEUDA_TOTAL'] > 0, tabla['REC_PLANILLAS'] / tabla['DEUDA_TOTAL'] * 100, 0)
+    for metrica in METRICAS_RANKING:
+        tabla[f'POS_{metrica}'] = tabla[metrica].rank(ascending=False, method='min').astype(int)
+    tabla['NOMBRE_CORTO'] = tabla.index.map(nombres_cortos(tabla.index))
+    return tabla.rename_axis('ASESOR').reset_index()
+
+
+def leaderboard(tabla_ranking, metrica):
+    """Ranking precalculado ordenado por una métrica."""
+    return tabla_ranking.sort_values([f'POS_{metrica}', 'ASESOR']).reset_index(drop=True)
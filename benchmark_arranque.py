@@ -0,0 +1,108 @@
+"""
+Mide el arranque en frío del dashboard.
+
+1. Importaciones: ejecuta en un proceso nuevo `python -X importtime` con las
+   importaciones de la cabecera de dashboardNoviembre.py (las que corren antes
+   de pintar nada) y resume el tiempo acumulado y los módulos más pesados.
+   Avisa si matplotlib, altair u openpyxl se cargan al arrancar.
+2. Datos: en otro proceso nuevo, lectura del Excel y construcción de
+   DatosDashboard (lo que se ve como "Cargando datos...").
+
+    python benchmark_arranque.py --presupuesto-importacion 2500 --presupuesto-carga 8000
+
+Con presupuestos (en ms) devuelve código 1 si alguno se supera, para usarlo
+antes de publicar un cambio.
+"""
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+
+DASHBOARD = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dashboardNoviembre.py')
+EXCEL_PATH = os.path.join(os.getcwd(), "DATA TOTAL WORLDTEL NOVIEMBRE 2025.xlsx")
+# Módulos que no deberían cargarse antes de pintar los KPIs
+MODULOS_DIFERIDOS = ['matplotlib', 'altair', 'openpyxl', 'duckdb']
+
+
+def importaciones_cabecera(ruta=DASHBOARD):
+    """Sentencias import de nivel de módulo anteriores a la primera función del dashboard."""
+    with open(ruta, encoding='utf-8') as f:
+        arbol = ast.parse(f.read())
+    sentencias = []
+    for nodo in arbol.body:
+        if isinstance(nodo, (ast.FunctionDef, ast.ClassDef)):
+            break
+        if isinstance(nodo, (ast.Import, ast.ImportFrom)):
+            sentencias.append(ast.unparse(nodo))
+    return sentencias
+
+
+def medir_importaciones(sentencias):
+    """Corre las importaciones con -X importtime; devuelve {módulo: (propio_us, acumulado_us)}."""
+    resultado = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', '\n'.join(sentencias)],
+        cwd=os.path.dirname(DASHBOARD), capture_output=True, text=True, check=True
+    )
+    tiempos = {}
+    for linea in resultado.stderr.splitlines():
+        if not linea.startswith('import time:') or 'self [us]' in linea:
+            continue
+        propio, acumulado, modulo = linea[len('import time:'):].split('|')
+        tiempos[modulo.strip()] = (int(propio), int(acumulado))
+    return tiempos
+
+
+def medir_carga(rutas):
+    """Tiempo (ms) de cargar_excels + construir_datos en un proceso nuevo."""
+    codigo = (
+        "import json, sys, time\n"
+        "import procesamiento\n"
+        "inicio = time.perf_counter()\n"
+        "df = procesamiento.cargar_excels(sys.argv[1:])\n"
+        "leido = time.perf_counter()\n"
+        "procesamiento.construir_datos(df)\n"
+        "fin = time.perf_counter()\n"
+        "print(json.dumps({'lectura_ms': (leido - inicio) * 1000, 'construccion_ms': (fin - leido) * 1000}))\n"
+    )
+    resultado = subprocess.run(
+        [sys.executable, '-c', codigo, *rutas],
+        cwd=os.path.dirname(DASHBOARD), capture_output=True, text=True, check=True
+    )
+    return json.loads(resultado.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de arranque en frío del dashboard")
+    parser.add_argument('excel', nargs='*', default=[EXCEL_PATH])
+    parser.add_argument('--top', type=int, default=15, help="Módulos más pesados a listar")
+    parser.add_argument('--presupuesto-importacion', type=float, help="Máximo en ms para las importaciones")
+    parser.add_argument('--presupuesto-carga', type=float, help="Máximo en ms para leer y construir los datos")
+    parser.add_argument('--sin-datos', action='store_true', help="Medir sólo las importaciones")
+    args = parser.parse_args()
+
+    sentencias = importaciones_cabecera()
+    tiempos = medir_importaciones(sentencias)
+    # Los módulos de primer nivel importados directamente suman el total
+    total_ms = sum(acumulado for modulo, (_, acumulado) in tiempos.items() if '.' not in modulo) / 1000
+    print(f"Importaciones de la cabecera ({len(sentencias)} sentencias): {total_ms:,.0f} ms")
+    for modulo, (_, acumulado) in sorted(tiempos.items(), key=lambda x: -x[1][1])[:args.top]:
+        print(f"  {acumulado / 1000:9,.1f} ms  {modulo}")
+    cargados = [m for m in MODULOS_DIFERIDOS if m in tiempos]
+    if cargados:
+        print(f"AVISO: se importan al arrancar: {', '.join(cargados)}")
+
+    excedido = args.presupuesto_importacion is not None and total_ms > args.presupuesto_importacion
+    if not args.sin_datos:
+        carga = medir_carga(args.excel)
+        carga_ms = carga['lectura_ms'] + carga['construccion_ms']
+        print(f"Carga de datos: {carga_ms:,.0f} ms (lectura {carga['lectura_ms']:,.0f} ms, construcción {carga['construccion_ms']:,.0f} ms)")
+        excedido |= args.presupuesto_carga is not None and carga_ms > args.presupuesto_carga
+    if excedido:
+        print("Presupuesto de arranque superado")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
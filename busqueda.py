@@ -0,0 +1,71 @@
+"""
+Búsqueda de cuentas por RAZON SOCIAL o DOCUMENTO.
+
+Al cargar los datos se arma un índice invertido de palabras sobre la razón
+social normalizada (ver deudores.normalizar_razon_social): un vocabulario
+ordenado y, para cada palabra, la lista de filas que la contienen (formato CSR).
+Cada palabra de la consulta se busca como prefijo con np.searchsorted sobre el
+vocabulario y las listas se intersectan; los documentos se resuelven con un
+diccionario exacto. Ninguna consulta recorre el DataFrame.
+"""
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+import deudores
+
+MAX_RESULTADOS = 50
+
+
+@dataclass(frozen=True)
+class IndiceBusqueda:
+    vocabulario: np.ndarray  # palabras distintas, ordenadas
+    inicios: np.ndarray  # filas de la palabra i: filas[inicios[i]:inicios[i + 1]]
+    filas: np.ndarray
+    por_documento: dict = field(default_factory=dict)  # documento normalizado -> posiciones
+
+    def _por_prefijo(self, palabra):
+        desde = np.searchsorted(self.vocabulario, palabra, side='left')
+        hasta = np.searchsorted(self.vocabulario, palabra + '\uffff', side='left')
+        return np.unique(self.filas[self.inicios[desde]:self.inicios[hasta]])
+
+    def buscar(self, consulta):
+        """Posiciones (en el DataFrame indexado) de las cuentas que coinciden con la consulta."""
+        consulta = str(consulta or '').strip()
+        if not consulta:
+            return np.array([], dtype=np.int64)
+        documento = deudores.normalizar_documento_texto(consulta)
+        if consulta.replace('.', '').replace('-', '').isdigit() and documento:
+            return self.por_documento.get(documento, np.array([], dtype=np.int64))
+        texto = deudores.normalizar_nombre(consulta)
+        if not texto:
+            return np.array([], dtype=np.int64)
+        resultado = None
+        for palabra in texto.split():
+            coincidencias = self._por_prefijo(palabra)
+            resultado = coincidencias if resultado is None else np.intersect1d(resultado, coincidencias, assume_unique=True)
+            if len(resultado) == 0:
+                break
+        return resultado
+
+
+def construir_indice(df):
+    """Índice de búsqueda sobre RAZON SOCIAL y DOCUMENTO; las posiciones son las filas de df."""
+    palabras = deudores.normalizar_razon_social(df['RAZON SOCIAL']).str.split()
+    palabras = pd.Series(palabras.to_numpy(), index=np.arange(len(df))).explode().dropna()
+    # Una palabra repetida en la misma razón social cuenta una sola vez
+    palabras = palabras[~pd.MultiIndex.from_arrays([palabras.index, palabras.to_numpy()]).duplicated()]
+    codigos, vocabulario = pd.factorize(palabras.to_numpy(), sort=True)
+    orden = np.argsort(codigos, kind='stable')
+    inicios = np.concatenate([[0], np.cumsum(np.bincount(codigos, minlength=len(vocabulario)))])
+
+    documentos = deudores.normalizar_documento(df['DOCUMENTO'])
+    posiciones = pd.Series(np.arange(len(df)))
+    por_documento = posiciones.groupby(documentos.to_numpy(), dropna=True).indices
+    return IndiceBusqueda(
+        vocabulario=np.asarray(vocabulario, dtype=object),
+        inicios=inicios,
+        filas=palabras.index.to_numpy()[orden],
+        por_documento=por_documento,
+    )
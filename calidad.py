@@ -0,0 +1,109 @@
+"""
+Reglas de calidad sobre las cuentas ya tipadas (ver procesamiento.aplicar_esquema).
+
+Cada regla es una expresión vectorizada sobre columnas completas que marca las
+cuentas sospechosas; se evalúan una sola vez por carga en construir_datos y el
+costo crece linealmente con las filas. Con varios exports cargados, los
+duplicados y el mes de los pagos se revisan dentro de cada PERIODO (ver
+periodos.py). El resultado es una bandera por cuenta
+con un bit por regla, de la que salen la tabla de cuarentena y el resumen por
+regla del dashboard, que además puede excluir esas cuentas de los KPIs.
+"""
+import numpy as np
+import pandas as pd
+
+import periodos
+
+MONTOS = ['DEUDA TOTAL', 'GASTOS ADMIN', 'REC. PLANILLAS', 'REC. GASTOS']
+FECHAS_PAGO = ['FECHA DE PAGO P', 'FECHA DE PAGO G']
+COLUMNAS_CUARENTENA = [
+    periodos.COLUMNA, 'CAMPAÑA', 'DOCUMENTO', 'RAZON SOCIAL', 'ASESOR', 'DEUDA TOTAL', 'GASTOS ADMIN',
+    'REC. PLANILLAS', 'FECHA DE PAGO P', 'REC. GASTOS', 'FECHA DE PAGO G',
+]
+
+
+def _sin_marcas(df):
+    return np.zeros(len(df), dtype=bool)
+
+
+def _rec_mayor_que_deuda(df):
+    return (df['REC. PLANILLAS'] > df['DEUDA TOTAL']).to_numpy()
+
+
+def _pago_fuera_del_mes(df):
+    # El mes de referencia de cada periodo es el más frecuente entre sus fechas de pago
+    fechas = [df[columna] for columna in FECHAS_PAGO if columna in df.columns]
+    fuera = _sin_marcas(df)
+    for filas in periodos.grupos(df):
+        del_periodo = [columna.iloc[filas] for columna in fechas]
+        mes = periodos.mes_dominante(pd.concat(del_periodo)) if del_periodo else None
+        if mes is None:
+            continue
+        for fecha in del_periodo:
+            fuera[filas] |= (fecha.notna() & (fecha.dt.to_period('M') != mes)).to_numpy()
+    return fuera
+
+
+def _monto_negativo(df):
+    return (df[[columna for columna in MONTOS if columna in df.columns]] < 0).any(axis=1).to_numpy()
+
+
+def _gastos_sin_gastos_admin(df):
+    return ((df['REC. GASTOS'] > 0) & ~(df['GASTOS ADMIN'] > 0)).to_numpy()
+
+
+def _documento_duplicado(df):
+    # Un mismo deudor en varias campañas (ver deudores.py) o en varios exports es
+    # normal; dentro de una campaña del mismo periodo no
+    claves = [columna for columna in [periodos.COLUMNA, 'CAMPAÑA', 'DOCUMENTO'] if columna in df.columns]
+    return (df['DOCUMENTO'].notna() & df.duplicated(claves, keep=False)).to_numpy()
+
+
+# Regla -> (descripción, función que devuelve la máscara de cuentas marcadas).
+# El orden define el bit de cada regla en la bandera (hasta 8 reglas).
+REGLAS = {
+    'REC. PLANILLAS > DEUDA TOTAL': ('Se recuperó más de lo que se debía', _rec_mayor_que_deuda),
+    'Pago fuera del mes': ('Fecha de pago P o G fuera del mes de las demás fechas de pago de su periodo', _pago_fuera_del_mes),
+    'Monto negativo': ('DEUDA TOTAL, GASTOS ADMIN o algún recupero menor que cero', _monto_negativo),
+    'REC. GASTOS sin GASTOS ADMIN': ('Hay recupero de gastos sin gastos administrativos', _gastos_sin_gastos_admin),
+    'DOCUMENTO duplicado': ('El mismo DOCUMENTO aparece más de una vez en la campaña de su periodo', _documento_duplicado),
+}
+
+
+def evaluar(df):
+    """Bandera por cuenta (uint8, un bit por regla de REGLAS; 0 = sin observaciones)."""
+    banderas = np.zeros(len(df), dtype=np.uint8)
+    for bit, (_, regla) in enumerate(REGLAS.values()):
+        banderas |= regla(df).astype(np.uint8) << np.uint8(bit)
+    return pd.Series(banderas, index=df.index, name='CALIDAD')
+
+
+def resumen(df, banderas):
+    """Cuentas, deuda y % de cuentas marcadas por cada regla."""
+    valores = banderas.to_numpy()
+    deuda = df['DEUDA TOTAL'].to_numpy()
+    filas = []
+    for bit, (regla, (descripcion, _)) in enumerate(REGLAS.items()):
+        marcadas = (valores >> bit) & 1 == 1
+        filas.append({
+            'REGLA': regla,
+            'DESCRIPCIÓN': descripcion,
+            'CUENTAS': int(marcadas.sum()),
+            'DEUDA': float(np.nansum(deuda[marcadas])),
+        })
+    tabla = pd.DataFrame(filas)
+    tabla['% DE CUENTAS'] = tabla['CUENTAS'] / len(df) * 100 if len(df) else 0.0
+    return tabla
+
+
+def cuarentena(df, banderas):
+    """Cuentas con alguna regla incumplida y las reglas de cada una."""
+    valores = banderas.to_numpy()
+    marcadas = valores != 0
+    tabla = df.loc[marcadas, [columna for columna in COLUMNAS_CUARENTENA if columna in df.columns]].copy()
+    reglas = np.full(len(tabla), '', dtype=object)
+    for bit, regla in enumerate(REGLAS):
+        con_regla = (valores[marcadas] >> bit) & 1 == 1
+        reglas[con_regla] = np.where(reglas[con_regla] == '', regla, reglas[con_regla] + '; ' + regla)
+    tabla.insert(0, 'REGLAS', reglas)
+    return tabla
@@ -0,0 +1,340 @@
+"""
+Prueba de carga del dashboard con varias sesiones simultáneas.
+
+Cada sesión es un cliente del websocket de Streamlit (/_stcore/stream), como
+el navegador: pide la ejecución inicial y luego cambia widgets al azar (vista
+y campaña de Clientes TOP, filtro global de asesor, slider de Clientes TOP y
+rango de fechas del historial de pagos). Se mide la latencia de cada ejecución
+(desde que se envía el cambio hasta script_finished), y la memoria residente
+del servidor antes y después de conectar las sesiones.
+
+    python carga_concurrente.py --lanzar --sesiones 20 --acciones 10
+    python carga_concurrente.py --url http://127.0.0.1:8501 --pid 12345 --sesiones 5
+
+Con --lanzar se levanta un `streamlit run` propio en un puerto libre; si no, se
+usa un servidor ya levantado (--pid permite medir su memoria). Con
+--presupuesto-p95 (en ms) devuelve código 1 si el p95 lo supera, para detectar
+regresiones antes de publicar un cambio.
+
+Necesita el paquete websockets (lo instala uvicorn, el servidor de Streamlit).
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from datetime import date, timedelta
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+DASHBOARD = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dashboardNoviembre.py')
+TIPOS_WIDGET = ('radio', 'selectbox', 'multiselect', 'slider', 'date_input')
+
+
+def _rss_kb(pid):
+    """Memoria residente (KB) del proceso, leída de /proc (sólo Linux)."""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for linea in f:
+                if linea.startswith('VmRSS:'):
+                    return int(linea.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _percentil(valores, p):
+    ordenados = sorted(valores)
+    if not ordenados:
+        return float('nan')
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+# ---------------------------------------------------------------- acciones
+# Cada acción recibe los widgets de la última ejecución ({etiqueta: (tipo, proto, fragment_id)})
+# y devuelve (etiqueta, WidgetState sin id) o None si el widget no está en pantalla.
+
+def _opcion_al_azar(widgets, etiqueta, rnd):
+    if etiqueta not in widgets:
+        return None
+    _, proto, _ = widgets[etiqueta]
+    return etiqueta, WidgetState(string_value=rnd.choice(list(proto.options)))
+
+
+def vista_clientes_top(widgets, rnd):
+    return _opcion_al_azar(widgets, 'Vista:', rnd)
+
+
+def campania_clientes_top(widgets, rnd):
+    return _opcion_al_azar(widgets, 'Selecciona una campaña para ver sus Clientes TOP:', rnd)
+
+
+def slider_clientes_top(widgets, rnd):
+    etiqueta = 'Cantidad de Clientes TOP a mostrar:'
+    if etiqueta not in widgets:
+        return None
+    _, proto, _ = widgets[etiqueta]
+    estado = WidgetState()
+    estado.double_array_value.data.append(rnd.randint(int(proto.min), int(proto.max)))
+    return etiqueta, estado
+
+
+def filtro_asesor(widgets, rnd):
+    etiqueta = 'Asesor'
+    if etiqueta not in widgets:
+        return None
+    _, proto, _ = widgets[etiqueta]
+    estado = WidgetState()
+    # Una de cada tres veces se limpia el filtro
+    if rnd.random() > 1 / 3:
+        estado.string_array_value.data.append(rnd.choice(list(proto.options)))
+    else:
+        estado.string_array_value.SetInParent()
+    return etiqueta, estado
+
+
+def rango_pagos(widgets, rnd):
+    etiqueta = rnd.choice(['Fecha de Inicio', 'Fecha Fin'])
+    if etiqueta not in widgets:
+        return None
+    _, proto, _ = widgets[etiqueta]
+    inicio, fin = date.fromisoformat(proto.min), date.fromisoformat(proto.max)
+    dia = inicio + timedelta(days=rnd.randint(0, max(0, (fin - inicio).days)))
+    estado = WidgetState()
+    estado.string_array_value.data.append(dia.isoformat())
+    return etiqueta, estado
+
+
+ACCIONES = {
+    'Vista Clientes TOP': vista_clientes_top,
+    'Campaña Clientes TOP': campania_clientes_top,
+    'Filtro asesor': filtro_asesor,
+    'Slider Clientes TOP': slider_clientes_top,
+    'Rango de pagos': rango_pagos,
+}
+
+
+# ---------------------------------------------------------------- sesiones
+
+class Sesion:
+    """Un cliente del websocket con el estado de sus widgets, como una pestaña del navegador."""
+
+    def __init__(self, url_ws, semilla):
+        self.url_ws = url_ws
+        self.rnd = random.Random(semilla)
+        self.widgets = {}   # etiqueta -> (tipo, proto del elemento, fragment_id)
+        self.estados = {}   # etiqueta -> WidgetState elegido por la sesión
+        self.ws = None
+
+    async def conectar(self):
+        import websockets
+        self.ws = await websockets.connect(self.url_ws, subprotocols=['streamlit'], max_size=None)
+
+    async def cerrar(self):
+        if self.ws is not None:
+            await self.ws.close()
+
+    async def ejecutar(self, fragment_id=''):
+        """Envía el estado de los widgets y espera a que termine la ejecución; devuelve (ms, bytes)."""
+        mensaje = BackMsg()
+        mensaje.rerun_script.query_string = ''
+        mensaje.rerun_script.fragment_id = fragment_id
+        for etiqueta, estado in self.estados.items():
+            if etiqueta in self.widgets:
+                nuevo = mensaje.rerun_script.widget_states.widgets.add()
+                nuevo.CopyFrom(estado)
+                nuevo.id = self.widgets[etiqueta][1].id
+        inicio = time.perf_counter()
+        await self.ws.send(mensaje.SerializeToString())
+        recibidos = 0
+        while True:
+            datos = await self.ws.recv()
+            recibidos += len(datos)
+            msg = ForwardMsg()
+            msg.ParseFromString(datos)
+            tipo = msg.WhichOneof('type')
+            if tipo == 'delta' and msg.delta.WhichOneof('type') == 'new_element':
+                elemento = msg.delta.new_element
+                tipo_elemento = elemento.WhichOneof('type')
+                if tipo_elemento in TIPOS_WIDGET:
+                    proto = getattr(elemento, tipo_elemento)
+                    self.widgets[proto.label] = (tipo_elemento, proto, msg.delta.fragment_id)
+            elif tipo == 'script_finished':
+                if msg.script_finished == ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    continue
+                if msg.script_finished == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+                    raise RuntimeError("El dashboard no compila")
+                return (time.perf_counter() - inicio) * 1000, recibidos
+
+    async def accion_al_azar(self):
+        """Cambia un widget al azar; devuelve (nombre de la acción, ms, bytes) o None."""
+        nombres = list(ACCIONES)
+        self.rnd.shuffle(nombres)
+        for nombre in nombres:
+            cambio = ACCIONES[nombre](self.widgets, self.rnd)
+            if cambio is None:
+                continue
+            etiqueta, estado = cambio
+            self.estados[etiqueta] = estado
+            ms, recibidos = await self.ejecutar(self.widgets[etiqueta][2])
+            return nombre, ms, recibidos
+        return None
+
+
+async def correr_sesion(url_ws, indice, acciones, pausa, resultados):
+    sesion = Sesion(url_ws, semilla=indice)
+    await sesion.conectar()
+    try:
+        ms, recibidos = await sesion.ejecutar()
+        resultados.append(('Carga inicial', ms, recibidos))
+        for _ in range(acciones):
+            # Tiempo "pensando" entre clics, para no sincronizar todas las sesiones
+            await asyncio.sleep(sesion.rnd.uniform(0, pausa))
+            resultado = await sesion.accion_al_azar()
+            if resultado:
+                resultados.append(resultado)
+    finally:
+        await sesion.cerrar()
+
+
+async def muestrear_rss(pid, muestras, detener):
+    while not detener.is_set():
+        rss = _rss_kb(pid)
+        if rss is not None:
+            muestras.append(rss)
+        try:
+            await asyncio.wait_for(detener.wait(), timeout=0.5)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def prueba(url, pid, sesiones, acciones, pausa):
+    url_ws = url.replace('http', 'ws', 1).rstrip('/') + '/_stcore/stream'
+    # Una sesión previa calienta los cachés compartidos (datos, exportes) para que
+    # la memoria base no incluya la carga del Excel
+    await correr_sesion(url_ws, -1, 0, 0, [])
+    rss_base = _rss_kb(pid) if pid else None
+
+    resultados, muestras, detener = [], [], asyncio.Event()
+    muestreo = asyncio.create_task(muestrear_rss(pid, muestras, detener)) if pid else None
+    inicio = time.perf_counter()
+    await asyncio.gather(*(correr_sesion(url_ws, i, acciones, pausa, resultados) for i in range(sesiones)))
+    duracion = time.perf_counter() - inicio
+    if muestreo:
+        detener.set()
+        await muestreo
+    return resultados, duracion, rss_base, max(muestras, default=None), _rss_kb(pid) if pid else None
+
+
+# ---------------------------------------------------------------- servidor
+
+def _puerto_libre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def lanzar_servidor(espera=300):
+    """Levanta `streamlit run` del dashboard en un puerto libre; devuelve (proceso, url)."""
+    puerto = _puerto_libre()
+    proceso = subprocess.Popen(
+        [sys.executable, '-m', 'streamlit', 'run', DASHBOARD, '--server.headless', 'true',
+         '--server.port', str(puerto), '--browser.gatherUsageStats', 'false'],
+        cwd=os.path.dirname(DASHBOARD), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    url = f'http://127.0.0.1:{puerto}'
+    limite = time.monotonic() + espera
+    while time.monotonic() < limite:
+        try:
+            with urllib.request.urlopen(f'{url}/_stcore/health', timeout=2):
+                return proceso, url
+        except OSError:
+            if proceso.poll() is not None:
+                break
+            time.sleep(0.5)
+    proceso.terminate()
+    raise RuntimeError("El servidor de Streamlit no respondió")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga del dashboard con sesiones simultáneas")
+    parser.add_argument('--url', default='http://127.0.0.1:8501', help="Servidor ya levantado")
+    parser.add_argument('--pid', type=int, help="PID del servidor, para medir su memoria")
+    parser.add_argument('--lanzar', action='store_true', help="Levantar un servidor propio para la prueba")
+    parser.add_argument('--sesiones', type=int, default=10)
+    parser.add_argument('--acciones', type=int, default=8, help="Cambios de widget por sesión")
+    parser.add_argument('--pausa', type=float, default=1.0, help="Pausa máxima (s) entre cambios de una sesión")
+    parser.add_argument('--presupuesto-p95', type=float, help="Máximo en ms para el p95 de las ejecuciones")
+    parser.add_argument('--json', action='store_true', help="Imprimir el resumen como JSON")
+    args = parser.parse_args()
+
+    try:
+        import websockets  # noqa: F401
+    except ImportError:
+        sys.exit("Falta el paquete websockets (pip install websockets)")
+
+    proceso = None
+    url, pid = args.url, args.pid
+    if args.lanzar:
+        proceso, url = lanzar_servidor()
+        pid = proceso.pid
+    try:
+        resultados, duracion, rss_base, rss_pico, rss_final = asyncio.run(
+            prueba(url, pid, args.sesiones, args.acciones, args.pausa)
+        )
+    finally:
+        if proceso is not None:
+            proceso.terminate()
+            proceso.wait()
+
+    por_accion = {}
+    for nombre, ms, recibidos in resultados:
+        por_accion.setdefault(nombre, []).append((ms, recibidos))
+    interacciones = [ms for nombre, ms, _ in resultados if nombre != 'Carga inicial']
+    resumen = {
+        'sesiones': args.sesiones,
+        'ejecuciones': len(resultados),
+        'duracion_s': duracion,
+        'p50_ms': _percentil(interacciones, 50),
+        'p95_ms': _percentil(interacciones, 95),
+        'acciones': {
+            nombre: {
+                'n': len(valores),
+                'p50_ms': _percentil([ms for ms, _ in valores], 50),
+                'p95_ms': _percentil([ms for ms, _ in valores], 95),
+                'kb_promedio': sum(b for _, b in valores) / len(valores) / 1024,
+            }
+            for nombre, valores in por_accion.items()
+        },
+        'rss_base_mb': rss_base / 1024 if rss_base else None,
+        'rss_pico_mb': rss_pico / 1024 if rss_pico else None,
+        'rss_final_mb': rss_final / 1024 if rss_final else None,
+        'rss_por_sesion_mb': (rss_pico - rss_base) / 1024 / args.sesiones if rss_base and rss_pico else None,
+    }
+
+    if args.json:
+        print(json.dumps(resumen, ensure_ascii=False, indent=2))
+    else:
+        print(f"{args.sesiones} sesiones, {len(resultados)} ejecuciones en {duracion:,.1f} s")
+        print(f"Interacciones: p50 {resumen['p50_ms']:,.0f} ms, p95 {resumen['p95_ms']:,.0f} ms")
+        for nombre, valores in resumen['acciones'].items():
+            print(f"  {nombre:<22} n={valores['n']:<4} p50 {valores['p50_ms']:8,.0f} ms  "
+                  f"p95 {valores['p95_ms']:8,.0f} ms  {valores['kb_promedio']:8,.1f} KB")
+        if resumen['rss_base_mb'] is not None:
+            print(f"Memoria del servidor: base {resumen['rss_base_mb']:,.0f} MB, pico {resumen['rss_pico_mb']:,.0f} MB, "
+                  f"final {resumen['rss_final_mb']:,.0f} MB ({resumen['rss_por_sesion_mb']:,.1f} MB por sesión)")
+
+    if args.presupuesto_p95 is not None and resumen['p95_ms'] > args.presupuesto_p95:
+        print("Presupuesto de latencia superado")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Componentes HTML del dashboard (tarjetas de KPIs y de nivel de riesgo) y la hoja
+de estilos única que usan.
+
+Los estilos viven en static/dashboard.css. Si Streamlit sirve archivos estáticos
+(server.enableStaticServing, ver .streamlit/config.toml) cada ejecución envía
+sólo un <link> con la versión de la hoja en la URL y el navegador la descarga una
+vez; si no, se incrusta la hoja completa en un único bloque <style>. Las tarjetas
+y los encabezados de sección usan clases de esa hoja en vez de estilos en línea,
+y los íconos son emoji (no se pide ninguna imagen externa).
+"""
+import hashlib
+import os
+from functools import lru_cache
+
+import streamlit as st
+
+RUTA_ESTILOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'dashboard.css')
+
+# (clase, ícono, título, formato del valor) de cada tarjeta de KPI, por fila
+TARJETAS_KPI = [
+    [
+        ('kpi-cuentas', '💳', 'TOTAL CUENTAS', lambda k: f"{k['total_cuentas']:,}"),
+        ('kpi-deuda', '💰', 'DEUDA TOTAL', lambda k: f"S/. {k['monto_deuda']:,.2f}"),
+        ('kpi-gastos', '🏦', 'GASTOS ADMIN', lambda k: f"S/. {k['monto_gastos_admin']:,.2f}"),
+    ],
+    [
+        ('kpi-barrido', '📈', '% BARRIDO', lambda k: f"{k['porcentaje_barrido']:.1f}%"),
+        ('kpi-planillas', '🏦', 'REC. PLANILLAS', lambda k: f"S/. {k['rec_planillas']:,.2f}"),
+        ('kpi-rec-gastos', '🏧', 'REC. GASTOS', lambda k: f"S/. {k['rec_gastos']:,.2f}"),
+    ],
+]
+# Nivel de riesgo -> (clase, ícono)
+TARJETAS_NIVEL = {
+    '+ALTA': ('nivel-mas-alta', '🧨'),
+    'ALTA': ('nivel-alta', '🟢'),
+    'MEDIA': ('nivel-media', '🟡'),
+    'BAJA': ('nivel-baja', '🔴'),
+}
+
+
+@lru_cache(maxsize=1)
+def hoja_de_estilos():
+    """Contenido de la hoja y su versión (hash corto del contenido)."""
+    with open(RUTA_ESTILOS, encoding='utf-8') as f:
+        css = f.read()
+    return css, hashlib.sha1(css.encode('utf-8')).hexdigest()[:10]
+
+
+def inyectar_estilos():
+    css, version = hoja_de_estilos()
+    if st.get_option('server.enableStaticServing'):
+        html = f"<link rel='stylesheet' href='app/static/dashboard.css?v={version}'>"
+    else:
+        html = f"<style>\n{css}</style>"
+    st.markdown(html, unsafe_allow_html=True)
+
+
+def encabezado(icono, titulo, etiqueta='h2', clase=''):
+    """HTML del encabezado de una sección: ícono emoji y título (h1, h2 o h3)."""
+    clases = f"encabezado {clase}".strip()
+    return (
+        f"<div class='{clases}'><span class='encabezado-icono'>{icono}</span>"
+        f"<{etiqueta}>{titulo}</{etiqueta}></div>"
+    )
+
+
+def tarjetas_kpi(kpis):
+    """HTML de las seis tarjetas de KPIs (claves de DatosDashboard.kpis)."""
+    filas = []
+    for fila in TARJETAS_KPI:
+        tarjetas = ''.join(
+            f"<div class='kpi-card {clase}'><h4><span class='kpi-icono'>{icono}</span> {titulo}</h4>"
+            f"<p class='kpi-valor'>{valor(kpis)}</p></div>"
+            for clase, icono, titulo, valor in fila
+        )
+        filas.append(f"<div class='kpi-row'>{tarjetas}</div>")
+    return "<div class='kpi-separador'></div>".join(filas)
+
+
+def tarjetas_nivel(resumen_nivel):
+    """HTML de una tarjeta por nivel de riesgo (ver procesamiento.resumen_por_nivel)."""
+    tarjetas = []
+    for _, row in resumen_nivel.iterrows():
+        nivel = row['NIVEL_RIESGO']
+        clase, icono = TARJETAS_NIVEL.get(nivel, ('', ''))
+        tarjetas.append(
+            f"<div class='nivel-card {clase}'>"
+            f"<h3><span class='nivel-icono'>{icono}</span> {nivel}</h3>"
+            f"<p><b>Cuentas:</b> {int(row['CUENTAS']):,}</p>"
+            f"<p><b>Deuda:</b> S/. {int(row['DEUDA']):,}</p>"
+            f"<p><b>Recuperado:</b> S/. {int(row['RECUPERADO']):,}</p>"
+            f"<p><b>% del total:</b> {row['% DEL TOTAL']:.1f}%</p>"
+            "</div>"
+        )
+    return f"<div class='nivel-row'>{''.join(tarjetas)}</div>"
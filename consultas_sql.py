@@ -0,0 +1,155 @@
+"""
+Motor SQL opcional (DuckDB) para los cálculos del núcleo.
+
+Expone las mismas funciones que procesamiento (resúmenes por campaña, asesor,
+prioridad y nivel, clasificación de riesgo, Clientes TOP y pagos por día) pero
+las resuelve como consultas SQL de DuckDB sobre los DataFrames ya cargados, que
+DuckDB lee sin copiarlos. DuckDB paraleliza cada consulta y puede trabajar fuera
+de memoria, lo que sirve para historiales de varios meses.
+
+Los resultados tienen las mismas columnas, tipos y orden que la versión pandas;
+los montos pueden diferir en la última cifra decimal por el orden de las sumas.
+Requiere el paquete duckdb (opcional); ver disponible().
+"""
+import importlib.util
+
+import numpy as np
+import pandas as pd
+
+ORDEN_NIVELES = ['+ALTA', 'ALTA', 'MEDIA', 'BAJA']
+
+# Misma regla que procesamiento.clasificar_nivel_riesgo
+_SQL_NIVEL_RIESGO = """
+    CASE
+        WHEN "PRIORIDAD_COD" = 13
+             AND lower(CAST("CONTACTABILIDAD" AS VARCHAR)) = 'contacto directo'
+             AND coalesce("REC. PLANILLAS", 0) = 0 THEN '+ALTA'
+        WHEN "PRIORIDAD_COD" = 13 THEN 'ALTA'
+        WHEN "PRIORIDAD_COD" BETWEEN 5 AND 12 THEN 'MEDIA'
+        ELSE 'BAJA'
+    END
+"""
+
+
+def disponible():
+    return importlib.util.find_spec('duckdb') is not None
+
+
+def _consultar(sql, parametros=None, **tablas):
+    """Ejecuta sql en una conexión en memoria con cada DataFrame registrado como tabla."""
+    import duckdb
+
+    with duckdb.connect() as conexion:
+        for nombre, df in tablas.items():
+            conexion.register(nombre, df)
+        return conexion.execute(sql, parametros or []).df()
+
+
+def _como_categoria(resultado, df, columna):
+    """Devuelve la columna de agrupación con el mismo dtype que tiene en df (p. ej. category)."""
+    if isinstance(df[columna].dtype, pd.CategoricalDtype):
+        # DuckDB devuelve las categorías como ENUM (categórico ordenado)
+        resultado[columna] = resultado[columna].astype(str).astype(df[columna].dtype)
+    return resultado
+
+
+def clasificar_nivel_riesgo(df):
+    """Copia de df con la columna NIVEL_RIESGO calculada en SQL."""
+    nivel = _consultar(
+        f'SELECT {_SQL_NIVEL_RIESGO} AS NIVEL_RIESGO FROM cuentas ORDER BY _fila',
+        cuentas=df[['PRIORIDAD_COD', 'CONTACTABILIDAD', 'REC. PLANILLAS']].assign(_fila=np.arange(len(df)))
+    )['NIVEL_RIESGO']
+    df_analisis = df.copy()
+    df_analisis['NIVEL_RIESGO'] = nivel.to_numpy(dtype=object)
+    return df_analisis
+
+
+def resumen_por_campana(df):
+    tabla = _consultar("""
+        SELECT
+            "CAMPAÑA",
+            count("CAMPAÑA") AS TOTAL_CUENTAS,
+            coalesce(sum("REC. PLANILLAS"), 0) AS REC_PLANILLAS,
+            coalesce(sum("REC. GASTOS"), 0) AS REC_GASTOS,
+            coalesce(sum("DEUDA TOTAL"), 0) AS DEUDA_TOTAL,
+            coalesce(sum("GASTOS ADMIN"), 0) AS GASTOS_ADMIN,
+            count("ULTIMA FECHA GESTION") AS GESTIONADOS
+        FROM cuentas
+        WHERE "CAMPAÑA" IS NOT NULL
+        GROUP BY "CAMPAÑA"
+        ORDER BY CAST("CAMPAÑA" AS VARCHAR)
+    """, cuentas=df)
+    tabla['% PLANILLAS'] = np.where(tabla['DEUDA_TOTAL'] > 0, tabla['REC_PLANILLAS'] / tabla['DEUDA_TOTAL'] * 100, 0)
+    tabla['% GASTOS ADMIN'] = np.where(tabla['GASTOS_ADMIN'] > 0, tabla['REC_GASTOS'] / tabla['GASTOS_ADMIN'] * 100, 0)
+    tabla['% BARRIDO'] = np.where(tabla['TOTAL_CUENTAS'] > 0, tabla['GESTIONADOS'] / tabla['TOTAL_CUENTAS'] * 100, 0)
+    return _como_categoria(tabla, df, 'CAMPAÑA')
+
+
+def _resumen_por(df, columna):
+    tabla = _consultar(f"""
+        SELECT
+            "{columna}",
+            count("{columna}") AS QdeCuentas,
+            count("ULTIMA FECHA GESTION") AS Gestionados,
+            coalesce(sum("DEUDA TOTAL"), 0) AS DeudaTotal,
+            coalesce(sum("REC. PLANILLAS"), 0) AS RecPlanillas,
+            coalesce(sum("GASTOS ADMIN"), 0) AS GastosAdmin,
+            coalesce(sum("REC. GASTOS"), 0) AS RecGastos
+        FROM cuentas
+        WHERE "{columna}" IS NOT NULL
+        GROUP BY "{columna}"
+        ORDER BY CAST("{columna}" AS VARCHAR)
+    """, cuentas=df[[columna, 'ULTIMA FECHA GESTION', 'DEUDA TOTAL', 'REC. PLANILLAS', 'GASTOS ADMIN', 'REC. GASTOS']])
+    if not isinstance(df[columna].dtype, pd.CategoricalDtype):
+        tabla[columna] = tabla[columna].astype(df[columna].dtype)
+    return _como_categoria(tabla, df, columna)
+
+
+def resumen_por_asesor(df):
+    return _resumen_por(df, 'ASESOR')
+
+
+def resumen_por_prioridad(df):
+    return _resumen_por(df, 'PRIORIDAD')
+
+
+def resumen_por_nivel(df_analisis):
+    resumen_nivel = _consultar("""
+        SELECT
+            NIVEL_RIESGO,
+            count(NIVEL_RIESGO) AS CUENTAS,
+            coalesce(sum("DEUDA TOTAL"), 0) AS DEUDA,
+            coalesce(sum("REC. PLANILLAS"), 0) AS RECUPERADO
+        FROM cuentas
+        WHERE NIVEL_RIESGO IS NOT NULL
+        GROUP BY NIVEL_RIESGO
+        ORDER BY NIVEL_RIESGO
+    """, cuentas=df_analisis[['NIVEL_RIESGO', 'DEUDA TOTAL', 'REC. PLANILLAS']])
+    resumen_nivel['NIVEL_RIESGO'] = resumen_nivel['NIVEL_RIESGO'].astype(df_analisis['NIVEL_RIESGO'].dtype)
+    resumen_nivel['% DEL TOTAL'] = resumen_nivel['CUENTAS'] / resumen_nivel['CUENTAS'].sum() * 100
+    resumen_nivel['ORDEN'] = [ORDEN_NIVELES.index(n) if n in ORDEN_NIVELES else 99 for n in resumen_nivel['NIVEL_RIESGO']]
+    return resumen_nivel.sort_values('ORDEN')
+
+
+def top_clientes(df, campana, n):
+    """Las n cuentas de mayor DEUDA TOTAL de una campaña, con el mismo índice que en df."""
+    posiciones = _consultar("""
+        SELECT _fila FROM cuentas
+        WHERE CAST("CAMPAÑA" AS VARCHAR) = ?
+        ORDER BY "DEUDA TOTAL" DESC NULLS LAST, _fila
+        LIMIT ?
+    """, [str(campana), int(n)], cuentas=df[['CAMPAÑA', 'DEUDA TOTAL']].assign(_fila=np.arange(len(df))))['_fila']
+    return df.iloc[posiciones.to_numpy()]
+
+
+def pagos_por_dia(df_pagos, tipo_pago):
+    """Monto pagado por día para un tipo de pago (fecha_dia como datetime.date)."""
+    por_dia = _consultar("""
+        SELECT CAST(fecha AS DATE) AS fecha_dia, coalesce(sum(monto), 0) AS monto
+        FROM pagos
+        WHERE tipo_pago = ? AND fecha IS NOT NULL
+        GROUP BY fecha_dia
+        ORDER BY fecha_dia
+    """, [tipo_pago], pagos=df_pagos[['fecha', 'monto', 'tipo_pago']])
+    por_dia['fecha_dia'] = pd.to_datetime(por_dia['fecha_dia']).dt.date
+    return por_dia
@@ -0,0 +1,100 @@
+"""
+Conversión por canal de contacto: CONTACTABILIDAD x PRIORIDAD -> recaudo.
+
+Para cada valor de CONTACTABILIDAD y cada código de prioridad (PRIORIDAD_COD)
+cuenta las cuentas, el % con algún pago, el recaudo promedio por cuenta que
+pagó y la tasa de recupero de planillas (sobre DEUDA TOTAL) y de gastos (sobre
+GASTOS ADMIN). Se agrupa una sola vez sobre los códigos enteros de las dos
+columnas (una clave combinada y np.bincount), en _derivar, de modo que queda
+calculada por versión de los datos y por combinación de filtros globales.
+"""
+import numpy as np
+import pandas as pd
+
+SIN_CONTACTABILIDAD = 'Sin dato'
+SIN_PRIORIDAD = 'Sin prioridad'
+
+# Indicador -> (descripción, formato en la tabla y en el mapa de calor)
+INDICADORES = {
+    '% CON PAGO': ('% de cuentas con algún pago', '{:.1f}%'),
+    '% RECUPERO PLANILLAS': ('% recuperado de la DEUDA TOTAL', '{:.2f}%'),
+    '% RECUPERO GASTOS': ('% recuperado de los GASTOS ADMIN', '{:.2f}%'),
+    'PROMEDIO PLANILLAS': ('REC. PLANILLAS promedio por cuenta que pagó', 'S/. {:,.0f}'),
+    'PROMEDIO GASTOS': ('REC. GASTOS promedio por cuenta que pagó', 'S/. {:,.0f}'),
+    'CUENTAS': ('Cuentas', '{:,.0f}'),
+}
+COLUMNAS = [
+    'CONTACTABILIDAD', 'PRIORIDAD', 'CUENTAS', 'CON PAGO', '% CON PAGO',
+    'DEUDA TOTAL', 'REC. PLANILLAS', 'PROMEDIO PLANILLAS', '% RECUPERO PLANILLAS',
+    'GASTOS ADMIN', 'REC. GASTOS', 'PROMEDIO GASTOS', '% RECUPERO GASTOS',
+]
+
+
+def _montos(df, columna):
+    return np.nan_to_num(df[columna].to_numpy(dtype='float64'))
+
+
+def _cociente(numerador, denominador, factor=1.0):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominador > 0, numerador / denominador * factor, 0.0)
+
+
+def matriz(df):
+    """
+    Una fila por combinación CONTACTABILIDAD x PRIORIDAD con cuentas (sólo las
+    combinaciones presentes), ordenada por contactabilidad y prioridad descendente.
+    """
+    contacto = df['CONTACTABILIDAD']
+    if not isinstance(contacto.dtype, pd.CategoricalDtype):
+        contacto = contacto.astype('category')
+    categorias = [str(c) for c in contacto.cat.categories] + [SIN_CONTACTABILIDAD]
+    codigos_contacto = contacto.cat.codes.to_numpy().astype(np.int64)
+    codigos_contacto[codigos_contacto < 0] = len(categorias) - 1
+    # 0 = sin código de prioridad (los códigos válidos empiezan en 1)
+    prioridad = df['PRIORIDAD_COD'].fillna(0).to_numpy(dtype=np.int64)
+    n_prioridad = int(prioridad.max()) + 1 if len(prioridad) else 1
+    clave = codigos_contacto * n_prioridad + prioridad
+    n_grupos = len(categorias) * n_prioridad
+
+    def suma(pesos=None):
+        return np.bincount(clave, weights=pesos, minlength=n_grupos)
+
+    planillas, gastos = _montos(df, 'REC. PLANILLAS'), _montos(df, 'REC. GASTOS')
+    cuentas = suma()
+    con_pago = suma(((planillas > 0) | (gastos > 0)).astype('float64'))
+    pagaron_planillas = suma((planillas > 0).astype('float64'))
+    pagaron_gastos = suma((gastos > 0).astype('float64'))
+    deuda, gastos_admin = suma(_montos(df, 'DEUDA TOTAL')), suma(_montos(df, 'GASTOS ADMIN'))
+    rec_planillas, rec_gastos = suma(planillas), suma(gastos)
+
+    tabla = pd.DataFrame({
+        'CONTACTABILIDAD': np.repeat(categorias, n_prioridad),
+        'PRIORIDAD': np.tile(np.arange(n_prioridad), len(categorias)),
+        'CUENTAS': cuentas.astype(np.int64),
+        'CON PAGO': con_pago.astype(np.int64),
+        '% CON PAGO': _cociente(con_pago, cuentas, 100),
+        'DEUDA TOTAL': deuda,
+        'REC. PLANILLAS': rec_planillas,
+        'PROMEDIO PLANILLAS': _cociente(rec_planillas, pagaron_planillas),
+        '% RECUPERO PLANILLAS': _cociente(rec_planillas, deuda, 100),
+        'GASTOS ADMIN': gastos_admin,
+        'REC. GASTOS': rec_gastos,
+        'PROMEDIO GASTOS': _cociente(rec_gastos, pagaron_gastos),
+        '% RECUPERO GASTOS': _cociente(rec_gastos, gastos_admin, 100),
+    })
+    # Orden de las categorías (sin dato al final) y prioridad descendente (sin prioridad al final)
+    orden = np.arange(n_grupos).reshape(len(categorias), n_prioridad)[:, ::-1].ravel()
+    tabla = tabla.iloc[orden]
+    tabla = tabla[tabla['CUENTAS'] > 0]
+    tabla['PRIORIDAD'] = tabla['PRIORIDAD'].map(lambda p: f"{p:02d}" if p else SIN_PRIORIDAD)
+    return tabla[COLUMNAS].reset_index(drop=True)
+
+
+def pivote(tabla_conversion, indicador):
+    """Tabla CONTACTABILIDAD x PRIORIDAD (prioridad descendente) de un indicador, para el mapa de calor."""
+    if tabla_conversion.empty:
+        return pd.DataFrame()
+    prioridades = sorted(tabla_conversion['PRIORIDAD'].unique(), key=lambda p: (p != SIN_PRIORIDAD, p), reverse=True)
+    return tabla_conversion.pivot(index='CONTACTABILIDAD', columns='PRIORIDAD', values=indicador).reindex(
+        index=tabla_conversion['CONTACTABILIDAD'].unique(), columns=prioridades
+    )
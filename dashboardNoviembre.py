@@ -1,53 +1,225 @@
 import streamlit as st
 st.set_page_config(layout="wide", page_icon="🏦", page_title="AFP Noviembre 2025")
-# Forzar fondo blanco en toda la app
-st.markdown("""
-<style>
-body, .main, [data-testid="stAppViewContainer"], [data-testid="stAppViewBlockContainer"] {
-    background: #fff !important;
-}
-</style>
-""", unsafe_allow_html=True)
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import re
+import logging
 import os
 from datetime import datetime
+from functools import partial
+
+import antiguedad
+import asesores
+import busqueda
+import componentes
+import conversion
+import envio
+import exportes
+import filtros
+import historial
+import lista_trabajo
+import procesamiento
+import pronostico
+import reportes
+
+# Los módulos del dashboard registran con logging (motor xlsx usado, exportes,
+# historial); sin esto el logger raíz queda en WARNING y esos mensajes se pierden
+logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+# Bytes enviados al navegador por sección (servidor con DASHBOARD_MEDIR_ENVIO=1 y
+# ?envio=1 en la URL, ver envio.py)
+medidor = envio.MedidorEnvio(activo=st.query_params.get('envio') == '1')
+medidor.seccion('Estilos')
+# Hoja de estilos única (static/dashboard.css), incluido el fondo blanco de toda la app
+componentes.inyectar_estilos()
 
 # Ruta del archivo Excel (usar ruta relativa para Streamlit Cloud)
 EXCEL_PATH = os.path.join(os.getcwd(), "DATA TOTAL WORLDTEL NOVIEMBRE 2025.xlsx")  # Confirmar ruta relativa
-
-# Verificar si el archivo Excel existe
-if not os.path.exists(EXCEL_PATH):
-    st.error(f"El archivo Excel no se encuentra en la ruta especificada: {EXCEL_PATH}. Verifica que el archivo exista y que la ruta sea correcta.")
-else:
-    try:
-        df = pd.read_excel(EXCEL_PATH)
-    except Exception as e:
-        st.error(f"Error al cargar el archivo Excel: {e}")
+# Para analizar varios meses, agregar aquí los demás archivos WORLDTEL: se parsean en paralelo
+EXCEL_PATHS = [EXCEL_PATH]
+# Leer todas las hojas de cada libro (por defecto sólo la primera)
+LEER_TODAS_LAS_HOJAS = False
+# Base SQLite con la foto de KPIs de cada versión cargada (ver historial.py). En un
+# contenedor efímero (Streamlit Cloud) el archivo se pierde en cada arranque en frío;
+# DASHBOARD_HISTORIAL permite ubicarlo en un volumen persistente
+HISTORIAL_PATH = os.environ.get("DASHBOARD_HISTORIAL", "historial_kpis.sqlite")
+# Exportes estándar precalculados por versión de los datos (ver exportes.py);
+# DASHBOARD_EXPORTES permite ubicarlos en otro directorio
+EXPORTES_PATH = os.environ.get("DASHBOARD_EXPORTES", "exportes_cache")
+# Motor de los resúmenes: 'pandas' o 'duckdb' (opcional, ver consultas_sql.py)
+MOTOR_CONSULTAS = 'pandas'
 
 # Cargar datos
-
-def load_data():
-    df = pd.read_excel(EXCEL_PATH)
-    # Verificar que la columna 'razon_social' esté presente
-    if 'RAZON SOCIAL' not in df.columns:
-        st.error("La columna 'RAZON SOCIAL' no está presente en el archivo Excel.")
-    return df
-
-df = load_data()
+# Los datos y todas las tablas derivadas se construyen una sola vez por proceso y
+# se comparten (sólo lectura) entre todas las sesiones; la versión de los archivos
+# forma parte de la clave para recargar cuando se reemplaza un Excel.
+@st.cache_resource(show_spinner="Cargando datos...")
+def cargar_datos_compartidos(rutas, version):
+    df = procesamiento.cargar_excels(rutas, todas_las_hojas=LEER_TODAS_LAS_HOJAS)
+    datos = procesamiento.construir_datos(df, version=version, motor=MOTOR_CONSULTAS)
+    historial.registrar(HISTORIAL_PATH, datos)
+    # Los libros de las descargas se arman en segundo plano mientras se pinta el dashboard
+    exportes.en_segundo_plano(EXPORTES_PATH, datos)
+    return datos
+
+# Versiones de los archivos ya construidas en este proceso
+@st.cache_resource
+def versiones_cargadas():
+    return set()
+
+medidor.seccion('Carga de datos y KPIs previos')
+# Verificar si los archivos Excel existen
+for ruta in EXCEL_PATHS:
+    if not os.path.exists(ruta):
+        st.error(f"El archivo Excel no se encuentra en la ruta especificada: {ruta}. Verifica que el archivo exista y que la ruta sea correcta.")
+        st.stop()
+version_datos = procesamiento.version_archivo(*EXCEL_PATHS)
+# Primer pintado: en un arranque en frío se muestran los KPIs guardados en el historial
+# para esta versión mientras se construyen los datos. Sólo acelera si el historial
+# sobrevivió al reinicio y los archivos conservan tamaño y fecha de modificación
+# (la versión los incluye); si no, se espera a la construcción completa
+vista_previa = st.empty()
+if version_datos not in versiones_cargadas():
+    kpis_previos = historial.leer_foto(HISTORIAL_PATH, version_datos)
+    if kpis_previos:
+        with vista_previa.container():
+            st.markdown(componentes.tarjetas_kpi(kpis_previos), unsafe_allow_html=True)
+            st.caption("⏳ KPIs de la última carga de estos archivos; cargando el detalle...")
+try:
+    datos = cargar_datos_compartidos(tuple(EXCEL_PATHS), version_datos)
+except Exception as e:
+    st.error(f"Error al cargar el archivo Excel: {e}")
+    st.stop()
+versiones_cargadas().add(version_datos)
+vista_previa.empty()
+
+# ================= BARRA DE FILTROS GLOBALES =================
+medidor.seccion('Filtros globales')
+# Se aplican a todas las secciones; cada combinación se resuelve con los bitmaps
+# precalculados en datos.indice y el resultado se comparte entre sesiones.
+@st.cache_resource(max_entries=32, show_spinner=False)
+def datos_filtrados(version, selecciones, rango_fechas, _datos):
+    mascara = _datos.indice.mascara(dict(selecciones), rango_fechas)
+    return procesamiento.filtrar_datos(_datos, mascara)
+
+st.sidebar.markdown("## 🔎 Filtros globales")
+selecciones = []
+for columna, etiqueta in filtros.DIMENSIONES_FILTRO.items():
+    valores = st.sidebar.multiselect(etiqueta, datos.indice.opciones(columna), key=f"filtro_global_{columna}", placeholder="Todos")
+    selecciones.append((columna, tuple(valores)))
+
+rango_fechas = None
+fechas_gestion = datos.df['ULTIMA FECHA GESTION'].dropna()
+if not fechas_gestion.empty:
+    fecha_min, fecha_max = fechas_gestion.min().date(), fechas_gestion.max().date()
+    rango = st.sidebar.date_input("Última gestión", value=(fecha_min, fecha_max), min_value=fecha_min, max_value=fecha_max, key="filtro_global_fecha")
+    # Sólo se filtra si el rango fue acotado (por defecto se incluyen las cuentas sin gestión)
+    if isinstance(rango, (tuple, list)) and len(rango) == 2 and tuple(rango) != (fecha_min, fecha_max):
+        rango_fechas = tuple(sorted(rango))
+
+# La búsqueda de clientes trabaja siempre sobre el conjunto completo
+datos_completos = datos
+if rango_fechas or any(valores for _, valores in selecciones):
+    datos = datos_filtrados(datos.version, tuple(selecciones), rango_fechas, datos)
+    st.sidebar.caption(f"{len(datos.df):,} cuentas coinciden con los filtros")
+    if datos.df.empty:
+        st.warning("Ninguna cuenta coincide con los filtros seleccionados.")
+        st.stop()
+excluir_cuarentena = st.sidebar.toggle(
+    "Excluir cuentas en cuarentena de los KPIs", key="excluir_cuarentena",
+    disabled=datos_completos.cuarentena.empty
+)
+hay_filtros = datos is not datos_completos
+
+def descarga(nombre, generar):
+    """Exporte precalculado `nombre` si no hay filtros globales; si no, generar() al hacer clic."""
+    if hay_filtros:
+        return generar
+    return partial(exportes.leer_o_generar, EXPORTES_PATH, datos.version, nombre, generar)
+# ================= FIN BARRA DE FILTROS GLOBALES =================
+
+df = datos.df
+
+# Valores que no pudieron convertirse al tipo declarado en el esquema
+if not datos.rechazos.empty:
+    with st.expander(f"⚠️ {len(datos.rechazos):,} valores del Excel no pudieron convertirse a su tipo y se ignoraron"):
+        st.dataframe(datos.rechazos, use_container_width=True, hide_index=True)
+
+# Cuentas que incumplen alguna regla de calidad (ver calidad.py), del conjunto completo
+if not datos_completos.cuarentena.empty:
+    with st.expander(f"🧪 {len(datos_completos.cuarentena):,} cuentas en cuarentena por reglas de calidad"):
+        st.dataframe(
+            datos_completos.resumen_calidad.style.format({'CUENTAS': '{:,}', 'DEUDA': 'S/. {:,.2f}', '% DE CUENTAS': '{:.2f}%'}),
+            use_container_width=True, hide_index=True
+        )
+        st.dataframe(datos_completos.cuarentena, use_container_width=True, hide_index=True)
 
 # Ocultar mensajes de verificación del archivo Excel y columnas disponibles
 # st.write("Columnas disponibles en el DataFrame:", df.columns.tolist())
 # st.success("Archivo Excel cargado correctamente.")
 
-# Ajustar el nombre de la columna 'RAZON SOCIAL' al cargar los datos desde el archivo Excel
-df['razon_social'] = df['RAZON SOCIAL'] if 'RAZON SOCIAL' in df.columns else ''
-
 # Definir la función render_historial_pagos al inicio del archivo
 
-def render_historial_pagos(df_pagos):
+def mostrar_recaudo_acumulado(por_dia, tipo_pago, proyeccion_recaudo, fecha_fin=None):
+    """
+    Curva de recaudo acumulado y, si el rango de fechas llega hasta la fecha de
+    corte, la proyección al cierre del mes con su intervalo (ver pronostico.pronosticar).
+    """
+    acumulado = por_dia.set_index('fecha_dia')['monto'].cumsum().rename('recaudo_acumulado')
+    filas = proyeccion_recaudo[
+        (proyeccion_recaudo['campana'] == 'TOTAL') & (proyeccion_recaudo['tipo_pago'] == tipo_pago)
+    ] if not proyeccion_recaudo.empty else proyeccion_recaudo
+    if filas.empty or acumulado.empty or (fecha_fin is not None and fecha_fin < filas.iloc[0]['FECHA_CORTE'].date()):
+        st.line_chart(acumulado)
+        return
+
+    fila = filas.iloc[0]
+    # La curva con proyección sólo acumula el mes proyectado: los pagos de otros
+    # meses (p. ej. los primeros días del mes siguiente) quedan fuera
+    inicio_mes, corte = fila['FIN_MES'].replace(day=1).date(), fila['FECHA_CORTE'].date()
+    del_mes = (acumulado.index >= inicio_mes) & (acumulado.index <= corte)
+    if not del_mes.any():
+        st.line_chart(acumulado)
+        return
+    fuera_del_mes = por_dia.loc[~del_mes, 'monto'].sum()
+    acumulado = por_dia[del_mes].set_index('fecha_dia')['monto'].cumsum().rename('recaudo_acumulado')
+    serie = pronostico.serie_proyeccion(fila, acumulado.iloc[-1])
+    st.line_chart(pd.concat([acumulado, serie], axis=1))
+    st.caption(
+        f"Proyección del recaudo de {fila['FIN_MES'].strftime('%m/%Y')} al cierre: S/. {fila['PROYECCION']:,.2f} "
+        f"(intervalo S/. {fila['LIMITE_INF']:,.2f} – S/. {fila['LIMITE_SUP']:,.2f}; método: {fila['METODO']})"
+        + (f" · S/. {fuera_del_mes:,.2f} pagados fuera de ese mes no se incluyen" if fuera_del_mes else "")
+    )
+    por_campana = proyeccion_recaudo[
+        (proyeccion_recaudo['tipo_pago'] == tipo_pago) & (proyeccion_recaudo['campana'] != 'TOTAL')
+    ]
+    with st.expander("Proyección por campaña"):
+        st.dataframe(
+            por_campana[['campana', 'ACUMULADO', 'PROYECCION', 'LIMITE_INF', 'LIMITE_SUP', 'METODO']].rename(columns={
+                'campana': 'CAMPAÑA',
+                'ACUMULADO': 'RECAUDO DEL MES',
+                'PROYECCION': 'PROYECCIÓN',
+                'LIMITE_INF': 'LÍMITE INFERIOR',
+                'LIMITE_SUP': 'LÍMITE SUPERIOR',
+                'METODO': 'MÉTODO'
+            }).style.format({c: 'S/. {:,.2f}' for c in ['RECAUDO DEL MES', 'PROYECCIÓN', 'LÍMITE INFERIOR', 'LÍMITE SUPERIOR']}),
+            use_container_width=True,
+            hide_index=True
+        )
+
+@st.fragment
+def grafico_pagos_por_dia(por_dia, tipo_pago, proyeccion_recaudo, fecha_fin, key):
+    """Gráfico de un tab de pagos; cambiar el tipo de gráfico sólo vuelve a dibujar este tab."""
+    # Agregar selectbox para alternar entre evolución de pagos y recaudo acumulado
+    tipo_grafico = st.selectbox("Tipo de gráfico", ["Evolución de Pagos", "Recaudo Acumulado"], key=key)
+
+    if tipo_grafico == "Evolución de Pagos":
+        st.line_chart(por_dia.set_index('fecha_dia'))
+    elif tipo_grafico == "Recaudo Acumulado":
+        mostrar_recaudo_acumulado(por_dia, tipo_pago, proyeccion_recaudo, fecha_fin)
+
+# Fragmento: los filtros de tipo de pago y fechas sólo vuelven a ejecutar el historial de pagos
+@st.fragment
+def render_historial_pagos(df_pagos, proyeccion_recaudo, motor='pandas'):
     """
     Renderiza el historial de pagos en la interfaz de Streamlit.
     Maneja las columnas FECHA DE PAGO P, REC. PLANILLAS, FECHA DE PAGO G, REC. GASTOS.
@@ -59,15 +231,11 @@ def render_historial_pagos(df_pagos):
     st.markdown("---")
     st.subheader("💰 Historial de Pagos Recibidos")
 
-    # Filtros
-    col_filtro1, col_filtro2, col_filtro3 = st.columns(3)
+    # Filtros propios de los pagos (campaña, asesor, etc. vienen de la barra de filtros globales)
+    col_filtro2, col_filtro3 = st.columns(2)
 
-    campanas_pagos = ["Todas"] + sorted(df_pagos['campana'].dropna().unique().tolist())
     tipos_pago = ["Todos"] + sorted(df_pagos['tipo_pago'].dropna().unique().tolist())
 
-    with col_filtro1:
-        campana_pago_filter = st.selectbox("📋 Campaña (Pagos)", campanas_pagos, key="campana_pagos_historial")
-
     with col_filtro2:
         tipo_pago_filter = st.selectbox("💼 Tipo de Pago", tipos_pago, key="tipo_pagos_historial")
 
@@ -81,9 +249,7 @@ def render_historial_pagos(df_pagos):
             rango_fechas = (fecha_inicio, fecha_fin) if fecha_inicio <= fecha_fin else (fecha_fin, fecha_inicio)
 
     # Filtrar datos
-    df_pagos_filtrado = df_pagos.copy()
-    if campana_pago_filter != "Todas":
-        df_pagos_filtrado = df_pagos_filtrado[df_pagos_filtrado['campana'] == campana_pago_filter]
+    df_pagos_filtrado = df_pagos
     if tipo_pago_filter != "Todos":
         df_pagos_filtrado = df_pagos_filtrado[df_pagos_filtrado['tipo_pago'] == tipo_pago_filter]
     if rango_fechas:
@@ -112,6 +278,7 @@ def render_historial_pagos(df_pagos):
         st.metric("🏛️ Pagos Gastos", f"{len(df_pagos_filtrado[df_pagos_filtrado['tipo_pago'] == 'GASTOS']):,}")
 
     # Gráficos
+    calculo = procesamiento.motor_calculo(motor)
     if not df_pagos_filtrado.empty and 'fecha' in df_pagos_filtrado.columns:
         st.markdown("### 📈 Análisis de Pagos por Tipo")
         tab1, tab2, tab3 = st.tabs(["🏦 PAGOS PLANILLAS", "🏛️ PAGOS GASTOS", "📊 COMPARACIÓN"])
@@ -120,35 +287,15 @@ def render_historial_pagos(df_pagos):
             st.markdown("#### 🏦 Evolución de Pagos de Planillas por Día")
             df_planillas = df_pagos_filtrado[df_pagos_filtrado['tipo_pago'] == 'PLANILLAS']
             if not df_planillas.empty:
-                df_planillas_clean = df_planillas[df_planillas['fecha'].notna()].copy()
-                df_planillas_clean['fecha_dia'] = df_planillas_clean['fecha'].dt.date
-                planillas_por_dia = df_planillas_clean.groupby('fecha_dia')['monto'].sum().reset_index()
-
-                # Agregar selectbox para alternar entre evolución de pagos y recaudo acumulado
-                tipo_grafico = st.selectbox("Tipo de gráfico", ["Evolución de Pagos", "Recaudo Acumulado"], key="tipo_grafico_planillas")
-
-                if tipo_grafico == "Evolución de Pagos":
-                    st.line_chart(planillas_por_dia.set_index('fecha_dia'))
-                elif tipo_grafico == "Recaudo Acumulado":
-                    planillas_por_dia['recaudo_acumulado'] = planillas_por_dia['monto'].cumsum()
-                    st.line_chart(planillas_por_dia.set_index('fecha_dia')['recaudo_acumulado'])
+                planillas_por_dia = calculo.pagos_por_dia(df_planillas, 'PLANILLAS')
+                grafico_pagos_por_dia(planillas_por_dia, 'PLANILLAS', proyeccion_recaudo, rango_fechas[1] if rango_fechas else None, "tipo_grafico_planillas")
 
         with tab2:
             st.markdown("#### 🏛️ Evolución de Pagos de Gastos por Día")
             df_gastos = df_pagos_filtrado[df_pagos_filtrado['tipo_pago'] == 'GASTOS']
             if not df_gastos.empty:
-                df_gastos_clean = df_gastos[df_gastos['fecha'].notna()].copy()
-                df_gastos_clean['fecha_dia'] = df_gastos_clean['fecha'].dt.date
-                gastos_por_dia = df_gastos_clean.groupby('fecha_dia')['monto'].sum().reset_index()
-
-                # Agregar selectbox para alternar entre evolución de pagos y recaudo acumulado
-                tipo_grafico = st.selectbox("Tipo de gráfico", ["Evolución de Pagos", "Recaudo Acumulado"], key="tipo_grafico_gastos")
-
-                if tipo_grafico == "Evolución de Pagos":
-                    st.line_chart(gastos_por_dia.set_index('fecha_dia'))
-                elif tipo_grafico == "Recaudo Acumulado":
-                    gastos_por_dia['recaudo_acumulado'] = gastos_por_dia['monto'].cumsum()
-                    st.line_chart(gastos_por_dia.set_index('fecha_dia')['recaudo_acumulado'])
+                gastos_por_dia = calculo.pagos_por_dia(df_gastos, 'GASTOS')
+                grafico_pagos_por_dia(gastos_por_dia, 'GASTOS', proyeccion_recaudo, rango_fechas[1] if rango_fechas else None, "tipo_grafico_gastos")
 
         with tab3:
             st.markdown("#### 📊 Comparación: Planillas vs Gastos")
@@ -156,14 +303,10 @@ def render_historial_pagos(df_pagos):
             df_gastos = df_pagos_filtrado[df_pagos_filtrado['tipo_pago'] == 'GASTOS']
 
             if not df_planillas.empty or not df_gastos.empty:
-                df_planillas_clean = df_planillas[df_planillas['fecha'].notna()].copy()
-                df_planillas_clean['fecha_dia'] = df_planillas_clean['fecha'].dt.date
-                planillas_por_dia = df_planillas_clean.groupby('fecha_dia')['monto'].sum().reset_index()
+                planillas_por_dia = calculo.pagos_por_dia(df_planillas, 'PLANILLAS')
                 planillas_por_dia['tipo'] = 'Planillas'
 
-                df_gastos_clean = df_gastos[df_gastos['fecha'].notna()].copy()
-                df_gastos_clean['fecha_dia'] = df_gastos_clean['fecha'].dt.date
-                gastos_por_dia = df_gastos_clean.groupby('fecha_dia')['monto'].sum().reset_index()
+                gastos_por_dia = calculo.pagos_por_dia(df_gastos, 'GASTOS')
                 gastos_por_dia['tipo'] = 'Gastos'
 
                 comparacion_df = pd.concat([planillas_por_dia, gastos_por_dia], ignore_index=True)
@@ -182,8 +325,9 @@ def render_historial_pagos(df_pagos):
                 st.altair_chart(chart, use_container_width=True)
 
     # Mostrar detalle de pagos recientes
+    # (razon_social ya viene normalizada desde procesamiento.construir_df_pagos;
+    # df_pagos es compartido entre sesiones y no se modifica aquí)
     if not df_pagos.empty:
-        df_pagos['razon_social'] = df_pagos['razon_social'].fillna('Desconocido').astype(str).str.strip()
         # Cambiar los nombres de las columnas en la tabla 'Detalle de Pagos Recientes'
         st.markdown("### 📋 Detalle de Pagos Recientes")
         st.dataframe(df_pagos[['fecha', 'tipo_pago', 'campana', 'razon_social', 'monto']].rename(columns={
@@ -199,138 +343,117 @@ def render_historial_pagos(df_pagos):
 
 # Título principal con icono y tamaño grande
 st.markdown(
-    """
-    <div style='display: flex; align-items: center;'>
-        <img src='https://img.icons8.com/ios-filled/64/228B22/safe.png' style='margin-right: 16px;'/>
-        <h1 style='display: inline; font-size: 3rem; font-weight: bold;'>Dashboard AFP PRIMA - WORLDTEL 2025</h1>
-    </div>
-    """,
+    componentes.encabezado('🏦', 'Dashboard AFP PRIMA - WORLDTEL 2025', 'h1', 'encabezado-principal'),
     unsafe_allow_html=True
 )
 
 # Espaciado entre título y subtítulo
-st.markdown("<div style='height: 32px;'></div>", unsafe_allow_html=True)
-
-
-
-st.markdown("""
-<div style='display: flex; align-items: center;'>
-    <img src='https://img.icons8.com/color/48/000000/combo-chart.png' style='margin-right: 10px;'/>
-    <h3 style='display: inline; font-size: 2rem; margin: 0;'>KPIs</h3>
-</div>
-""", unsafe_allow_html=True)
-
-# KPIs
-total_cuentas = len(df)
-monto_deuda = df['DEUDA TOTAL'].sum()
-monto_gastos_admin = df['GASTOS ADMIN'].sum()
-rec_planillas = df['REC. PLANILLAS'].sum()
-rec_gastos = df['REC. GASTOS'].sum()
+st.markdown("<div class='espacio-l'></div>", unsafe_allow_html=True)
 
 
-# % Barrido (clientes gestionados)
-casos_barridos = df['ULTIMA FECHA GESTION'].notna().sum()
-porcentaje_barrido = (casos_barridos / total_cuentas * 100) if total_cuentas > 0 else 0
 
-# Tarjetas de KPIs
+medidor.seccion('KPIs')
+st.markdown(componentes.encabezado('📈', 'KPIs', 'h3'), unsafe_allow_html=True)
 
-# CSS para ocupar todo el ancho
-
-# CSS para ocupar todo el ancho y animación hover en tarjetas
-st.markdown("""
-<style>
-.kpi-row {
-    display: flex;
-    flex-wrap: wrap;
-    gap: 20px;
-    width: 100%;
-}
-.kpi-card {
-    flex: 1 1 0;
-    min-width: 220px;
-    max-width: 100%;
-    background: #fff;
-    border-radius: 20px;
-    padding: 30px;
-    box-shadow: 0 2px 8px rgba(0,0,0,0.07);
-    margin: 0;
-    transition: transform 0.2s, box-shadow 0.2s;
-}
-.kpi-card:hover {
-    transform: translateY(-8px) scale(1.04);
-    box-shadow: 0 8px 24px rgba(0,0,0,0.15);
-    z-index: 2;
-}
-.kpi-card h4 {
-    margin: 0 0 10px 0;
-}
-</style>
-""", unsafe_allow_html=True)
+# KPIs (sin las cuentas en cuarentena si así se eligió en la barra lateral)
+kpis = datos.kpis
+if excluir_cuarentena:
+    kpis = procesamiento.calcular_kpis(df[datos.banderas_calidad.to_numpy() == 0])
 
-st.markdown(f"""
-<div class='kpi-row'>
-    <div class='kpi-card' style='background: linear-gradient(135deg, #b3d8fd 0%, #6eb6ff 100%);'>
-        <h4><img src='https://img.icons8.com/ios-filled/24/000000/bank-cards.png'/> TOTAL CUENTAS</h4>
-        <p style='font-size:2.5rem; font-weight:bold; color:#1a4fa3; margin:0;'>{total_cuentas:,}</p>
-    </div>
-    <div class='kpi-card' style='background: linear-gradient(135deg, #c6f6d5 0%, #68d391 100%);'>
-        <h4><span style='font-size:1.2rem;'>💰</span> DEUDA TOTAL</h4>
-        <p style='font-size:2rem; font-weight:bold; color:#228b22; margin:0;'>S/. {monto_deuda:,.2f}</p>
-    </div>
-    <div class='kpi-card' style='background: linear-gradient(135deg, #ffe6b3 0%, #ffb366 100%);'>
-        <h4><span style='font-size:1.2rem;'>🏦</span> GASTOS ADMIN</h4>
-        <p style='font-size:2rem; font-weight:bold; color:#ff6600; margin:0;'>S/. {monto_gastos_admin:,.2f}</p>
-    </div>
-</div>
-<div style='height: 20px;'></div>
-<div class='kpi-row'>
-    <div class='kpi-card' style='background: linear-gradient(135deg, #fff9c4 0%, #ffe082 100%);'>
-        <h4><img src='https://img.icons8.com/ios-filled/24/000000/combo-chart.png'/> % BARRIDO</h4>
-        <p style='font-size:2rem; font-weight:bold; color:#ff9800; margin:0;'>{porcentaje_barrido:.1f}%</p>
-    </div>
-    <div class='kpi-card' style='background: linear-gradient(135deg, #f8bbd0 0%, #f06292 100%);'>
-        <h4><span style='font-size:1.2rem;'>🏦</span> REC. PLANILLAS</h4>
-        <p style='font-size:2rem; font-weight:bold; color:#ad1457; margin:0;'>S/. {rec_planillas:,.2f}</p>
-    </div>
-    <div class='kpi-card' style='background: linear-gradient(135deg, #e1bee7 0%, #ba68c8 100%);'>
-        <h4><img src='https://img.icons8.com/ios-filled/24/000000/atm.png'/> REC. GASTOS</h4>
-        <p style='font-size:2rem; font-weight:bold; color:#6a1b9a; margin:0;'>S/. {rec_gastos:,.2f}</p>
+# Tarjetas de KPIs (componentes.py; también se usan en el primer pintado)
+st.markdown(componentes.tarjetas_kpi(kpis), unsafe_allow_html=True)
+if excluir_cuarentena:
+    st.caption(f"KPIs sin {datos.kpis['total_cuentas'] - kpis['total_cuentas']:,} cuentas en cuarentena (ver 🧪 arriba)")
+# ================= EVOLUCIÓN DE KPIs =================
+medidor.seccion('Evolución de KPIs')
+# Fotos guardadas en cada recarga de datos (siempre del conjunto completo)
+with st.expander("📈 Evolución de KPIs"):
+    fotos_kpi = historial.leer_kpis(HISTORIAL_PATH)
+    if len(fotos_kpi) < 2:
+        st.info("La evolución se mostrará cuando se hayan cargado al menos dos versiones de los datos.")
+    else:
+        etiquetas_kpi = {
+            'total_cuentas': 'TOTAL CUENTAS',
+            'deuda_total': 'DEUDA TOTAL',
+            'gastos_admin': 'GASTOS ADMIN',
+            'porcentaje_barrido': '% BARRIDO',
+            'rec_planillas': 'REC. PLANILLAS',
+            'rec_gastos': 'REC. GASTOS',
+        }
+        kpi_tendencia = st.selectbox('Indicador:', list(etiquetas_kpi), index=4, format_func=etiquetas_kpi.get, key='kpi_tendencia')
+        # Si se recargó varias veces con la misma fecha de corte vale la última foto
+        st.line_chart(fotos_kpi.groupby('fecha_corte')[[kpi_tendencia]].last().rename(columns=etiquetas_kpi))
+        if kpi_tendencia in historial.COLUMNAS_CAMPANA:
+            por_campana = historial.leer_campanas(HISTORIAL_PATH)
+            st.caption("Por campaña")
+            st.line_chart(por_campana.pivot_table(index='fecha_corte', columns='campana', values=kpi_tendencia, aggfunc='last'))
+# ================= FIN EVOLUCIÓN DE KPIs =================
+# ================= BUSCAR CLIENTE =================
+medidor.seccion('Buscar cliente')
+st.markdown("### 🔍 Buscar cliente")
+@st.fragment
+def render_buscar_cliente(datos_completos):
+    consulta_cliente = st.text_input("Razón social o documento", key="buscar_cliente", placeholder="Ej.: universidad ricardo o 20147883952")
+    if consulta_cliente:
+        posiciones = datos_completos.indice_busqueda.buscar(consulta_cliente)
+        encontrados = datos_completos.df_analisis.iloc[posiciones]
+        if encontrados.empty:
+            st.info("No se encontraron cuentas para la búsqueda.")
+        else:
+            encontrados = encontrados.nlargest(busqueda.MAX_RESULTADOS, 'DEUDA TOTAL')
+            opcion_cliente = st.selectbox(
+                f"{len(posiciones):,} cuenta(s) encontrada(s)" + (f" (se muestran las {busqueda.MAX_RESULTADOS} de mayor deuda)" if len(posiciones) > busqueda.MAX_RESULTADOS else ""),
+                range(len(encontrados)),
+                format_func=lambda i: f"{encontrados['RAZON SOCIAL'].iloc[i]} · {encontrados['DOCUMENTO'].iloc[i]} · {encontrados['CAMPAÑA'].iloc[i]}",
+                key="cliente_encontrado"
+            )
+            cuenta = encontrados.iloc[opcion_cliente]
+
+            def _monto_pago(monto, fecha):
+                if pd.isna(monto) or monto <= 0:
+                    return "Sin pago"
+                return f"S/. {monto:,.2f}" + (f" ({fecha:%d/%m/%Y})" if pd.notna(fecha) else "")
+
+            ultima_gestion = cuenta['ULTIMA FECHA GESTION']
+            st.markdown(f"""
+<div class='ficha-cuenta'>
+    <h3>{cuenta['RAZON SOCIAL']}</h3>
+    <p class='ficha-detalle'>Documento {cuenta['DOCUMENTO']} · {cuenta['CAMPAÑA']} · Asesor {cuenta['ASESOR']} · Operador {cuenta['OPERADOR']}</p>
+    <div class='ficha-datos'>
+        <div><b>Deuda total</b><br>S/. {cuenta['DEUDA TOTAL']:,.2f}</div>
+        <div><b>Gastos admin</b><br>S/. {cuenta['GASTOS ADMIN']:,.2f}</div>
+        <div><b>REC. PLANILLAS</b><br>{_monto_pago(cuenta['REC. PLANILLAS'], cuenta['FECHA DE PAGO P'])}</div>
+        <div><b>REC. GASTOS</b><br>{_monto_pago(cuenta['REC. GASTOS'], cuenta['FECHA DE PAGO G'])}</div>
+        <div><b>Prioridad</b><br>{cuenta['PRIORIDAD']}</div>
+        <div><b>Nivel de riesgo</b><br>{cuenta['NIVEL_RIESGO']}</div>
+        <div><b>Contactabilidad</b><br>{cuenta['CONTACTABILIDAD'] if pd.notna(cuenta['CONTACTABILIDAD']) else 'Sin dato'}</div>
+        <div><b>Última gestión</b><br>{f"{ultima_gestion:%d/%m/%Y} ({cuenta['TRAMO_GESTION']} días)" if pd.notna(ultima_gestion) else 'Sin gestión'}</div>
     </div>
 </div>
 """, unsafe_allow_html=True)
+
+            # Otras cuentas del mismo deudor (ver deudores.indexar)
+            otras = datos_completos.df_analisis[
+                (datos_completos.df_analisis['DEUDOR'] == cuenta['DEUDOR']) & (datos_completos.df_analisis.index != cuenta.name)
+            ]
+            if not otras.empty:
+                st.caption(f"El deudor tiene {len(otras)} cuenta(s) más, con una deuda de S/. {otras['DEUDA TOTAL'].sum():,.2f}")
+                st.dataframe(
+                    otras[['CAMPAÑA', 'ASESOR', 'DEUDA TOTAL', 'REC. PLANILLAS', 'REC. GASTOS', 'NIVEL_RIESGO']]
+                    .style.format({'DEUDA TOTAL': 'S/. {:,.2f}', 'REC. PLANILLAS': 'S/. {:,.2f}', 'REC. GASTOS': 'S/. {:,.2f}'}),
+                    use_container_width=True, hide_index=True
+                )
+
+render_buscar_cliente(datos_completos)
+# ================= FIN BUSCAR CLIENTE =================
 # ================= TABLA RESUMEN POR CAMPAÑA =================
+medidor.seccion('Resumen por campaña')
 st.markdown("---")
 st.markdown("<h2>📋 Tabla Resumen por Campaña</h2>", unsafe_allow_html=True)
 
 
-# Agrupar por campaña y calcular los valores, incluyendo gestionados
-tabla_campana = df.groupby('CAMPAÑA').agg(
-    TOTAL_CUENTAS=('CAMPAÑA', 'count'),
-    REC_PLANILLAS=('REC. PLANILLAS', 'sum'),
-    REC_GASTOS=('REC. GASTOS', 'sum'),
-    DEUDA_TOTAL=('DEUDA TOTAL', 'sum'),
-    GASTOS_ADMIN=('GASTOS ADMIN', 'sum'),
-    GESTIONADOS=('ULTIMA FECHA GESTION', lambda x: x.notna().sum())
-).reset_index()
-
-# % PLANILLAS y % GASTOS ADMIN
-tabla_campana['% PLANILLAS'] = np.where(
-    tabla_campana['DEUDA_TOTAL'] > 0,
-    tabla_campana['REC_PLANILLAS'] / tabla_campana['DEUDA_TOTAL'] * 100,
-    0
-)
-tabla_campana['% GASTOS ADMIN'] = np.where(
-    tabla_campana['GASTOS_ADMIN'] > 0,
-    tabla_campana['REC_GASTOS'] / tabla_campana['GASTOS_ADMIN'] * 100,
-    0
-)
-
-# Añadir la columna % BARRIDO
-tabla_campana['% BARRIDO'] = np.where(
-    tabla_campana['TOTAL_CUENTAS'] > 0,
-    tabla_campana['GESTIONADOS'] / tabla_campana['TOTAL_CUENTAS'] * 100,
-    0
-)
+# Tabla por campaña precalculada (numérica); el formato se aplica sobre una copia
+tabla_campana = datos.tabla_campana.copy()
 
 # Formatear montos
 tabla_campana['REC_PLANILLAS'] = tabla_campana['REC_PLANILLAS'].apply(lambda x: f"S/. {x:,.2f}")
@@ -342,18 +465,19 @@ tabla_campana['% GASTOS ADMIN'] = tabla_campana['% GASTOS ADMIN'].apply(lambda x
 tabla_campana['% BARRIDO'] = tabla_campana['% BARRIDO'].apply(lambda x: f"{x:.2f}%")
 
 
-# Calcular totales para cada columna relevante
+# Fila de totales (numérica en procesamiento, formateada aquí)
+total_campana = procesamiento.fila_total_campana(datos.tabla_campana, datos.kpis)
 totales = {
-    'CAMPAÑA': 'TOTAL',
-    'TOTAL CUENTAS': tabla_campana['TOTAL_CUENTAS'].sum(),
-    'REC PLANILLAS': f"S/. {df['REC. PLANILLAS'].sum():,.2f}",
-    'REC GASTOS': f"S/. {df['REC. GASTOS'].sum():,.2f}",
-    'DEUDA TOTAL': f"S/. {df['DEUDA TOTAL'].sum():,.2f}",
-    'GASTOS ADMIN': f"S/. {df['GASTOS ADMIN'].sum():,.2f}",
-    'GESTIONADOS': tabla_campana['GESTIONADOS'].sum(),
-    '% PLANILLAS': f"{(df['REC. PLANILLAS'].sum()/df['DEUDA TOTAL'].sum()*100 if df['DEUDA TOTAL'].sum()>0 else 0):.2f}%",
-    '% GASTOS ADMIN': f"{(df['REC. GASTOS'].sum()/df['GASTOS ADMIN'].sum()*100 if df['GASTOS ADMIN'].sum()>0 else 0):.2f}%",
-    '% BARRIDO': f"{(tabla_campana['GESTIONADOS'].sum()/tabla_campana['TOTAL_CUENTAS'].sum()*100 if tabla_campana['TOTAL_CUENTAS'].sum()>0 else 0):.2f}%"
+    'CAMPAÑA': total_campana['CAMPAÑA'],
+    'TOTAL CUENTAS': total_campana['TOTAL_CUENTAS'],
+    'REC PLANILLAS': f"S/. {total_campana['REC_PLANILLAS']:,.2f}",
+    'REC GASTOS': f"S/. {total_campana['REC_GASTOS']:,.2f}",
+    'DEUDA TOTAL': f"S/. {total_campana['DEUDA_TOTAL']:,.2f}",
+    'GASTOS ADMIN': f"S/. {total_campana['GASTOS_ADMIN']:,.2f}",
+    'GESTIONADOS': total_campana['GESTIONADOS'],
+    '% PLANILLAS': f"{total_campana['% PLANILLAS']:.2f}%",
+    '% GASTOS ADMIN': f"{total_campana['% GASTOS ADMIN']:.2f}%",
+    '% BARRIDO': f"{total_campana['% BARRIDO']:.2f}%"
 };
 
 # Renombrar todas las columnas con '_' por ' '
@@ -403,95 +527,19 @@ def highlight_percent(val):
 
 
 st.markdown("<hr>", unsafe_allow_html=True)
-st.markdown("""
-<style>
-.tabla-dashboard {
-    width: 100%;
-    border-collapse: separate;
-    border-spacing: 0;
-    font-size: 1.05em;
-}
-.tabla-dashboard th {
-    background: #23395d;
-    color: #fff;
-    font-weight: bold;
-    padding: 12px 8px;
-    border-radius: 12px 12px 0 0;
-    border: none;
-}
-.tabla-dashboard th:nth-child(1) {
-    min-width: 80px; /* Compactar CAMPAÑA */
-    max-width: 100px;
-}
-.tabla-dashboard th:nth-child(2) {
-    min-width: 80px; /* Compactar TOTAL CUENTAS */
-    max-width: 100px;
-}
-.tabla-dashboard th:nth-child(3) {
-    min-width: 80px; /* Compactar GESTIONADOS */
-    max-width: 100px;
-}
-.tabla-dashboard th:nth-child(4) {
-    min-width: 80px; /* Compactar % BARRIDO */
-    max-width: 100px;
-}
-.tabla-dashboard th:nth-child(6) {
-    min-width: 150px; /* Reducir el ancho mínimo para REC PLANILLAS */
-    max-width: 180px;
-}
-.tabla-dashboard th:nth-child(7) {
-    min-width: 150px; /* Reducir el ancho mínimo para GASTOS ADMIN */
-    max-width: 180px;
-}
-.tabla-dashboard th:nth-child(10) {
-    min-width: 120px; /* Reducir el ancho mínimo para % GASTOS ADMIN */
-    max-width: 140px;
-}
-.tabla-dashboard th:nth-child(5) {
-    min-width: 200px; /* Reducir el ancho mínimo para DEUDA TOTAL */
-    max-width: 220px;
-}
-.tabla-dashboard td {
-    background: #f6f8fa;
-    padding: 10px 8px;
-    border-bottom: 1px solid #e3eafc;
-    text-align: center;
-}
-.tabla-dashboard tr:last-child td {
-    background: #2986cc;
-    color: #fff;
-    font-weight: bold;
-    border-bottom: 2px solid #2986cc;
-}
-.tabla-dashboard .total {
-    background: #2986cc !important;
-    color: #fff !important;
-    font-weight: bold;
-}
-.tabla-dashboard .percent-high {
-    color: #228b22; font-weight: bold;
-}
-.tabla-dashboard .percent-low {
-    color: #ff9800;
-}
-.tabla-dashboard .percent-zero {
-    color: #c82333;
-}
-</style>
-""", unsafe_allow_html=True)
 
 # Ajustar encabezados para reflejar el nuevo orden de columnas
 headers = [
-    ("<span style='font-size:1.2em;'>🎯</span> CAMPAÑA"),
-    ("<span style='font-size:1.2em;'>💳</span> TOTAL CUENTAS"),
+    ("<span class='th-icono'>🎯</span> CAMPAÑA"),
+    ("<span class='th-icono'>💳</span> TOTAL CUENTAS"),
     ("GESTIONADOS"),
-    ("<span style='font-size:1.2em;'>🧹</span> % BARRIDO"),
-    ("<span style='font-size:1.2em;'>💰</span> DEUDA TOTAL"),
-    ("<span style='font-size:1.2em;'>🏦</span> REC PLANILLAS"),
-    ("<span style='font-size:1.2em;'>🏦</span> GASTOS ADMIN"),
-    ("<span style='font-size:1.2em;'>🏧</span> REC GASTOS"),
-    ("<span style='font-size:1.2em;'>📊</span> % PLANILLAS"),
-    ("<span style='font-size:1.2em;'>📈</span> % GASTOS ADMIN")
+    ("<span class='th-icono'>🧹</span> % BARRIDO"),
+    ("<span class='th-icono'>💰</span> DEUDA TOTAL"),
+    ("<span class='th-icono'>🏦</span> REC PLANILLAS"),
+    ("<span class='th-icono'>🏦</span> GASTOS ADMIN"),
+    ("<span class='th-icono'>🏧</span> REC GASTOS"),
+    ("<span class='th-icono'>📊</span> % PLANILLAS"),
+    ("<span class='th-icono'>📈</span> % GASTOS ADMIN")
 ]
 
 # Construir tabla HTML
@@ -525,172 +573,53 @@ tabla_html += "</table>"
 st.markdown(tabla_html, unsafe_allow_html=True)
 
 # ================= GRAFICOS DE PASTEL POR CAMPAÑA =================
+medidor.seccion('Gráficos por campaña')
 st.markdown("---")
-st.markdown("""
-<div style='display: flex; align-items: center;'>
-    <img src='https://img.icons8.com/color/48/000000/pie-chart.png' style='margin-right: 10px;'/>
-    <h2 style='display: inline; font-size: 2.2rem; margin: 0;'>Gráficos de Recaudo por Campaña</h2>
-</div>
-""", unsafe_allow_html=True)
+st.markdown(componentes.encabezado('🥧', 'Gráficos de Recaudo por Campaña'), unsafe_allow_html=True)
 
-import matplotlib.pyplot as plt
+# Especificaciones Vega-Lite que dibuja el navegador (altair se importa recién aquí)
+import graficos
 
-
-colors = ['#A3CEF1', '#FFB347', '#B5EAD7', '#C7CEEA', '#FFD6E0', '#B28DFF', '#FFB3BA', '#3A86FF']
-# Filtrar campañas con monto > 0 para cada gráfico
-df_planillas = tabla_campana[tabla_campana['REC PLANILLAS'].apply(lambda x: float(str(x).replace('S/.','').replace(',','')) > 0)]
-campanias_planillas = df_planillas['CAMPAÑA'].tolist()
-rec_planillas = df_planillas['REC PLANILLAS'].apply(lambda x: float(str(x).replace('S/.','').replace(',',''))).tolist()
-
-df_gastos = tabla_campana[tabla_campana['REC GASTOS'].apply(lambda x: float(str(x).replace('S/.','').replace(',','')) > 0)]
-campanias_gastos = df_gastos['CAMPAÑA'].tolist()
-rec_gastos = df_gastos['REC GASTOS'].apply(lambda x: float(str(x).replace('S/.','').replace(',',''))).tolist()
-
-palette = ['#A3CEF1', '#FFB347', '#B5EAD7', '#C7CEEA', '#FFD6E0', '#B28DFF', '#FFB3BA', '#3A86FF']
-# Asignar colores fijos por nombre de campaña
-color_por_campania = {
-    'REAL TOTAL': '#FFB347',  # naranja pastel
-    'PRESUNTA': '#FFD6E0',   # rosa pastel
-    'FLUJO': '#A3CEF1',      # azul pastel
-    'REDIRECCIONAMIENTO': '#B5EAD7', # verde pastel
-}
-# Si hay campañas adicionales, asignarles colores de la paleta en orden
-campanias_todas = list(set(campanias_planillas + campanias_gastos))
-extra_camps = [c for c in campanias_todas if c not in color_por_campania]
-for i, camp in enumerate(extra_camps):
-    color_por_campania[camp] = palette[i % len(palette)]
-
-colors_planillas = [color_por_campania.get(camp, '#C7CEEA') for camp in campanias_planillas]
-colors_gastos = [color_por_campania.get(camp, '#C7CEEA') for camp in campanias_gastos]
-
-# Mostrar los gráficos uno al lado del otro y más pequeños
-st.markdown("""
-<style>
-.pie-row {
-    display: flex;
-    flex-direction: row;
-    justify-content: center;
-    align-items: center;
-    gap: 40px;
-}
-.pie-col {
-    flex: 1;
-    display: flex;
-    flex-direction: column;
-    align-items: center;
-}
-</style>
-""", unsafe_allow_html=True)
-
-figsize = (5.5, 5.5)
-fig1, ax1 = plt.subplots(figsize=figsize)
-
-# Etiquetas con monto para REC. PLANILLAS
-labels_planillas = [f"{campanias_planillas[i]}\nS/. {rec_planillas[i]:,.2f}" for i in range(len(campanias_planillas))]
-# Usar los colores definidos por campaña
-colors_planillas = [color_por_campania.get(camp, '#C7CEEA') for camp in campanias_planillas]
-wedges1, texts1, autotexts1 = ax1.pie(rec_planillas, labels=labels_planillas, autopct='%1.1f%%', colors=colors_planillas, startangle=140)
-ax1.set_title('Recaudo de Planillas por Campaña', fontsize=15)
-ax1.axis('equal')
-plt.tight_layout()
-
-fig2, ax2 = plt.subplots(figsize=figsize)
-
-# Etiquetas con monto para REC. GASTOS
-labels_gastos = [f"{campanias_gastos[i]}\nS/. {rec_gastos[i]:,.2f}" for i in range(len(campanias_gastos))]
-colors_gastos = [color_por_campania.get(camp, '#C7CEEA') for camp in campanias_gastos]
-wedges2, texts2, autotexts2 = ax2.pie(rec_gastos, labels=labels_gastos, autopct='%1.1f%%', colors=colors_gastos, startangle=140)
-ax2.set_title('Recaudo de Gastos por Campaña', fontsize=15)
-ax2.axis('equal')
-plt.tight_layout()
+color_por_campania = graficos.colores_campanias(datos.tabla_campana['CAMPAÑA'].astype(str))
 
 col1, col2 = st.columns(2)
 with col1:
-    st.pyplot(fig1, use_container_width=True)
+    st.altair_chart(graficos.torta_por_campania(
+        datos.tabla_campana, 'REC_PLANILLAS', 'Recaudo de Planillas por Campaña', color_por_campania, 'Sin recaudo de planillas'
+    ), use_container_width=True)
 with col2:
-    st.pyplot(fig2, use_container_width=True)
+    st.altair_chart(graficos.torta_por_campania(
+        datos.tabla_campana, 'REC_GASTOS', 'Recaudo de Gastos por Campaña', color_por_campania, 'Sin recaudo de gastos'
+    ), use_container_width=True)
 # ================= FIN GRAFICOS DE PASTEL POR CAMPAÑA =================
 # ================= GRAFICOS DE BARRAS HORIZONTALES POR ASESOR =================
+medidor.seccion('Gráficos por asesor')
 # Este bloque muestra dos gráficos de barras horizontales, uno para REC. PLANILLAS y otro para REC. GASTOS por asesor.
 st.markdown("---")
-st.markdown("""
-<div style='display: flex; align-items: center;'>
-    <img src='https://img.icons8.com/color/48/000000/bar-chart.png' style='margin-right: 10px;'/>
-    <h2 style='display: inline; font-size: 2.2rem; margin: 0;'>Gráficos de Recaudo por Asesor</h2>
-</div>
-""", unsafe_allow_html=True)
+st.markdown(componentes.encabezado('📊', 'Gráficos de Recaudo por Asesor'), unsafe_allow_html=True)
 
 # Agrupar datos por asesor
 
-# Extraer solo el primer nombre del asesor
-df['ASESOR_PRIMER_NOMBRE'] = df['ASESOR'].astype(str).apply(lambda x: x.split()[0] if isinstance(x, str) and len(x.split()) > 0 else x)
-tabla_asesor = df.groupby('ASESOR_PRIMER_NOMBRE').agg(
-    REC_PLANILLAS=('REC. PLANILLAS', 'sum'),
-    REC_GASTOS=('REC. GASTOS', 'sum')
-).reset_index()
-
-# Ordenar por monto descendente
-tabla_asesor_planillas = tabla_asesor.sort_values('REC_PLANILLAS', ascending=True)
-tabla_asesor_gastos = tabla_asesor.sort_values('REC_GASTOS', ascending=True)
-
-# Gráfico de barras horizontales para REC. PLANILLAS por asesor
-fig_bar_planillas, ax_bar_planillas = plt.subplots(figsize=(7, 5))
-ax_bar_planillas.barh(tabla_asesor_planillas['ASESOR_PRIMER_NOMBRE'], tabla_asesor_planillas['REC_PLANILLAS'], color='#FFB347')
-ax_bar_planillas.set_xlabel('Recaudo de Planillas (S/.)')
-ax_bar_planillas.set_ylabel('Asesor (Primer Nombre)')
-ax_bar_planillas.set_title('Recaudo de Planillas por Asesor')
-# Etiquetas con monto recaudado en cada barra
-for i, (valor, nombre) in enumerate(zip(tabla_asesor_planillas['REC_PLANILLAS'], tabla_asesor_planillas['ASESOR_PRIMER_NOMBRE'])):
-    ancho = ax_bar_planillas.get_xlim()[1]
-    texto = f"S/. {valor:,.2f}"
-    if valor > ancho * 0.15:
-        # Si la barra es suficientemente grande, mostrar el texto dentro
-        ax_bar_planillas.text(valor/2, i, texto, va='center', ha='center', fontsize=10, color='black', fontweight='bold')
-    else:
-        # Si la barra es pequeña, mostrar el texto fuera, a la derecha
-        ax_bar_planillas.text(valor + ancho*0.01, i, texto, va='center', ha='left', fontsize=10, color='black', fontweight='bold')
-plt.tight_layout()
-
-# Gráfico de barras horizontales para REC. GASTOS por asesor
-fig_bar_gastos, ax_bar_gastos = plt.subplots(figsize=(7, 5))
-ax_bar_gastos.barh(tabla_asesor_gastos['ASESOR_PRIMER_NOMBRE'], tabla_asesor_gastos['REC_GASTOS'], color='#A3CEF1')
-ax_bar_gastos.set_xlabel('Recaudo de Gastos (S/.)')
-ax_bar_gastos.set_ylabel('Asesor (Primer Nombre)')
-ax_bar_gastos.set_title('Recaudo de Gastos por Asesor')
-# Etiquetas con monto recaudado en cada barra
-for i, (valor, nombre) in enumerate(zip(tabla_asesor_gastos['REC_GASTOS'], tabla_asesor_gastos['ASESOR_PRIMER_NOMBRE'])):
-    ancho = ax_bar_gastos.get_xlim()[1]
-    texto = f"S/. {valor:,.2f}"
-    if valor > ancho * 0.15:
-        ax_bar_gastos.text(valor/2, i, texto, va='center', ha='center', fontsize=10, color='black', fontweight='bold')
-    else:
-        ax_bar_gastos.text(valor + ancho*0.01, i, texto, va='center', ha='left', fontsize=10, color='black', fontweight='bold')
-plt.tight_layout()
+# Agrupado por ASESOR completo; NOMBRE_CORTO sólo se usa para las etiquetas
+tabla_asesor = datos.tabla_asesor
 
-# Mostrar los gráficos uno al costado del otro
+# Mostrar los gráficos uno al costado del otro (ordenados por monto, el mayor arriba)
 col_bar1, col_bar2 = st.columns(2)
 with col_bar1:
-    st.pyplot(fig_bar_planillas, use_container_width=True)
+    st.altair_chart(graficos.barras_por_asesor(
+        tabla_asesor, 'REC_PLANILLAS', 'Recaudo de Planillas por Asesor', 'Recaudo de Planillas (S/.)', '#FFB347'
+    ), use_container_width=True)
 with col_bar2:
-    st.pyplot(fig_bar_gastos, use_container_width=True)
+    st.altair_chart(graficos.barras_por_asesor(
+        tabla_asesor, 'REC_GASTOS', 'Recaudo de Gastos por Asesor', 'Recaudo de Gastos (S/.)', '#A3CEF1'
+    ), use_container_width=True)
 # ================= FIN GRAFICOS DE BARRAS HORIZONTALES POR ASESOR =================
 # ================= TABLA RESUMEN POR ASESOR =================
+medidor.seccion('Resumen por asesor')
 st.markdown("---")
-st.markdown("""
-<div style='display: flex; align-items: center;'>
-    <img src='https://img.icons8.com/color/48/000000/table.png' style='margin-right: 10px;'/>
-    <h2 style='display: inline; font-size: 2.2rem; margin: 0;'>Tabla Resumen por Asesor</h2>
-</div>
-""", unsafe_allow_html=True)
+st.markdown(componentes.encabezado('📋', 'Tabla Resumen por Asesor'), unsafe_allow_html=True)
 
-tabla_resumen_asesor = df.groupby('ASESOR').agg(
-    QdeCuentas=('ASESOR', 'count'),
-    Gestionados=('ULTIMA FECHA GESTION', lambda x: x.notna().sum()),
-    DeudaTotal=('DEUDA TOTAL', 'sum'),
-    RecPlanillas=('REC. PLANILLAS', 'sum'),
-    GastosAdmin=('GASTOS ADMIN', 'sum'),
-    RecGastos=('REC. GASTOS', 'sum')
-).reset_index()
+tabla_resumen_asesor = datos.tabla_resumen_asesor.copy()
 tabla_resumen_asesor['%Gestion'] = tabla_resumen_asesor.apply(
     lambda row: f"{int(round(row['Gestionados']/row['QdeCuentas']*100)) if row['QdeCuentas']>0 else 0}%", axis=1)
 tabla_resumen_asesor = tabla_resumen_asesor[[
@@ -714,44 +643,62 @@ st.dataframe(
     hide_index=True
 )
 # ================= FIN TABLA RESUMEN POR ASESOR =================
-# ================= TABLA RESUMEN POR PRIORIDAD =================
-# Encabezado con icono
-st.markdown("""
-<div style='display: flex; align-items: center;'>
-    <img src='https://img.icons8.com/color/48/000000/flag.png' style='margin-right: 10px;'/>
-    <h2 style='display: inline; font-size: 2.2rem; margin: 0;'>Tabla Resumen por Prioridad</h2>
-</div>
-""", unsafe_allow_html=True)
-
-# Filtro por campaña
+# ================= RANKING DE ASESORES =================
+medidor.seccion('Ranking de asesores')
+st.markdown("### 🏆 Ranking de Asesores")
+metrica_ranking = st.selectbox(
+    'Ordenar ranking por:',
+    list(asesores.METRICAS_RANKING),
+    format_func=lambda m: asesores.METRICAS_RANKING[m][0],
+    key='metrica_ranking_asesores'
+)
+tabla_ranking = asesores.leaderboard(datos.tabla_asesor, metrica_ranking)
+tabla_ranking = tabla_ranking[[f'POS_{metrica_ranking}', 'ASESOR', 'CUENTAS', 'DEUDA_TOTAL', 'REC_PLANILLAS', 'REC_GASTOS', '%GESTION', '%RECUPERO']].rename(columns={
+    f'POS_{metrica_ranking}': '#',
+    'ASESOR': 'Asesor',
+    'CUENTAS': 'Cuentas',
+    'DEUDA_TOTAL': 'Deuda bajo gestión',
+    'REC_PLANILLAS': 'Rec. Planillas',
+    'REC_GASTOS': 'Rec. Gastos',
+    '%GESTION': '% Gestión',
+    '%RECUPERO': '% Recupero'
+})
+st.dataframe(
+    tabla_ranking.style.format({
+        'Deuda bajo gestión': 'S/. {:,.2f}',
+        'Rec. Planillas': 'S/. {:,.2f}',
+        'Rec. Gastos': 'S/. {:,.2f}',
+        '% Gestión': '{:.1f}%',
+        '% Recupero': '{:.2f}%'
+    }),
+    use_container_width=True,
+    hide_index=True
+)
 
+# Un libro por asesor (resumen, Clientes TOP, críticos y solo gastos) en un ZIP;
+# los libros se escriben en paralelo y el ZIP se reutiliza por versión y filtros.
+@st.cache_resource(max_entries=8, show_spinner="Generando reportes por asesor...")
+def reportes_por_asesor(version, selecciones, rango_fechas, _datos):
+    return reportes.zip_por_asesor(
+        _datos.df, _datos.df_critico, _datos.df_solo_gastos, _datos.tabla_asesor, asesores.METRICAS_RANKING
+    )
 
-col_filtros1, col_filtros2 = st.columns([2,2])
-with col_filtros1:
-    campanias = df['CAMPAÑA'].unique().tolist()
-    opciones = ['TOTAL'] + campanias
-    campania_seleccionada = st.radio('Filtrar por campaña:', opciones, horizontal=True)
-with col_filtros2:
-    asesores = ['TODOS'] + sorted(df['ASESOR'].dropna().unique().tolist())
-    asesor_seleccionado = st.selectbox('Filtrar por asesor:', asesores)
+if st.toggle("Generar reportes por asesor", key="generar_reportes_asesor"):
+    st.download_button(
+        label=f"📥 Descargar reportes de {len(datos.tabla_asesor)} asesores (ZIP)",
+        data=reportes_por_asesor(datos.version, tuple(selecciones), rango_fechas, datos),
+        file_name=f"reportes_por_asesor_{datetime.now().strftime('%d%m%Y_%H%M%S')}.zip",
+        mime="application/zip",
+        key="download_reportes_asesor"
+    )
+# ================= FIN RANKING DE ASESORES =================
+# ================= TABLA RESUMEN POR PRIORIDAD =================
+medidor.seccion('Resumen por prioridad')
+# Encabezado con icono
+st.markdown(componentes.encabezado('🚩', 'Tabla Resumen por Prioridad'), unsafe_allow_html=True)
 
-# Aplicar ambos filtros
-if campania_seleccionada == 'TOTAL':
-    df_filtrado = df.copy()
-else:
-    df_filtrado = df[df['CAMPAÑA'] == campania_seleccionada]
-if asesor_seleccionado != 'TODOS':
-    df_filtrado = df_filtrado[df_filtrado['ASESOR'] == asesor_seleccionado]
-
-# Generar tabla resumen por prioridad para la campaña seleccionada
-tabla_resumen_prioridad = df_filtrado.groupby('PRIORIDAD').agg(
-    QdeCuentas=('PRIORIDAD', 'count'),
-    Gestionados=('ULTIMA FECHA GESTION', lambda x: x.notna().sum()),
-    DeudaTotal=('DEUDA TOTAL', 'sum'),
-    RecPlanillas=('REC. PLANILLAS', 'sum'),
-    GastosAdmin=('GASTOS ADMIN', 'sum'),
-    RecGastos=('REC. GASTOS', 'sum')
-).reset_index()
+# Generar tabla resumen por prioridad (la campaña y el asesor se eligen en la barra de filtros globales)
+tabla_resumen_prioridad = procesamiento.motor_calculo(datos.motor).resumen_por_prioridad(df)
 tabla_resumen_prioridad['%Gestion'] = tabla_resumen_prioridad.apply(
     lambda row: f"{int(round(row['Gestionados']/row['QdeCuentas']*100)) if row['QdeCuentas']>0 else 0}%", axis=1)
 
@@ -774,16 +721,16 @@ tabla_resumen_prioridad = tabla_resumen_prioridad[[
     '%Rec.Gastos'
 ]]
 tabla_resumen_prioridad = tabla_resumen_prioridad.sort_values('PRIORIDAD', ascending=False)
+# Calcular totales (sobre los montos redondeados que muestra la tabla)
+total_qdecuentas = tabla_resumen_prioridad['QdeCuentas'].sum()
+total_gestionados = tabla_resumen_prioridad['Gestionados'].sum()
+total_deuda = tabla_resumen_prioridad['DeudaTotal'].round().sum()
+total_planillas = tabla_resumen_prioridad['RecPlanillas'].round().sum()
+total_gastosadmin = tabla_resumen_prioridad['GastosAdmin'].round().sum()
+total_recgastos = tabla_resumen_prioridad['RecGastos'].round().sum()
 for col in ['DeudaTotal', 'RecPlanillas', 'GastosAdmin', 'RecGastos']:
     tabla_resumen_prioridad[col] = tabla_resumen_prioridad[col].apply(lambda x: f"S/. {int(round(x)):,}" if pd.notnull(x) else "")
 
-# Calcular totales
-total_qdecuentas = tabla_resumen_prioridad['QdeCuentas'][:-1].astype(str).replace({',':''}, regex=True).astype(int).sum() if 'TOTAL' in tabla_resumen_prioridad['PRIORIDAD'].values else tabla_resumen_prioridad['QdeCuentas'].astype(str).replace({',':''}, regex=True).astype(int).sum()
-total_gestionados = tabla_resumen_prioridad['Gestionados'][:-1].astype(str).replace({',':''}, regex=True).astype(int).sum() if 'TOTAL' in tabla_resumen_prioridad['PRIORIDAD'].values else tabla_resumen_prioridad['Gestionados'].astype(str).replace({',':''}, regex=True).astype(int).sum()
-total_deuda = tabla_resumen_prioridad['DeudaTotal'][:-1].replace({'S/. ': '', ',': ''}, regex=True).astype(float).sum() if 'TOTAL' in tabla_resumen_prioridad['PRIORIDAD'].values else tabla_resumen_prioridad['DeudaTotal'].replace({'S/. ': '', ',': ''}, regex=True).astype(float).sum()
-total_planillas = tabla_resumen_prioridad['RecPlanillas'][:-1].replace({'S/. ': '', ',': ''}, regex=True).astype(float).sum() if 'TOTAL' in tabla_resumen_prioridad['PRIORIDAD'].values else tabla_resumen_prioridad['RecPlanillas'].replace({'S/. ': '', ',': ''}, regex=True).astype(float).sum()
-total_gastosadmin = tabla_resumen_prioridad['GastosAdmin'][:-1].replace({'S/. ': '', ',': ''}, regex=True).astype(float).sum() if 'TOTAL' in tabla_resumen_prioridad['PRIORIDAD'].values else tabla_resumen_prioridad['GastosAdmin'].replace({'S/. ': '', ',': ''}, regex=True).astype(float).sum()
-total_recgastos = tabla_resumen_prioridad['RecGastos'][:-1].replace({'S/. ': '', ',': ''}, regex=True).astype(float).sum() if 'TOTAL' in tabla_resumen_prioridad['PRIORIDAD'].values else tabla_resumen_prioridad['RecGastos'].replace({'S/. ': '', ',': ''}, regex=True).astype(float).sum()
 total_porcentaje = f"{int(round(total_gestionados/total_qdecuentas*100)) if total_qdecuentas>0 else 0}%"
 total_recplanillas_deuda = f"{(total_planillas/total_deuda*100):.2f}%" if total_deuda>0 else "0.00%"
 total_recgastos_gastosadmin = f"{(total_recgastos/total_gastosadmin*100):.2f}%" if total_gastosadmin>0 else "0.00%"
@@ -804,25 +751,6 @@ tabla_resumen_prioridad = pd.concat([tabla_resumen_prioridad, pd.DataFrame([fila
 
 # Mostrar tabla estática (no interactiva)
 
-# Estilos para la tabla: encabezado y totales
-st.markdown("""
-<style>
-.tabla-prioridad th {
-    background: #23395d !important;
-    color: #fff !important;
-    font-weight: bold;
-    padding: 12px 8px;
-    border-radius: 12px 12px 0 0;
-    border: none;
-}
-.tabla-prioridad tr:last-child td {
-    background: #ffe082 !important;
-    color: #1a4fa3 !important;
-    font-weight: bold;
-    border-bottom: 2px solid #ffe082;
-}
-</style>
-""", unsafe_allow_html=True)
 
 # Generar HTML con clase personalizada
 tabla_html = tabla_resumen_prioridad.to_html(index=False, classes='tabla-prioridad')
@@ -830,290 +758,140 @@ st.markdown(tabla_html, unsafe_allow_html=True)
 # ================= FIN TABLA RESUMEN POR PRIORIDAD =================
 
 # ================= CLIENTES TOP POR CAMPAÑA =================
+medidor.seccion('Clientes TOP')
 st.markdown("---")
-st.markdown("""
-<div style='display: flex; align-items: center;'>
-    <h2 style='display: inline; font-size: 2.2rem; margin: 0;'>👑 Clientes TOP - Mayores Montos de Deuda</h2>
-</div>
-""", unsafe_allow_html=True)
-
-# Filtrar clientes por mayores montos y ordenar por DEUDA TOTAL descendente
-df_top_clientes = df.copy()
-df_top_clientes = df_top_clientes.sort_values('DEUDA TOTAL', ascending=False)
-
-# Selector de campaña
-campanias_top = df_top_clientes['CAMPAÑA'].unique().tolist()
-campania_top_seleccionada = st.selectbox('Selecciona una campaña para ver sus Clientes TOP:', campanias_top, key='campania_top_select')
-
-# Filtrar por campaña seleccionada
-df_top_campania = df_top_clientes[df_top_clientes['CAMPAÑA'] == campania_top_seleccionada].copy()
-
-# Slider para seleccionar cantidad de clientes a mostrar
-cantidad_top = st.slider('Cantidad de Clientes TOP a mostrar:', min_value=5, max_value=min(50, len(df_top_campania)), value=10, key='slider_top_clientes')
-
-# Top clientes de la campaña seleccionada
-df_top_n = df_top_campania.head(cantidad_top)[['DOCUMENTO', 'RAZON SOCIAL', 'ASESOR', 'DEUDA TOTAL', 'REC. PLANILLAS', 'CONTACTABILIDAD', 'ULTIMA FECHA GESTION']].copy()
-
-# Calcular métricas ANTES de renombrar columnas
-deuda_total_top = df_top_n['DEUDA TOTAL'].sum()
-recuperado_total_top = df_top_n['REC. PLANILLAS'].sum()
-tasa_recupero = (recuperado_total_top / deuda_total_top * 100) if deuda_total_top > 0 else 0
+st.markdown(componentes.encabezado('👑', 'Clientes TOP - Mayores Montos de Deuda'), unsafe_allow_html=True)
+
+# Fragmento: la vista, la campaña y el slider sólo vuelven a ejecutar los Clientes TOP
+@st.fragment
+def render_clientes_top(df, datos):
+    # Por campaña (cada cuenta por separado) o consolidado por deudor entre campañas
+    top_consolidado = st.radio('Vista:', ['Por campaña', 'Consolidado por deudor'], horizontal=True, key='modo_clientes_top') == 'Consolidado por deudor'
+
+    if top_consolidado:
+        # Una fila por deudor con la deuda de todas sus campañas (ya ordenado por DEUDA TOTAL)
+        campania_top_seleccionada = exportes.CONSOLIDADO
+        df_top_campania = datos.deudores
+    else:
+        # Selector de campaña (primero la campaña con la cuenta de mayor deuda)
+        campanias_top = df.groupby('CAMPAÑA', observed=True)['DEUDA TOTAL'].max().sort_values(ascending=False).index.tolist()
+        campania_top_seleccionada = st.selectbox('Selecciona una campaña para ver sus Clientes TOP:', campanias_top, key='campania_top_select')
 
-# Preparar tabla
-df_top_n_tabla = df_top_n.rename(columns={
-    'DOCUMENTO': 'Documento',
-    'RAZON SOCIAL': 'Razón Social',
-    'ASESOR': 'Asesor',
-    'DEUDA TOTAL': 'Deuda Total',
-    'REC. PLANILLAS': 'Recuperado',
-    'CONTACTABILIDAD': 'Contactabilidad',
-    'ULTIMA FECHA GESTION': 'Última Gestión'
-}).copy()
-
-# Formatear valores numéricos y fechas
-df_top_n_tabla['Deuda Total'] = df_top_n_tabla['Deuda Total'].apply(lambda x: f"S/. {x:,.2f}" if pd.notnull(x) else "N/A")
-df_top_n_tabla['Recuperado'] = df_top_n_tabla['Recuperado'].apply(lambda x: f"S/. {x:,.2f}" if pd.notnull(x) and x > 0 else "S/. 0.00")
-df_top_n_tabla['Última Gestión'] = df_top_n_tabla['Última Gestión'].apply(lambda x: x.strftime('%d/%m/%Y') if pd.notnull(x) else "Sin gestión")
-
-# Mostrar métricas resumen
-col_top1, col_top2, col_top3, col_top4 = st.columns(4)
-with col_top1:
-    st.metric("👥 Clientes TOP", len(df_top_n))
-with col_top2:
-    st.metric("💰 Deuda Total TOP", f"S/. {deuda_total_top:,.2f}")
-with col_top3:
-    st.metric("🏦 Recuperado", f"S/. {recuperado_total_top:,.2f}")
-with col_top4:
-    st.metric("📊 Tasa de Recupero", f"{tasa_recupero:.2f}%")
-
-# Estilos para tabla TOP
-st.markdown("""
-<style>
-.tabla-top th {
-    background: #d4af37 !important;
-    color: #1a1a1a !important;
-    font-weight: bold;
-    font-size: 1.05em;
-    padding: 12px 8px;
-    border: none;
-}
-.tabla-top td {
-    background: #f9f9f9;
-    color: #222;
-    font-size: 0.95em;
-    padding: 10px 8px;
-    border-bottom: 1px solid #e3e3e3;
-}
-.tabla-top tr:hover td {
-    background: #f0f0f0;
-}
-</style>
-""", unsafe_allow_html=True)
+        # Cuentas de mayor DEUDA TOTAL de la campaña (el slider muestra hasta 50)
+        df_top_campania = procesamiento.motor_calculo(datos.motor).top_clientes(df, campania_top_seleccionada, 50)
 
-# Función para exportar Clientes TOP a Excel
-def export_clientes_top_excel(df_export, campania):
-    from io import BytesIO
-    from openpyxl import Workbook
-    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-    from datetime import datetime
-    
-    output = BytesIO()
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Clientes TOP"
-    
-    # Encabezado con título
-    ws['A1'] = f"CLIENTES TOP - MAYORES MONTOS DE DEUDA - {campania.upper()}"
-    ws['A1'].font = Font(bold=True, size=14, color="FFFFFF")
-    ws['A1'].fill = PatternFill(start_color="D4AF37", end_color="D4AF37", fill_type="solid")
-    ws.merge_cells('A1:G1')
-    ws['A1'].alignment = Alignment(horizontal="center", vertical="center")
-    ws.row_dimensions[1].height = 25
-    
-    # Fecha de generación
-    ws['A2'] = f"Fecha de generación: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}"
-    ws['A2'].font = Font(italic=True, size=10)
-    ws.merge_cells('A2:G2')
-    ws.row_dimensions[2].height = 18
-    
-    # Encabezados de columnas
-    headers = ['Documento', 'Razón Social', 'Asesor', 'Deuda Total', 'Recuperado', 'Contactabilidad', 'Última Gestión', 'Campaña']
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-    
-    for col_idx, header in enumerate(headers, 1):
-        cell = ws.cell(row=4, column=col_idx)
-        cell.value = header
-        cell.font = Font(bold=True, color="FFFFFF", size=11)
-        cell.fill = PatternFill(start_color="23395D", end_color="23395D", fill_type="solid")
-        cell.alignment = Alignment(horizontal="center", vertical="center")
-        cell.border = thin_border
-    
-    ws.row_dimensions[4].height = 20
-    
-    # Datos
-    for row_idx, (_, row) in enumerate(df_export.iterrows(), 5):
-        ws.cell(row=row_idx, column=1).value = row['Documento']
-        ws.cell(row=row_idx, column=2).value = row['Razón Social']
-        ws.cell(row=row_idx, column=3).value = row['Asesor']
-        ws.cell(row=row_idx, column=4).value = float(str(row['Deuda Total']).replace('S/. ', '').replace(',', ''))
-        ws.cell(row=row_idx, column=5).value = float(str(row['Recuperado']).replace('S/. ', '').replace(',', ''))
-        ws.cell(row=row_idx, column=6).value = row['Contactabilidad']
-        ws.cell(row=row_idx, column=7).value = row['Última Gestión']
-        ws.cell(row=row_idx, column=8).value = row.get('Campaña', campania)
-        
-        for col_idx in range(1, 9):
-            cell = ws.cell(row=row_idx, column=col_idx)
-            cell.border = thin_border
-            if col_idx in [4, 5]:  # Alinear números a la derecha
-                cell.alignment = Alignment(horizontal="right")
-                if col_idx in [4, 5]:
-                    cell.number_format = '#,##0.00'
-            else:
-                cell.alignment = Alignment(horizontal="left")
-    
-    # Ajustar anchos de columnas
-    ws.column_dimensions['A'].width = 15
-    ws.column_dimensions['B'].width = 45
-    ws.column_dimensions['C'].width = 20
-    ws.column_dimensions['D'].width = 15
-    ws.column_dimensions['E'].width = 15
-    ws.column_dimensions['F'].width = 18
-    ws.column_dimensions['G'].width = 15
-    ws.column_dimensions['H'].width = 18
-    
-    # Fila de totales
-    total_row = len(df_export) + 5
-    ws.cell(row=total_row, column=1).value = "TOTAL"
-    ws.cell(row=total_row, column=1).font = Font(bold=True)
-    ws.cell(row=total_row, column=2).value = len(df_export)
-    ws.cell(row=total_row, column=2).font = Font(bold=True)
-    
-    # Calcular totales de montos
-    total_deuda = sum([float(str(val).replace('S/. ', '').replace(',', '')) for val in df_export['Deuda Total']])
-    total_recuperado = sum([float(str(val).replace('S/. ', '').replace(',', '')) for val in df_export['Recuperado']])
-    
-    ws.cell(row=total_row, column=4).value = total_deuda
-    ws.cell(row=total_row, column=4).number_format = '#,##0.00'
-    ws.cell(row=total_row, column=5).value = total_recuperado
-    ws.cell(row=total_row, column=5).number_format = '#,##0.00'
-    
-    for col_idx in range(1, 9):
-        cell = ws.cell(row=total_row, column=col_idx)
-        cell.fill = PatternFill(start_color="FFE082", end_color="FFE082", fill_type="solid")
-        cell.border = thin_border
-        cell.font = Font(bold=True)
-    
-    wb.save(output)
-    output.seek(0)
-    return output.getvalue()
-
-# Mostrar tabla
-tabla_top_html = """
-<div style='overflow-x:auto; max-width:100%;'>
-    <div style='max-height:500px; overflow-y:auto; border-radius:12px; box-shadow:0 2px 8px rgba(0,0,0,0.07);'>
-        <table class='tabla-top' style='min-width:1050px; width:100%;'>
+    # Slider para seleccionar cantidad de clientes a mostrar
+    # (con los filtros globales una campaña puede quedar con muy pocas cuentas)
+    if len(df_top_campania) > 5:
+        cantidad_top = st.slider('Cantidad de Clientes TOP a mostrar:', min_value=5, max_value=min(50, len(df_top_campania)), value=min(10, len(df_top_campania)), key='slider_top_clientes')
+    else:
+        cantidad_top = len(df_top_campania)
+
+    # Top clientes de la campaña seleccionada
+    columnas_top = list(exportes.COLUMNAS_TOP)
+    if top_consolidado:
+        columnas_top += ['CAMPAÑA']
+    df_top_n = df_top_campania.head(cantidad_top)[columnas_top].copy()
+
+    # Calcular métricas ANTES de renombrar columnas
+    deuda_total_top = df_top_n['DEUDA TOTAL'].sum()
+    recuperado_total_top = df_top_n['REC. PLANILLAS'].sum()
+    tasa_recupero = (recuperado_total_top / deuda_total_top * 100) if deuda_total_top > 0 else 0
+
+    # Preparar tabla (montos y fechas formateados)
+    df_top_n_tabla = reportes.tabla_clientes_top(df_top_n)
+
+    # Mostrar métricas resumen
+    col_top1, col_top2, col_top3, col_top4 = st.columns(4)
+    with col_top1:
+        st.metric("👥 Clientes TOP", len(df_top_n))
+    with col_top2:
+        st.metric("💰 Deuda Total TOP", f"S/. {deuda_total_top:,.2f}")
+    with col_top3:
+        st.metric("🏦 Recuperado", f"S/. {recuperado_total_top:,.2f}")
+    with col_top4:
+        st.metric("📊 Tasa de Recupero", f"{tasa_recupero:.2f}%")
+
+
+
+    # Mostrar tabla
+    tabla_top_html = """
+<div class='tabla-contenedor'>
+    <div class='tabla-scroll'>
+        <table class='tabla-top'>
             <thead>
                 <tr>
-                    <th style='text-align:center; width:50px;'>#</th>
+                    <th class='indice'>#</th>
                     <th>Documento</th>
                     <th>Razón Social</th>
                     <th>Asesor</th>
-                    <th style='text-align:right;'>Deuda Total</th>
-                    <th style='text-align:right;'>Recuperado</th>
-                    <th style='text-align:center;'>Contactabilidad</th>
-                    <th style='text-align:center;'>Última Gestión</th>
+                    <th class='derecha'>Deuda Total</th>
+                    <th class='derecha'>Recuperado</th>
+                    <th class='centro'>Contactabilidad</th>
+                    <th class='centro'>Última Gestión</th>{}
                 </tr>
             </thead>
             <tbody>
-"""
-for idx, (_, row) in enumerate(df_top_n_tabla.iterrows(), 1):
-    tabla_top_html += f"<tr>"
-    tabla_top_html += f"<td style='text-align:center; font-weight:bold;'>{idx}</td>"
-    tabla_top_html += f"<td>{row['Documento']}</td>"
-    tabla_top_html += f"<td>{row['Razón Social']}</td>"
-    tabla_top_html += f"<td>{row['Asesor']}</td>"
-    tabla_top_html += f"<td style='text-align:right;'>{row['Deuda Total']}</td>"
-    tabla_top_html += f"<td style='text-align:right;'>{row['Recuperado']}</td>"
-    tabla_top_html += f"<td style='text-align:center;'>{row['Contactabilidad']}</td>"
-    tabla_top_html += f"<td style='text-align:center;'>{row['Última Gestión']}</td>"
-    tabla_top_html += "</tr>"
-tabla_top_html += """
+""".format("<th>Campañas</th>" if top_consolidado else "")
+    for idx, (_, row) in enumerate(df_top_n_tabla.iterrows(), 1):
+        tabla_top_html += f"<tr>"
+        tabla_top_html += f"<td class='indice'>{idx}</td>"
+        tabla_top_html += f"<td>{row['Documento']}</td>"
+        tabla_top_html += f"<td>{row['Razón Social']}</td>"
+        tabla_top_html += f"<td>{row['Asesor']}</td>"
+        tabla_top_html += f"<td class='derecha'>{row['Deuda Total']}</td>"
+        tabla_top_html += f"<td class='derecha'>{row['Recuperado']}</td>"
+        tabla_top_html += f"<td class='centro'>{row['Contactabilidad']}</td>"
+        tabla_top_html += f"<td class='centro'>{row['Última Gestión']}</td>"
+        if top_consolidado:
+            tabla_top_html += f"<td>{row['Campaña']}</td>"
+        tabla_top_html += "</tr>"
+    tabla_top_html += """
             </tbody>
         </table>
     </div>
 </div>
 """
-st.markdown(tabla_top_html, unsafe_allow_html=True)
+    st.markdown(tabla_top_html, unsafe_allow_html=True)
 
-# Botón para descargar Excel
-st.markdown("<div style='height: 15px;'></div>", unsafe_allow_html=True)
-col_export1, col_export2, col_export3 = st.columns([1, 2, 1])
-with col_export2:
-    if not df_top_n_tabla.empty:
-        excel_data = export_clientes_top_excel(df_top_n_tabla, campania_top_seleccionada)
-        st.download_button(
-            label="📥 Descargar Clientes TOP en Excel",
-            data=excel_data,
-            file_name=f"clientes_top_{campania_top_seleccionada.lower()}_{datetime.now().strftime('%d%m%Y_%H%M%S')}.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            key="download_clientes_top",
-            use_container_width=True
-        )
+    # Botón para descargar Excel
+    st.markdown("<div class='espacio-m'></div>", unsafe_allow_html=True)
+    col_export1, col_export2, col_export3 = st.columns([1, 2, 1])
+    with col_export2:
+        if not df_top_n_tabla.empty:
+            # Precalculado para las cantidades estándar; si no, el libro se arma al hacer clic
+            st.download_button(
+                label="📥 Descargar Clientes TOP en Excel",
+                data=descarga(
+                    exportes.nombre_clientes_top(campania_top_seleccionada, cantidad_top),
+                    partial(reportes.excel_clientes_top, df_top_n_tabla, campania_top_seleccionada)
+                ),
+                file_name=f"clientes_top_{campania_top_seleccionada.lower().replace(' ', '_')}_{datetime.now().strftime('%d%m%Y_%H%M%S')}.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                key="download_clientes_top",
+                use_container_width=True
+            )
+
+render_clientes_top(df, datos)
 
 # ================= FIN CLIENTES TOP POR CAMPAÑA =================
 
 # ================= CASOS CON SOLO REC. GASTOS (SIN REC. PLANILLAS) =================
+medidor.seccion('Solo REC. GASTOS')
 st.markdown("---")
-st.markdown("""
-<div style='display: flex; align-items: center;'>
-    <h2 style='display: inline; font-size: 2.2rem; margin: 0;'>⚠️ Casos SOLO con REC. GASTOS (Sin REC. PLANILLAS)</h2>
-</div>
-""", unsafe_allow_html=True)
+st.markdown(componentes.encabezado('⚠️', 'Casos SOLO con REC. GASTOS (Sin REC. PLANILLAS)'), unsafe_allow_html=True)
 
 st.markdown("""
-<p style='font-size: 1.05em; color: #d32f2f; font-weight: bold;'>
+<p class='aviso-urgencia'>
     ⚡ URGENCIA: Estos casos requieren REC. PLANILLAS primero. Los gastos no se considerarán sin planillas.
 </p>
 """, unsafe_allow_html=True)
 
-# Filtrar casos con SOLO REC. GASTOS (tiene REC. GASTOS pero NO tiene REC. PLANILLAS)
-df_solo_gastos = df[
-    ((df['REC. GASTOS'].notna()) & (df['REC. GASTOS'] > 0)) &  # Tiene REC. GASTOS
-    ((df['REC. PLANILLAS'].isna()) | (df['REC. PLANILLAS'] == 0) | (df['REC. PLANILLAS'] == ''))  # NO tiene REC. PLANILLAS
-].copy()
-
-# Preparar tabla
-df_solo_gastos_tabla = df_solo_gastos[[
-    'DOCUMENTO',
-    'RAZON SOCIAL',
-    'ULTIMA FECHA GESTION',
-    'ASESOR',
-    'DEUDA TOTAL',
-    'CONTACTABILIDAD'
-]].copy()
-
-# Renombrar columnas
-df_solo_gastos_tabla = df_solo_gastos_tabla.rename(columns={
-    'DOCUMENTO': 'Documento',
-    'RAZON SOCIAL': 'Razón Social',
-    'ULTIMA FECHA GESTION': 'Última Fecha de Gestión',
-    'ASESOR': 'Asesor',
-    'DEUDA TOTAL': 'Deuda Total',
-    'CONTACTABILIDAD': 'Contactabilidad'
-})
+# Casos con SOLO REC. GASTOS (tiene REC. GASTOS pero NO tiene REC. PLANILLAS)
+df_solo_gastos = datos.df_solo_gastos
 
-# Formatear valores
-df_solo_gastos_tabla['Deuda Total'] = df_solo_gastos_tabla['Deuda Total'].apply(
-    lambda x: f"S/. {x:,.2f}" if pd.notnull(x) else "N/A"
-)
-df_solo_gastos_tabla['Última Fecha de Gestión'] = df_solo_gastos_tabla['Última Fecha de Gestión'].apply(
-    lambda x: x.strftime('%d/%m/%Y') if pd.notnull(x) else "Sin gestión"
-)
+# Preparar tabla (montos y fechas formateados)
+df_solo_gastos_tabla = reportes.tabla_solo_gastos(df_solo_gastos)
 
 # Mostrar métricas
 col_gastos1, col_gastos2, col_gastos3 = st.columns(3)
@@ -1126,157 +904,36 @@ with col_gastos3:
     rec_gastos_urgencia = df_solo_gastos['REC. GASTOS'].sum()
     st.metric("🏛️ REC. GASTOS Registrado", f"S/. {rec_gastos_urgencia:,.2f}")
 
-# Función para exportar a Excel
-def export_solo_gastos_excel(df_export):
-    from io import BytesIO
-    from openpyxl import Workbook
-    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-    from datetime import datetime
-    
-    output = BytesIO()
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Solo REC. Gastos"
-    
-    # Encabezado con título
-    ws['A1'] = "CASOS CON SOLO REC. GASTOS (SIN REC. PLANILLAS) - URGENCIA"
-    ws['A1'].font = Font(bold=True, size=14, color="FFFFFF")
-    ws['A1'].fill = PatternFill(start_color="D32F2F", end_color="D32F2F", fill_type="solid")
-    ws.merge_cells('A1:F1')
-    ws['A1'].alignment = Alignment(horizontal="center", vertical="center")
-    ws.row_dimensions[1].height = 25
-    
-    # Fecha de generación
-    ws['A2'] = f"Fecha de generación: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}"
-    ws['A2'].font = Font(italic=True, size=10)
-    ws.merge_cells('A2:F2')
-    ws.row_dimensions[2].height = 18
-    
-    # Leyenda
-    ws['A3'] = "⚡ URGENCIA: Estos casos necesitan REC. PLANILLAS primero. Los gastos no se considerarán sin planillas."
-    ws['A3'].font = Font(italic=True, size=10, color="C62828")
-    ws.merge_cells('A3:F3')
-    ws.row_dimensions[3].height = 18
-    
-    # Encabezados de columnas
-    headers = ['Documento', 'Razón Social', 'Última Fecha de Gestión', 'Asesor', 'Deuda Total', 'Contactabilidad']
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-    
-    for col_idx, header in enumerate(headers, 1):
-        cell = ws.cell(row=5, column=col_idx)
-        cell.value = header
-        cell.font = Font(bold=True, color="FFFFFF", size=11)
-        cell.fill = PatternFill(start_color="23395D", end_color="23395D", fill_type="solid")
-        cell.alignment = Alignment(horizontal="center", vertical="center")
-        cell.border = thin_border
-    
-    ws.row_dimensions[5].height = 20
-    
-    # Datos
-    for row_idx, (_, row) in enumerate(df_export.iterrows(), 6):
-        ws.cell(row=row_idx, column=1).value = row['Documento']
-        ws.cell(row=row_idx, column=2).value = row['Razón Social']
-        ws.cell(row=row_idx, column=3).value = row['Última Fecha de Gestión']
-        ws.cell(row=row_idx, column=4).value = row['Asesor']
-        ws.cell(row=row_idx, column=5).value = float(str(row['Deuda Total']).replace('S/. ', '').replace(',', ''))
-        ws.cell(row=row_idx, column=6).value = row['Contactabilidad']
-        
-        for col_idx in range(1, 7):
-            cell = ws.cell(row=row_idx, column=col_idx)
-            cell.border = thin_border
-            if col_idx == 5:  # Alinear números a la derecha
-                cell.alignment = Alignment(horizontal="right")
-                cell.number_format = '#,##0.00'
-            else:
-                cell.alignment = Alignment(horizontal="left")
-    
-    # Ajustar anchos de columnas
-    ws.column_dimensions['A'].width = 15
-    ws.column_dimensions['B'].width = 45
-    ws.column_dimensions['C'].width = 18
-    ws.column_dimensions['D'].width = 15
-    ws.column_dimensions['E'].width = 15
-    ws.column_dimensions['F'].width = 18
-    
-    # Fila de totales
-    total_row = len(df_export) + 6
-    ws.cell(row=total_row, column=1).value = "TOTAL"
-    ws.cell(row=total_row, column=1).font = Font(bold=True)
-    ws.cell(row=total_row, column=2).value = len(df_export)
-    ws.cell(row=total_row, column=2).font = Font(bold=True)
-    
-    total_deuda = sum([float(str(val).replace('S/. ', '').replace(',', '')) for val in df_export['Deuda Total']])
-    
-    ws.cell(row=total_row, column=5).value = total_deuda
-    ws.cell(row=total_row, column=5).number_format = '#,##0.00'
-    
-    for col_idx in range(1, 7):
-        cell = ws.cell(row=total_row, column=col_idx)
-        cell.fill = PatternFill(start_color="FFB3BA", end_color="FFB3BA", fill_type="solid")
-        cell.border = thin_border
-        cell.font = Font(bold=True)
-    
-    wb.save(output)
-    output.seek(0)
-    return output.getvalue()
 
 # Mostrar tabla
 if len(df_solo_gastos_tabla) > 0:
-    # Estilos para tabla urgencia
-    st.markdown("""
-    <style>
-    .tabla-urgencia th {
-        background: #d32f2f !important;
-        color: #fff !important;
-        font-weight: bold;
-        font-size: 1.05em;
-        padding: 12px 8px;
-        border: none;
-    }
-    .tabla-urgencia td {
-        background: #fff;
-        color: #222;
-        font-size: 0.95em;
-        padding: 10px 8px;
-        border-bottom: 1px solid #e3e3e3;
-    }
-    .tabla-urgencia tr:hover td {
-        background: #ffe0e0;
-    }
-    </style>
-    """, unsafe_allow_html=True)
     
     tabla_urgencia_html = """
-    <div style='overflow-x:auto; max-width:100%;'>
-        <div style='max-height:500px; overflow-y:auto; border-radius:12px; box-shadow:0 2px 8px rgba(0,0,0,0.07);'>
-            <table class='tabla-urgencia' style='min-width:950px; width:100%;'>
+    <div class='tabla-contenedor'>
+        <div class='tabla-scroll'>
+            <table class='tabla-urgencia'>
                 <thead>
                     <tr>
-                        <th style='text-align:center; width:50px;'>#</th>
+                        <th class='indice'>#</th>
                         <th>Documento</th>
                         <th>Razón Social</th>
                         <th>Última Fecha de Gestión</th>
                         <th>Asesor</th>
-                        <th style='text-align:right;'>Deuda Total</th>
-                        <th style='text-align:center;'>Contactabilidad</th>
+                        <th class='derecha'>Deuda Total</th>
+                        <th class='centro'>Contactabilidad</th>
                     </tr>
                 </thead>
                 <tbody>
     """
     for idx, (_, row) in enumerate(df_solo_gastos_tabla.iterrows(), 1):
         tabla_urgencia_html += f"<tr>"
-        tabla_urgencia_html += f"<td style='text-align:center; font-weight:bold;'>{idx}</td>"
+        tabla_urgencia_html += f"<td class='indice'>{idx}</td>"
         tabla_urgencia_html += f"<td>{row['Documento']}</td>"
         tabla_urgencia_html += f"<td>{row['Razón Social']}</td>"
-        tabla_urgencia_html += f"<td style='text-align:center;'>{row['Última Fecha de Gestión']}</td>"
+        tabla_urgencia_html += f"<td class='centro'>{row['Última Fecha de Gestión']}</td>"
         tabla_urgencia_html += f"<td>{row['Asesor']}</td>"
-        tabla_urgencia_html += f"<td style='text-align:right;'>{row['Deuda Total']}</td>"
-        tabla_urgencia_html += f"<td style='text-align:center;'>{row['Contactabilidad']}</td>"
+        tabla_urgencia_html += f"<td class='derecha'>{row['Deuda Total']}</td>"
+        tabla_urgencia_html += f"<td class='centro'>{row['Contactabilidad']}</td>"
         tabla_urgencia_html += "</tr>"
     tabla_urgencia_html += """
                 </tbody>
@@ -1287,13 +944,12 @@ if len(df_solo_gastos_tabla) > 0:
     st.markdown(tabla_urgencia_html, unsafe_allow_html=True)
     
     # Botón para descargar Excel
-    st.markdown("<div style='height: 15px;'></div>", unsafe_allow_html=True)
+    st.markdown("<div class='espacio-m'></div>", unsafe_allow_html=True)
     col_export_gastos1, col_export_gastos2, col_export_gastos3 = st.columns([1, 2, 1])
     with col_export_gastos2:
-        excel_data = export_solo_gastos_excel(df_solo_gastos_tabla)
         st.download_button(
             label="📥 Descargar Casos de URGENCIA en Excel",
-            data=excel_data,
+            data=descarga('solo_gastos.xlsx', partial(reportes.excel_solo_gastos, df_solo_gastos_tabla)),
             file_name=f"casos_solo_gastos_urgencia_{datetime.now().strftime('%d%m%Y_%H%M%S')}.xlsx",
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
             key="download_solo_gastos",
@@ -1305,236 +961,130 @@ else:
 # ================= FIN CASOS CON SOLO REC. GASTOS =================
 
 # ================= ANALISIS ESTRATEGICO POR NIVEL DE PRIORIDAD =================
+medidor.seccion('Niveles de riesgo')
 st.markdown("---")
-st.markdown("""
-<div style='display: flex; align-items: center;'>
-    <img src='https://img.icons8.com/color/48/000000/strategy-board.png' style='margin-right: 10px;'/>
-    <h2 style='display: inline; font-size: 2.2rem; margin: 0;'>Análisis Estratégico por Nivel de Prioridad</h2>
-</div>
-""", unsafe_allow_html=True)
-
-# Clasificación de casos
-df_analisis = df.copy()
-df_analisis['NIVEL_RIESGO'] = 'BAJA'
-# CRÍTICO: PRIORIDAD contiene "12" + CONTACTABILIDAD = "Contacto Directo" + TIPO DE PAGO = "FALTA PAGO DE PAGO PLANILLAS"
-# CRÍTICO: PRIORIDAD contiene "12" + CONTACTABILIDAD = "Contacto Directo" + TIPO DE PAGO = "FALTA PAGO DE PAGO PLANILLAS"
-# CRÍTICO: PRIORIDAD inicia con "12", CONTACTABILIDAD tiene algún valor y REC. PLANILLAS está vacío o cero
-cond_critico = (
-    df_analisis['PRIORIDAD'].astype(str).str.startswith('13') &
-    (df_analisis['CONTACTABILIDAD'].astype(str).str.strip().str.lower() == 'contacto directo') &
-    ((df_analisis['REC. PLANILLAS'].isna()) | (df_analisis['REC. PLANILLAS'] == 0) | (df_analisis['REC. PLANILLAS'] == ''))
-)
-df_analisis['NIVEL_RIESGO'] = 'BAJA'  # Reiniciar para evitar solapamientos
-df_analisis.loc[cond_critico, 'NIVEL_RIESGO'] = '+ALTA'
-# ALTO: PRIORIDAD contiene "12" pero NO es crítico
-cond_alto = (
-    df_analisis['PRIORIDAD'].astype(str).str.startswith('13') & (~cond_critico)
-)
-df_analisis.loc[cond_alto, 'NIVEL_RIESGO'] = 'ALTA'
-# MEDIO: PRIORIDAD contiene "11", "10", "09", "08", "07", "06", "05"
-cond_medio = df_analisis['PRIORIDAD'].astype(str).str.startswith(('12','11', '10', '09', '08', '07', '06', '05'))
-df_analisis.loc[cond_medio & (~cond_critico) & (~cond_alto), 'NIVEL_RIESGO'] = 'MEDIA'
-# BAJO: el resto (ya está por defecto)
-# MEDIO: PRIORIDAD contiene "11", "10", "09", "08", "07", "06", "05"
-cond_medio = df_analisis['PRIORIDAD'].astype(str).str.startswith(('12','11', '10', '09', '08', '07', '06', '05'))
-df_analisis.loc[cond_medio, 'NIVEL_RIESGO'] = 'MEDIA'
-# BAJO: el resto (ya está por defecto)
-
-# Métricas por nivel
-resumen_nivel = df_analisis.groupby('NIVEL_RIESGO').agg(
-    CUENTAS=('NIVEL_RIESGO', 'count'),
-    DEUDA=('DEUDA TOTAL', 'sum'),
-    RECUPERADO=('REC. PLANILLAS', 'sum')
-).reset_index()
-total_cuentas = resumen_nivel['CUENTAS'].sum()
-resumen_nivel['% DEL TOTAL'] = resumen_nivel['CUENTAS'] / total_cuentas * 100
-
-# Ordenar niveles
-orden_niveles = ['+ALTA', 'ALTA', 'MEDIA', 'BAJA']
-resumen_nivel['ORDEN'] = resumen_nivel['NIVEL_RIESGO'].apply(lambda x: orden_niveles.index(x) if x in orden_niveles else 99)
-resumen_nivel = resumen_nivel.sort_values('ORDEN')
-
-# Colores e íconos
-iconos = {
-    '+ALTA': "<span style='font-size:2.2em;'>🧨</span>",
-    'ALTA': "<span style='font-size:2.2em; color:#2e7d32;'>🟢</span>",
-    'MEDIA': "<span style='font-size:2.2em; color:#fbc02d;'>🟡</span>",
-    'BAJA': "<span style='font-size:2.2em; color:#d32f2f;'>🔴</span>"
-}
-color_card = {
-    '+ALTA': '#66bb6a',
-    'ALTA': '#e8f5e9',   # verde claro
-    'MEDIA': '#fffde7',  # amarillo claro
-    'BAJA': '#ffe6e6'    # rojo claro
-}
+st.markdown(componentes.encabezado('🧭', 'Análisis Estratégico por Nivel de Prioridad'), unsafe_allow_html=True)
 
-# Visualización horizontal
-st.markdown("""
-<style>
-.nivel-row {
-    display: flex;
-    flex-direction: row;
-    gap: 32px;
-    justify-content: center;
-}
-.nivel-card {
-    flex: 1;
-    background: #fff;
-    border-radius: 12px;
-    padding: 20px;
-    box-shadow: 0 2px 8px rgba(0,0,0,0.1);
-    text-align: center;
-}
-.nivel-card h3 {
-    margin: 0;
-    font-size: 1.5rem;
-    font-weight: bold;
-}
-.nivel-card p {
-    margin: 8px 0;
-    font-size: 1rem;
-}
-</style>
-""", unsafe_allow_html=True)
+# Clasificación de casos (NIVEL_RIESGO) y métricas por nivel precalculadas
+resumen_nivel = datos.resumen_nivel
 
-cards_html = "<div class='nivel-row'>"
-for _, row in resumen_nivel.iterrows():
-    nivel = row['NIVEL_RIESGO']
-    icono = iconos.get(nivel, '')
-    bg = color_card.get(nivel, '#fff')
-    cards_html += f"<div class='nivel-card' style='background:{bg};'>"
-    cards_html += f"<h3>{icono} {nivel}</h3>"
-    cards_html += f"<p><b>Cuentas:</b> {int(row['CUENTAS']):,}</p>"
-    cards_html += f"<p><b>Deuda:</b> S/. {int(row['DEUDA']):,}</p>"
-    cards_html += f"<p><b>Recuperado:</b> S/. {int(row['RECUPERADO']):,}</p>"
-    cards_html += f"<p><b>% del total:</b> {row['% DEL TOTAL']:.1f}%</p>"
-    cards_html += "</div>"
-cards_html += "</div>"
-st.markdown(cards_html, unsafe_allow_html=True)
+# Una tarjeta por nivel (ver componentes.tarjetas_nivel)
+st.markdown(componentes.tarjetas_nivel(resumen_nivel), unsafe_allow_html=True)
 # ================= FIN ANALISIS ESTRATEGICO POR NIVEL DE PRIORIDAD =================
 
 # Leyenda horizontal y centrada debajo del análisis estratégico
 st.markdown("""
-<div style='width:100%; display:flex; justify-content:center; margin:24px 0 12px 0;'>
-    <div style='display:flex; gap:38px; align-items:center; background:#f7f9fc; border-radius:16px; padding:18px 32px;'>
-        <span style='font-size:1.2em;'>⚡ <b>Sistema de Prioridades</b></span>
-        <span style='font-size:1.1em;'>🧨 <b>+ALTA:</b> Prioridad 13 + Contacto Directo + Sin Pago</span>
-        <span style='font-size:1.1em; color:#388e3c;'>🟢 <b>ALTA:</b> Prioridad 13 (todos)</span>
-        <span style='font-size:1.1em; color:#fbc02d;'>🟡 <b>MEDIA:</b> Prioridades 6-12</span>
-        <span style='font-size:1.1em; color:#d32f2f;'>🔴 <b>BAJA:</b> Prioridades 1-5</span>
+<div class='leyenda-prioridades'>
+    <div>
+        <span class='leyenda-titulo'>⚡ <b>Sistema de Prioridades</b></span>
+        <span>🧨 <b>+ALTA:</b> Prioridad 13 + Contacto Directo + Sin Pago</span>
+        <span class='leyenda-alta'>🟢 <b>ALTA:</b> Prioridad 13 (todos)</span>
+        <span class='leyenda-media'>🟡 <b>MEDIA:</b> Prioridades 6-12</span>
+        <span class='leyenda-baja'>🔴 <b>BAJA:</b> Prioridades 1-5</span>
     </div>
 </div>
 """, unsafe_allow_html=True)
 
-# ================= TABLA DE CASOS CRÍTICO =================
+# ================= CONVERSIÓN POR CONTACTABILIDAD =================
+medidor.seccion('Conversión por contactabilidad')
+st.markdown("### 📞 Conversión por Contactabilidad y Prioridad")
+# Matriz precalculada con los datos filtrados (ver conversion.matriz); el
+# fragmento sólo vuelve a dibujar el mapa de calor al cambiar el indicador
+@st.fragment
+def render_conversion(datos):
+    tabla_conversion = datos.tabla_conversion
+    if tabla_conversion.empty:
+        st.info("No hay cuentas para los filtros seleccionados.")
+        return
+    indicador = st.selectbox(
+        'Indicador:', list(conversion.INDICADORES),
+        format_func=lambda i: conversion.INDICADORES[i][0], key='indicador_conversion'
+    )
+    formato = conversion.INDICADORES[indicador][1]
+    st.altair_chart(graficos.mapa_de_calor(
+        conversion.pivote(tabla_conversion, indicador),
+        lambda v: formato.format(v).replace('S/. ', ''),
+        'Prioridad', 'Contactabilidad', esquema='greens',
+    ), use_container_width=True)
+
+    with st.expander("Ver tabla de conversión"):
+        st.dataframe(
+            tabla_conversion.style.format({
+                **{i: f for i, (_, f) in conversion.INDICADORES.items()},
+                'CON PAGO': '{:,.0f}', 'DEUDA TOTAL': 'S/. {:,.2f}', 'REC. PLANILLAS': 'S/. {:,.2f}',
+                'GASTOS ADMIN': 'S/. {:,.2f}', 'REC. GASTOS': 'S/. {:,.2f}',
+            }),
+            use_container_width=True, hide_index=True
+        )
 
-# Función para exportar a Excel
-def export_to_excel(df_export):
-    from io import BytesIO
-    from openpyxl import Workbook
-    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-    from datetime import datetime
-    
-    output = BytesIO()
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Casos Críticos"
-    
-    # Encabezado con título
-    ws['A1'] = "CASOS CRÍTICOS - PRIORIDAD 13 + CONTACTO DIRECTO + SIN PAGO"
-    ws['A1'].font = Font(bold=True, size=14, color="FFFFFF")
-    ws['A1'].fill = PatternFill(start_color="C62828", end_color="C62828", fill_type="solid")
-    ws.merge_cells('A1:E1')
-    ws['A1'].alignment = Alignment(horizontal="center", vertical="center")
-    ws.row_dimensions[1].height = 25
-    
-    # Fecha de generación
-    ws['A2'] = f"Fecha de generación: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}"
-    ws['A2'].font = Font(italic=True, size=10)
-    ws.merge_cells('A2:E2')
-    ws.row_dimensions[2].height = 18
-    
-    # Encabezados de columnas
-    headers = ['Documento', 'Razón Social', 'Deuda Total', 'Operador', 'Campaña']
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
+render_conversion(datos)
+# ================= FIN CONVERSIÓN POR CONTACTABILIDAD =================
+
+# ================= ANTIGÜEDAD DE LA GESTIÓN =================
+medidor.seccion('Antigüedad de la gestión')
+st.markdown("### ⏳ Antigüedad de la Gestión (días desde la última gestión)")
+@st.fragment
+def render_antiguedad(datos):
+    col_dim_ant, col_val_ant = st.columns(2)
+    with col_dim_ant:
+        dimension_antiguedad = st.selectbox(
+            'Agrupar por:', antiguedad.DIMENSIONES,
+            format_func=lambda d: filtros.DIMENSIONES_FILTRO.get(d, d), key='dimension_antiguedad'
+        )
+    with col_val_ant:
+        valor_antiguedad = st.radio('Mostrar:', ['CUENTAS', 'DEUDA'], format_func=lambda v: 'Cuentas' if v == 'CUENTAS' else 'Deuda (S/.)', horizontal=True, key='valor_antiguedad')
+
+    matriz_antiguedad = antiguedad.matriz(datos.resumen_antiguedad, dimension_antiguedad, valor_antiguedad)
+    if not matriz_antiguedad.empty:
+        matriz_antiguedad = matriz_antiguedad.rename(
+            columns=lambda t: f"{t} días" if t != antiguedad.TRAMO_SIN_GESTION else t
+        )
+        if dimension_antiguedad == 'ASESOR':
+            matriz_antiguedad = matriz_antiguedad.rename(index=asesores.nombres_cortos(matriz_antiguedad.index))
+        st.altair_chart(graficos.mapa_de_calor(
+            matriz_antiguedad,
+            (lambda v: f"{v:,.0f}") if valor_antiguedad == 'CUENTAS' else (lambda v: f"{v / 1000:,.0f}k"),
+            'Días sin gestión', filtros.DIMENSIONES_FILTRO.get(dimension_antiguedad, dimension_antiguedad),
+        ), use_container_width=True)
+
+    # Cuentas vencidas (más de 30 días o nunca gestionadas) con la mayor deuda
+    vencidas = datos.df_analisis[datos.df_analisis['TRAMO_GESTION'].isin(antiguedad.TRAMOS_VENCIDOS)]
+    st.caption(
+        f"{len(vencidas):,} cuentas sin gestión en más de 30 días o nunca gestionadas, "
+        f"con una deuda de S/. {vencidas['DEUDA TOTAL'].sum():,.2f}"
     )
-    
-    for col_idx, header in enumerate(headers, 1):
-        cell = ws.cell(row=4, column=col_idx)
-        cell.value = header
-        cell.font = Font(bold=True, color="FFFFFF", size=11)
-        cell.fill = PatternFill(start_color="23395D", end_color="23395D", fill_type="solid")
-        cell.alignment = Alignment(horizontal="center", vertical="center")
-        cell.border = thin_border
-    
-    ws.row_dimensions[4].height = 20
-    
-    # Datos
-    for row_idx, (_, row) in enumerate(df_export.iterrows(), 5):
-        ws.cell(row=row_idx, column=1).value = row['Documento']
-        ws.cell(row=row_idx, column=2).value = row['Razón Social']
-        ws.cell(row=row_idx, column=3).value = row['Deuda Total']
-        ws.cell(row=row_idx, column=4).value = row['Operador']
-        ws.cell(row=row_idx, column=5).value = row['Campaña']
-        
-        for col_idx in range(1, 6):
-            cell = ws.cell(row=row_idx, column=col_idx)
-            cell.border = thin_border
-            if col_idx == 3:  # Alinear números a la derecha
-                cell.alignment = Alignment(horizontal="right")
-            else:
-                cell.alignment = Alignment(horizontal="left")
-    
-    # Ajustar anchos de columnas
-    ws.column_dimensions['A'].width = 15
-    ws.column_dimensions['B'].width = 45
-    ws.column_dimensions['C'].width = 15
-    ws.column_dimensions['D'].width = 12
-    ws.column_dimensions['E'].width = 18
-    
-    # Fila de totales
-    total_row = len(df_export) + 5
-    ws.cell(row=total_row, column=1).value = "TOTAL"
-    ws.cell(row=total_row, column=1).font = Font(bold=True)
-    ws.cell(row=total_row, column=2).value = len(df_export)
-    ws.cell(row=total_row, column=2).font = Font(bold=True)
-    for col_idx in range(1, 6):
-        cell = ws.cell(row=total_row, column=col_idx)
-        cell.fill = PatternFill(start_color="FFE082", end_color="FFE082", fill_type="solid")
-        cell.border = thin_border
-    
-    wb.save(output)
-    output.seek(0)
-    return output.getvalue()
+    with st.expander("Ver las 20 cuentas vencidas con mayor deuda"):
+        st.dataframe(
+            vencidas.nlargest(20, 'DEUDA TOTAL')[['DOCUMENTO', 'RAZON SOCIAL', 'CAMPAÑA', 'ASESOR', 'NIVEL_RIESGO', 'TRAMO_GESTION', 'DEUDA TOTAL']]
+            .rename(columns={'TRAMO_GESTION': 'Días sin gestión'})
+            .style.format({'DEUDA TOTAL': 'S/. {:,.2f}'}),
+            use_container_width=True, hide_index=True
+        )
 
-st.markdown("""
-<div style='display: flex; align-items: center; margin-top:32px;'>
-    <img src='https://img.icons8.com/emoji/48/000000/bomb-emoji.png' style='margin-right: 10px;'/>
-    <h2 style='display: inline; font-size: 2rem; margin: 0; color: #c62828;'>
-        Detalle de Casos Críticos (Prioridad 13 + Contacto Directo + Sin Pago)
-    </h2>
-</div>
-""", unsafe_allow_html=True)
-df_critico = df_analisis[df_analisis['NIVEL_RIESGO'] == '+ALTA']
+render_antiguedad(datos)
+# ================= FIN ANTIGÜEDAD DE LA GESTIÓN =================
+
+# ================= TABLA DE CASOS CRÍTICO =================
+medidor.seccion('Casos críticos')
+
+
+st.markdown(componentes.encabezado(
+    '💣', 'Detalle de Casos Críticos (Prioridad 13 + Contacto Directo + Sin Pago)', clase='encabezado-critico'
+), unsafe_allow_html=True)
+df_critico = datos.df_critico
+# En modo consolidado: deudores con alguna cuenta crítica y su deuda en todas las campañas
+criticos_consolidados = st.toggle("Consolidar por deudor", key="criticos_consolidados")
+if criticos_consolidados:
+    df_critico = datos.deudores[datos.deudores['NIVEL_RIESGO'] == '+ALTA']
 
 # Preparar tabla de casos críticos para mostrar y exportar
-cols_critico = {
-    'DOCUMENTO': 'Documento',
-    'RAZON SOCIAL': 'Razón Social',
-    'DEUDA TOTAL': 'Deuda Total',
-    'OPERADOR': 'Operador',
-    'CAMPAÑA': 'Campaña'
-}
-df_critico_tabla = df_critico[list(cols_critico.keys())].rename(columns=cols_critico)
+df_critico_tabla = reportes.tabla_critico(df_critico)
 
 st.write(f"Total de casos críticos detectados: {len(df_critico)}")
 
 # Descripción de distribución por campaña
 distribucion = df_critico['CAMPAÑA'].value_counts()
+distribucion = distribucion[distribucion > 0]
 desc = "<b>Distribución por Campaña:</b><br>"
 for camp, cant in distribucion.items():
     desc += f"• <b>{camp}</b>: {cant} casos<br>"
@@ -1542,36 +1092,15 @@ st.markdown(desc, unsafe_allow_html=True)
 
 # Botón para descargar Excel
 if not df_critico.empty:
-    excel_data = export_to_excel(df_critico_tabla)
     st.download_button(
         label="📥 Descargar tabla en Excel",
-        data=excel_data,
+        data=descarga('critico_consolidado.xlsx' if criticos_consolidados else 'critico.xlsx', partial(reportes.excel_critico, df_critico_tabla)),
         file_name=f"casos_criticos_{datetime.now().strftime('%d%m%Y_%H%M%S')}.xlsx",
         mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         key="download_criticos"
     )
-    st.markdown("<div style='height: 10px;'></div>", unsafe_allow_html=True)
+    st.markdown("<div class='espacio-s'></div>", unsafe_allow_html=True)
 
-# Estilo para el header de la tabla (rojo más intenso)
-st.markdown("""
-<style>
-.tabla-critico th {
-    background: #c62828 !important;
-    color: #fff !important;
-    font-weight: bold;
-    font-size: 1.1em;
-    padding: 10px 6px;
-    border: none;
-}
-.tabla-critico td {
-    background: #fff;
-    color: #222;
-    font-size: 1em;
-    padding: 8px 6px;
-    border-bottom: 1px solid #f3f3f3;
-}
-</style>
-""", unsafe_allow_html=True)
 
 # Leyenda de sistema de prioridades
 
@@ -1583,9 +1112,9 @@ st.markdown("""
 # Mostrar tabla no interactiva, encabezado rojo y scroll horizontal
 
 tabla_html = """
-<div style='overflow-x:auto; max-width:100%;'>
-    <div style='max-height:340px; overflow-y:auto; border-radius:12px; box-shadow:0 2px 8px rgba(0,0,0,0.07);'>
-        <table class='tabla-critico' style='min-width:700px; width:100%;'>
+<div class='tabla-contenedor'>
+    <div class='tabla-scroll tabla-scroll-corta'>
+        <table class='tabla-critico'>
             <thead>
                 <tr>
                     <th>Documento</th>
@@ -1610,86 +1139,85 @@ tabla_html += """
         </table>
     </div>
 </div>
-<div style='margin-top:10px; font-weight:bold; color:#c62828;'>Total de casos críticos detectados: {}</div>
+<div class='total-critico'>Total de casos críticos detectados: {}</div>
 """.format(len(df_critico_tabla))
 st.markdown(tabla_html, unsafe_allow_html=True)
-# === HISTORIAL DE PAGOS (ACTUALIZADO) ===
-# Crear df_pagos desde el DataFrame principal, seleccionando columnas que pueden existir
-df_pagos = pd.DataFrame()
 
-# Helpers para parseo y limpieza
-def _parse_fecha_serie(s):
-    # Si vienen como números (serial Excel), convertir desde 1899-12-30
-    try:
-        if pd.api.types.is_numeric_dtype(s):
-            origin = pd.Timestamp('1899-12-30')
-            return s.apply(lambda v: origin + pd.to_timedelta(int(v), unit='D') if not pd.isna(v) else pd.NaT)
-    except Exception:
-        pass
-    return pd.to_datetime(s, dayfirst=True, errors='coerce')
-
-def _clean_monto(val):
-    try:
-        if pd.isna(val):
-            return np.nan
-        s = str(val)
-        # eliminar prefijos tipo 'S/.' y cualquier caracter no numérico salvo ,.-
-        s = re.sub(r"S\.?/?\s*", "", s)
-        s = re.sub(r"[^0-9,\.-]", "", s)
-        if s == '':
-            return np.nan
-        # si tiene coma y punto, asumimos coma miles y punto decimal -> eliminar comas
-        if s.count(',') > 0 and s.count('.') > 0:
-            s = s.replace(',', '')
-        # si tiene sólo comas, convertir coma decimal a punto
-        elif s.count(',') > 0 and s.count('.') == 0:
-            s = s.replace(',', '.')
-        s = s.replace(' ', '')
-        return float(s)
-    except Exception:
-        return np.nan
-
-# Procesar datos de pagos de planillas y gastos
-if not df.empty:
-    if 'FECHA DE PAGO P' in df.columns and 'REC. PLANILLAS' in df.columns:
-        df_planillas = df[['FECHA DE PAGO P', 'REC. PLANILLAS', 'CAMPAÑA', 'RAZON SOCIAL']].rename(columns={
-            'FECHA DE PAGO P': 'fecha',
-            'REC. PLANILLAS': 'monto',
-            'CAMPAÑA': 'campana',
-            'RAZON SOCIAL': 'razon_social'
-        }).copy()
-        df_planillas['tipo_pago'] = 'PLANILLAS'
-
-    if 'FECHA DE PAGO G' in df.columns and 'REC. GASTOS' in df.columns:
-        df_gastos = df[['FECHA DE PAGO G', 'REC. GASTOS', 'CAMPAÑA', 'RAZON SOCIAL']].rename(columns={
-            'FECHA DE PAGO G': 'fecha',
-            'REC. GASTOS': 'monto',
-            'CAMPAÑA': 'campana',
-            'RAZON SOCIAL': 'razon_social'
-        }).copy()
-        df_gastos['tipo_pago'] = 'GASTOS'
-
-    parts = []
-    if 'df_planillas' in locals():
-        parts.append(df_planillas)
-    if 'df_gastos' in locals():
-        parts.append(df_gastos)
-    if parts:
-        df_pagos = pd.concat(parts, ignore_index=True)
-
-# Limpiar y normalizar columnas
-if not df_pagos.empty:
-    df_pagos['razon_social'] = df_pagos.get('razon_social', '').fillna('Desconocido').astype(str).str.strip()
-    df_pagos['campana'] = df_pagos.get('campana', '').fillna('Sin campaña').astype(str).str.strip()
-    df_pagos['fecha'] = _parse_fecha_serie(df_pagos['fecha'])
-    df_pagos['monto'] = df_pagos['monto'].apply(_clean_monto)
-    # Filtrar sólo pagos con monto válido o fecha conocida
-    df_pagos = df_pagos.loc[(df_pagos['monto'].notna() & (df_pagos['monto'] > 0)) | df_pagos['fecha'].notna()]
+# ================= LISTA DE TRABAJO =================
+medidor.seccion('Lista de trabajo')
+# Puntaje por cuenta (deuda, prioridad, contactabilidad, días sin gestión y estado
+# de pago) repartido en lotes diarios equilibrados por asesor u operador.
+@st.cache_resource(max_entries=16, show_spinner="Armando lista de trabajo...")
+def lista_de_trabajo(version, selecciones, rango_fechas, por, n_dias, cuentas_por_dia, _datos):
+    return lista_trabajo.asignar_lotes(_datos.df_analisis, _datos.puntajes, por=por, n_dias=n_dias, cuentas_por_dia=cuentas_por_dia)
+
+st.markdown("## 📞 Lista de Trabajo")
+# Fragmento: cambiar el reparto o el cupo sólo vuelve a ejecutar esta sección
+@st.fragment
+def render_lista_trabajo(datos, selecciones, rango_fechas):
+    col_por, col_dias, col_cupo = st.columns(3)
+    with col_por:
+        agrupar_por = st.radio("Repartir por", ['ASESOR', 'OPERADOR'], horizontal=True, key="lista_trabajo_por")
+    with col_dias:
+        n_dias_lista = st.number_input("Días", min_value=1, max_value=20, value=5, key="lista_trabajo_dias")
+    with col_cupo:
+        cupo_lista = st.number_input("Cuentas por día (0 = todas)", min_value=0, value=0, step=10, key="lista_trabajo_cupo")
+
+    lista = lista_de_trabajo(
+        datos.version, tuple(selecciones), rango_fechas, agrupar_por, int(n_dias_lista), int(cupo_lista) or None, datos
+    )
+    resumen_lista = (
+        lista[lista['DIA'] > 0]
+        .groupby([agrupar_por, 'DIA'], observed=True)
+        .agg(Cuentas=('PUNTAJE', 'size'), Puntaje=('PUNTAJE', 'sum'), Deuda=('DEUDA TOTAL', 'sum'))
+        .reset_index()
+    )
+    fuera_del_cupo = int((lista['DIA'] == lista_trabajo.FUERA_DEL_CUPO).sum())
+    sin_agente = int((lista['DIA'] == lista_trabajo.SIN_AGENTE).sum())
+    st.caption(
+        f"{int((lista['DIA'] > 0).sum()):,} cuentas asignadas en lotes de {int(n_dias_lista)} días"
+        + (f" · {fuera_del_cupo:,} quedan fuera del cupo diario" if fuera_del_cupo else "")
+        + (f" · {sin_agente:,} sin {agrupar_por.lower()} (van aparte en el ZIP)" if sin_agente else "")
+    )
+    st.dataframe(
+        resumen_lista.rename(columns={agrupar_por: agrupar_por.title(), 'DIA': 'Día'}).style.format({'Puntaje': '{:,.1f}', 'Deuda': 'S/. {:,.2f}'}),
+        use_container_width=True, hide_index=True
+    )
+    with st.expander("Ver cuentas del día 1"):
+        columnas_lista = [c for c in lista_trabajo.COLUMNAS_EXPORTE if c in lista.columns]
+        st.dataframe(
+            lista.loc[lista['DIA'] == 1, [agrupar_por] + [c for c in columnas_lista if c != agrupar_por]].head(500),
+            use_container_width=True, hide_index=True
+        )
+    st.download_button(
+        label="📥 Descargar listas por agente (ZIP)",
+        data=partial(lista_trabajo.exportar_zip, lista, por=agrupar_por),
+        file_name=f"listas_trabajo_{agrupar_por.lower()}_{datetime.now().strftime('%d%m%Y_%H%M%S')}.zip",
+        mime="application/zip",
+        key="download_lista_trabajo"
+    )
+
+render_lista_trabajo(datos, selecciones, rango_fechas)
+# ================= FIN LISTA DE TRABAJO =================
+
+# === HISTORIAL DE PAGOS (ACTUALIZADO) ===
+medidor.seccion('Historial de pagos')
+# df_pagos se construye una sola vez en procesamiento.construir_df_pagos
+df_pagos = datos.df_pagos
 
 # Verificar si df_pagos contiene datos válidos
 if df_pagos.empty:
     st.warning("El DataFrame de pagos está vacío o no contiene pagos recientes con monto/fecha válidos.")
 else:
     # Llamar a la función render_historial_pagos con datos limpios
-    render_historial_pagos(df_pagos)
-# === FIN HISTORIAL DE PAGOS ===
\ No newline at end of file
+    render_historial_pagos(df_pagos, datos.proyeccion_recaudo, datos.motor)
+# === FIN HISTORIAL DE PAGOS ===
+
+# Resumen de bytes enviados por sección (sólo con ?envio=1)
+if medidor.activo:
+    envio_por_seccion = medidor.detener()
+    with st.sidebar.expander(f"📦 Bytes enviados: {envio_por_seccion['Bytes'].sum() / 1024:,.1f} KB", expanded=True):
+        st.dataframe(
+            envio_por_seccion.style.format({'Bytes': '{:,.0f}', '% del total': '{:.1f}%'}),
+            use_container_width=True, hide_index=True
+        )
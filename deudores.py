@@ -0,0 +1,124 @@
+"""
+Índice de deudores: agrupa las cuentas de un mismo deudor entre campañas.
+
+La clave es el DOCUMENTO normalizado (sólo dígitos, sin ceros a la izquierda).
+Las cuentas sin documento se asocian por RAZON SOCIAL normalizada (sin tildes,
+puntuación ni forma societaria) al documento que tenga ese mismo nombre, o
+quedan agrupadas por el nombre. Todo se resuelve con claves hash (factorize y
+diccionarios), sin comparar pares de cuentas.
+"""
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+# Formas societarias que no distinguen a un deudor (después de quitar la puntuación)
+FORMAS_SOCIETARIAS = [
+    'SOCIEDAD ANONIMA CERRADA', 'SOCIEDAD ANONIMA ABIERTA', 'SOCIEDAD ANONIMA',
+    'SOCIEDAD COMERCIAL DE RESPONSABILIDAD LIMITADA', 'EMPRESA INDIVIDUAL DE RESPONSABILIDAD LIMITADA',
+    'SAC', 'SAA', 'SA', 'SRL', 'SCRL', 'EIRL', 'EIRLTDA', 'LTDA',
+]
+_PATRON_FORMAS = re.compile(r'\b(?:' + '|'.join(FORMAS_SOCIETARIAS) + r')\b')
+_NO_ALFANUMERICO = re.compile(r'[^A-Z0-9 ]')
+
+# Orden de gravedad para quedarse con el nivel más alto de un deudor
+ORDEN_NIVEL = ['+ALTA', 'ALTA', 'MEDIA', 'BAJA']
+
+
+def _por_valor_unico(serie, funcion):
+    """Aplica una normalización sobre los valores distintos y la propaga a todas las filas."""
+    codigos, unicos = pd.factorize(serie, use_na_sentinel=True)
+    normalizados = funcion(pd.Series(unicos, dtype=object)).to_numpy(dtype=object)
+    resultado = np.full(len(serie), np.nan, dtype=object)
+    validos = codigos >= 0
+    resultado[validos] = normalizados[codigos[validos]]
+    return pd.Series(resultado, index=serie.index, dtype=object)
+
+
+def normalizar_documento(serie):
+    def normalizar(unicos):
+        texto = unicos.astype(str).str.replace(r'\.0$', '', regex=True).str.replace(r'\D', '', regex=True).str.lstrip('0')
+        return texto.where(texto != '')
+    return _por_valor_unico(serie, normalizar)
+
+
+def normalizar_razon_social(serie):
+    def normalizar(unicos):
+        texto = (
+            unicos.astype(str).str.upper()
+            .str.normalize('NFKD').str.encode('ascii', 'ignore').str.decode('ascii')
+            .str.replace('.', '', regex=False)
+            .str.replace(_NO_ALFANUMERICO, ' ', regex=True)
+            .str.replace(_PATRON_FORMAS, ' ', regex=True)
+            .str.split().str.join(' ')
+        )
+        return texto.where(texto != '')
+    return _por_valor_unico(serie, normalizar)
+
+
+def normalizar_documento_texto(texto):
+    """Versión escalar de normalizar_documento (p. ej. para una consulta de búsqueda)."""
+    digitos = re.sub(r'\D', '', re.sub(r'\.0$', '', str(texto))).lstrip('0')
+    return digitos or None
+
+
+def normalizar_nombre(texto):
+    """Versión escalar de normalizar_razon_social."""
+    texto = unicodedata.normalize('NFKD', str(texto).upper()).encode('ascii', 'ignore').decode('ascii')
+    texto = _PATRON_FORMAS.sub(' ', _NO_ALFANUMERICO.sub(' ', texto.replace('.', '')))
+    return ' '.join(texto.split()) or None
+
+
+def indexar(df):
+    """Clave de deudor por fila ('DOC:<documento>', o 'RS:<razón social>' si no hay documento)."""
+    documento = normalizar_documento(df['DOCUMENTO'])
+    nombre = normalizar_razon_social(df['RAZON SOCIAL'])
+
+    # Nombre -> documento, sólo para nombres que corresponden a un único documento
+    con_documento = pd.DataFrame({'nombre': nombre, 'documento': documento}).dropna().drop_duplicates()
+    unico = ~con_documento['nombre'].duplicated(keep=False)
+    documento_por_nombre = dict(zip(con_documento.loc[unico, 'nombre'], con_documento.loc[unico, 'documento']))
+
+    documento = documento.fillna(nombre.map(documento_por_nombre))
+    clave = ('DOC:' + documento).fillna('RS:' + nombre)
+    # Sin documento ni nombre la cuenta es su propio deudor
+    clave = clave.fillna(pd.Series('FILA:' + df.index.astype(str), index=df.index))
+    return clave.rename('DEUDOR')
+
+
+def consolidar(df):
+    """
+    Una fila por deudor con la exposición total entre campañas. Conserva los nombres
+    de columna de las cuentas (DEUDA TOTAL, REC. PLANILLAS, ...) para reutilizar las
+    vistas y exportes; CAMPAÑA, ASESOR y OPERADOR listan todos los valores del deudor.
+    """
+    if df.empty:
+        return df.iloc[:0].assign(CUENTAS=pd.Series(dtype='int64'))
+    ordenado = df.sort_values('DEUDA TOTAL', ascending=False)
+    grupos = ordenado.groupby('DEUDOR', sort=False)
+    consolidado = grupos.agg(**{
+        'DOCUMENTO': ('DOCUMENTO', 'first'),
+        'RAZON SOCIAL': ('RAZON SOCIAL', 'first'),
+        'CONTACTABILIDAD': ('CONTACTABILIDAD', 'first'),
+        'CUENTAS': ('DEUDOR', 'size'),
+        'DEUDA TOTAL': ('DEUDA TOTAL', 'sum'),
+        'GASTOS ADMIN': ('GASTOS ADMIN', 'sum'),
+        'REC. PLANILLAS': ('REC. PLANILLAS', 'sum'),
+        'REC. GASTOS': ('REC. GASTOS', 'sum'),
+        'ULTIMA FECHA GESTION': ('ULTIMA FECHA GESTION', 'max'),
+    })
+    for columna in ['CAMPAÑA', 'ASESOR', 'OPERADOR']:
+        valores = ordenado[['DEUDOR', columna]].dropna().astype({columna: str}).drop_duplicates()
+        # Sólo los deudores con varios valores necesitan unirlos (casi todos tienen uno)
+        varios = valores['DEUDOR'].duplicated(keep=False)
+        unidos = valores[varios].groupby('DEUDOR', sort=False)[columna].agg(', '.join)
+        consolidado[columna] = pd.concat([valores[~varios].set_index('DEUDOR')[columna], unidos])
+    if 'NIVEL_RIESGO' in df.columns:
+        gravedad = pd.Categorical(ordenado['NIVEL_RIESGO'], categories=ORDEN_NIVEL, ordered=True).codes
+        nivel = pd.Series(gravedad, index=ordenado.index).where(gravedad >= 0, len(ORDEN_NIVEL))
+        consolidado['NIVEL_RIESGO'] = (
+            nivel.groupby(ordenado['DEUDOR'], sort=False).min()
+            .map(dict(enumerate(ORDEN_NIVEL)))
+        )
+    return consolidado.sort_values('DEUDA TOTAL', ascending=False).reset_index()
@@ -0,0 +1,80 @@
+"""
+Bytes que cada sección del dashboard envía al navegador en una ejecución.
+
+Está apagado por defecto: el servidor tiene que arrancar con la variable de
+entorno DASHBOARD_MEDIR_ENVIO=1 y, además, la sesión tiene que abrirse con
+?envio=1 en la URL. Mientras está activo, cada mensaje que
+Streamlit encola para la sesión (elementos, gráficos, tablas) se cuenta con su
+tamaño serializado bajo la sección en curso; el dashboard marca el inicio de
+cada sección con MedidorEnvio.seccion() y muestra el resumen al final. Sirve para
+ver qué secciones dominan la transferencia en enlaces lentos.
+
+Reemplaza un atributo privado del contexto de ejecución de Streamlit
+(ScriptRunContext._enqueue), sólo probado con las versiones de
+VERSIONES_PROBADAS; con otra versión se avisa en el log y, si el atributo no
+existe, el medidor no cuenta nada.
+"""
+import logging
+import os
+
+import pandas as pd
+import streamlit
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+logger = logging.getLogger(__name__)
+
+# Sin esta variable ninguna sesión reemplaza ScriptRunContext._enqueue
+HABILITADO = os.environ.get('DASHBOARD_MEDIR_ENVIO') == '1'
+# Versiones menores de Streamlit con las que se probó el reemplazo de _enqueue
+VERSIONES_PROBADAS = ('1.66',)
+
+
+class MedidorEnvio:
+    def __init__(self, activo=False):
+        self.activo = activo and HABILITADO
+        self.actual = 'Inicio'
+        self.bytes = {}
+        self.mensajes = {}
+        self._ctx = None
+        self._original = None
+        if self.activo:
+            self._iniciar()
+
+    def _iniciar(self):
+        if '.'.join(streamlit.__version__.split('.')[:2]) not in VERSIONES_PROBADAS:
+            logger.warning("Medición de envío no probada con Streamlit %s (probada con %s)",
+                           streamlit.__version__, ', '.join(VERSIONES_PROBADAS))
+        ctx = get_script_run_ctx()
+        if ctx is None or not hasattr(ctx, '_enqueue'):
+            logger.warning("Streamlit %s no tiene ScriptRunContext._enqueue; no se mide el envío", streamlit.__version__)
+            self.activo = False
+            return
+        # Si una ejecución anterior terminó con st.stop() el envoltorio quedó puesto
+        original = getattr(ctx._enqueue, 'original', ctx._enqueue)
+
+        def contar(msg):
+            self.bytes[self.actual] = self.bytes.get(self.actual, 0) + msg.ByteSize()
+            self.mensajes[self.actual] = self.mensajes.get(self.actual, 0) + 1
+            original(msg)
+
+        contar.original = original
+        self._ctx, self._original = ctx, original
+        ctx._enqueue = contar
+
+    def seccion(self, nombre):
+        """Los mensajes siguientes se cuentan para `nombre`."""
+        self.actual = nombre
+
+    def detener(self):
+        """Deja de contar y devuelve el resumen por sección (en orden de aparición)."""
+        if self._ctx is not None:
+            self._ctx._enqueue = self._original
+            self._ctx = None
+        resumen = pd.DataFrame({
+            'Sección': list(self.bytes),
+            'Mensajes': [self.mensajes[s] for s in self.bytes],
+            'Bytes': list(self.bytes.values()),
+        })
+        total = resumen['Bytes'].sum()
+        resumen['% del total'] = resumen['Bytes'] / total * 100 if total else 0.0
+        return resumen
@@ -0,0 +1,138 @@
+"""
+Exportes estándar precalculados en disco por versión de los datos.
+
+Apenas se construye una versión nueva de los datos, un hilo en segundo plano
+arma en un pool de procesos los libros que ofrecen las descargas de Casos
+Críticos, Solo REC. GASTOS y Clientes TOP (cada campaña y el consolidado por
+deudor, para las cantidades de TOP_ESTANDAR) y los guarda en
+<directorio>/<versión>/, donde la versión combina la de los datos con
+reportes.VERSION_FORMATO y VERSION_EXPORTES (un cambio de layout no reutiliza
+libros viejos). Las descargas sin filtros globales leen esos archivos;
+si el archivo no está (otra cantidad de clientes o el trabajo aún no terminó) el
+libro se arma al hacer clic, como antes. Sólo se conservan en disco las últimas
+VERSIONES_CONSERVADAS versiones.
+"""
+import hashlib
+import logging
+import multiprocessing
+import os
+import re
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import procesamiento
+import reportes
+
+logger = logging.getLogger(__name__)
+
+# Cantidades de Clientes TOP que se precalculan (10 es la del slider por defecto)
+TOP_ESTANDAR = (10, 20, 50)
+VERSIONES_CONSERVADAS = 2
+# Columnas de la tabla de Clientes TOP (el consolidado agrega CAMPAÑA)
+COLUMNAS_TOP = ['DOCUMENTO', 'RAZON SOCIAL', 'ASESOR', 'DEUDA TOTAL', 'REC. PLANILLAS', 'CONTACTABILIDAD', 'ULTIMA FECHA GESTION']
+CONSOLIDADO = 'Consolidado por deudor'
+# Subirla al cambiar qué exportes se precalculan o cómo se nombran
+VERSION_EXPORTES = 1
+
+
+def directorio_version(directorio, version):
+    clave = f'{version}|formato {reportes.VERSION_FORMATO}|exportes {VERSION_EXPORTES}'
+    return os.path.join(directorio, hashlib.sha1(clave.encode('utf-8')).hexdigest()[:16])
+
+
+def nombre_clientes_top(campania, n):
+    return f"clientes_top_{re.sub(r'[^0-9a-z]+', '_', campania.lower()).strip('_')}_{n}.xlsx"
+
+
+def tareas_estandar(datos):
+    """(nombre de archivo, función de reportes, argumentos) de cada exporte estándar."""
+    deudores_criticos = datos.deudores[datos.deudores['NIVEL_RIESGO'] == '+ALTA']
+    tareas = [
+        ('critico.xlsx', reportes.excel_critico, (reportes.tabla_critico(datos.df_critico),)),
+        ('critico_consolidado.xlsx', reportes.excel_critico, (reportes.tabla_critico(deudores_criticos),)),
+    ]
+    if not datos.df_solo_gastos.empty:
+        tareas.append(('solo_gastos.xlsx', reportes.excel_solo_gastos, (reportes.tabla_solo_gastos(datos.df_solo_gastos),)))
+
+    calculo = procesamiento.motor_calculo(datos.motor)
+    tops = {
+        campania: (calculo.top_clientes(datos.df, campania, max(TOP_ESTANDAR)), COLUMNAS_TOP)
+        for campania in datos.df.groupby('CAMPAÑA', observed=True).size().index
+    }
+    tops[CONSOLIDADO] = (datos.deudores, COLUMNAS_TOP + ['CAMPAÑA'])
+    for campania, (top, columnas) in tops.items():
+        # El dashboard sólo pide n cuentas si la campaña tiene al menos n
+        for n in (n for n in TOP_ESTANDAR if n <= len(top)):
+            tabla = reportes.tabla_clientes_top(top.head(n)[columnas])
+            tareas.append((nombre_clientes_top(campania, n), reportes.excel_clientes_top, (tabla, campania)))
+    return tareas
+
+
+def _escribir(tarea):
+    ruta, funcion, args = tarea
+    contenido = funcion(*args)
+    # Se escribe aparte y se reemplaza, para que nunca se lea un archivo a medias
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    with open(temporal, 'wb') as f:
+        f.write(contenido)
+    os.replace(temporal, ruta)
+    return ruta
+
+
+def descartar_viejas(directorio, conservar=VERSIONES_CONSERVADAS):
+    """Borra las versiones usadas hace más tiempo, dejando las `conservar` más recientes."""
+    versiones = sorted(
+        (entrada for entrada in os.scandir(directorio) if entrada.is_dir()),
+        key=lambda entrada: entrada.stat().st_mtime, reverse=True
+    )
+    for entrada in versiones[conservar:]:
+        shutil.rmtree(entrada.path, ignore_errors=True)
+
+
+def materializar(directorio, datos, max_workers=None):
+    """Escribe los exportes estándar de `datos` que aún no estén en disco; devuelve cuántos escribió."""
+    destino = directorio_version(directorio, datos.version)
+    os.makedirs(destino, exist_ok=True)
+    # La fecha de modificación del directorio marca la versión como recién usada
+    os.utime(destino)
+    pendientes = [
+        (os.path.join(destino, nombre), funcion, args)
+        for nombre, funcion, args in tareas_estandar(datos)
+        if not os.path.exists(os.path.join(destino, nombre))
+    ]
+    if len(pendientes) == 1:
+        _escribir(pendientes[0])
+    elif pendientes:
+        # Se deja un núcleo libre para las sesiones que se atienden mientras tanto
+        max_workers = min(len(pendientes), max_workers or max(1, (os.cpu_count() or 2) - 1))
+        # 'spawn': este hilo corre dentro del servidor de Streamlit (varios hilos) y
+        # hacer fork de un proceso con hilos puede dejar al hijo bloqueado en un lock
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            list(pool.map(_escribir, pendientes))
+    descartar_viejas(directorio)
+    return len(pendientes)
+
+
+def _materializar(directorio, datos, max_workers):
+    try:
+        escritos = materializar(directorio, datos, max_workers)
+        logger.info("Exportes de la versión %s listos (%d nuevos)", datos.version, escritos)
+    except Exception:
+        logger.exception("No se pudieron precalcular los exportes de la versión %s", datos.version)
+
+
+def en_segundo_plano(directorio, datos, max_workers=None):
+    """Lanza materializar() en un hilo y vuelve de inmediato."""
+    hilo = threading.Thread(target=_materializar, args=(directorio, datos, max_workers), name='exportes', daemon=True)
+    hilo.start()
+    return hilo
+
+
+def leer_o_generar(directorio, version, nombre, generar):
+    """Bytes del exporte precalculado `nombre` o, si no está en disco, los de generar()."""
+    try:
+        with open(os.path.join(directorio_version(directorio, version), nombre), 'rb') as f:
+            return f.read()
+    except OSError:
+        return generar()
@@ -0,0 +1,83 @@
+"""
+Índice de filtros globales del dashboard.
+
+Al cargar los datos se construye, para cada dimensión filtrable, un bitmap por
+valor (máscara booleana empaquetada con np.packbits). Cualquier combinación de
+filtros se resuelve luego con operaciones OR/AND sobre esos bitmaps, sin volver
+a recorrer el DataFrame.
+"""
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+# Columna del DataFrame -> etiqueta en la barra de filtros
+DIMENSIONES_FILTRO = {
+    'CAMPAÑA': 'Campaña',
+    'ASESOR': 'Asesor',
+    'OPERADOR': 'Operador',
+    'PRIORIDAD': 'Prioridad',
+    'CONTACTABILIDAD': 'Contactabilidad',
+    'NIVEL_RIESGO': 'Nivel de riesgo',
+}
+COLUMNA_FECHA_FILTRO = 'ULTIMA FECHA GESTION'
+
+
+@dataclass(frozen=True)
+class IndiceFiltros:
+    n_filas: int
+    bitmaps: dict = field(default_factory=dict)  # columna -> {valor: bitmap empaquetado}
+    fechas: np.ndarray = None  # ULTIMA FECHA GESTION como datetime64 (NaT si no hay gestión)
+
+    def opciones(self, columna):
+        return list(self.bitmaps.get(columna, {}).keys())
+
+    def mascara(self, selecciones=None, rango_fechas=None):
+        """
+        Máscara booleana de las filas que cumplen todos los filtros.
+        selecciones: {columna: [valores]}; una lista vacía no filtra esa dimensión.
+        rango_fechas: (inicio, fin) inclusivo sobre ULTIMA FECHA GESTION, o None.
+        """
+        resultado = None
+        for columna, valores in (selecciones or {}).items():
+            if not valores:
+                continue
+            por_valor = self.bitmaps[columna]
+            vacio = np.zeros_like(next(iter(por_valor.values())))
+            union = vacio.copy()
+            for valor in valores:
+                union |= por_valor.get(valor, vacio)
+            resultado = union if resultado is None else resultado & union
+        if resultado is None:
+            mascara = np.ones(self.n_filas, dtype=bool)
+        else:
+            mascara = np.unpackbits(resultado, count=self.n_filas).astype(bool)
+        if rango_fechas is not None and self.fechas is not None:
+            inicio, fin = (np.datetime64(pd.Timestamp(f), 'D') for f in rango_fechas)
+            dias = self.fechas.astype('datetime64[D]')
+            mascara &= (dias >= inicio) & (dias <= fin)
+        return mascara
+
+
+def construir_indice(df, columnas=None):
+    """Construye los bitmaps por valor a partir de los códigos categóricos de cada columna."""
+    columnas = columnas or [c for c in DIMENSIONES_FILTRO if c in df.columns]
+    bitmaps = {}
+    for columna in columnas:
+        categorias = df[columna].astype('category')
+        codigos = categorias.cat.codes.to_numpy()
+        orden = np.argsort(codigos, kind='stable')
+        limites = np.searchsorted(codigos[orden], np.arange(len(categorias.cat.categories) + 1))
+        por_valor = {}
+        for i, valor in enumerate(categorias.cat.categories):
+            filas = orden[limites[i]:limites[i + 1]]
+            if len(filas) == 0:
+                continue
+            mascara = np.zeros(len(df), dtype=bool)
+            mascara[filas] = True
+            por_valor[valor] = np.packbits(mascara)
+        bitmaps[columna] = dict(sorted(por_valor.items(), key=lambda item: str(item[0])))
+    fechas = None
+    if COLUMNA_FECHA_FILTRO in df.columns:
+        fechas = pd.to_datetime(df[COLUMNA_FECHA_FILTRO]).to_numpy()
+    return IndiceFiltros(n_filas=len(df), bitmaps=bitmaps, fechas=fechas)
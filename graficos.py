@@ -0,0 +1,113 @@
+"""
+Gráficos del dashboard como especificaciones Vega-Lite (altair).
+
+El servidor sólo arma la especificación con los datos ya agregados (unas pocas
+filas por campaña, asesor o celda de un mapa de calor) y el navegador dibuja el
+gráfico, en vez de rasterizar un PNG con matplotlib en cada ejecución.
+"""
+import altair as alt
+import pandas as pd
+
+PALETA = ['#A3CEF1', '#FFB347', '#B5EAD7', '#C7CEEA', '#FFD6E0', '#B28DFF', '#FFB3BA', '#3A86FF']
+# Colores fijos por nombre de campaña
+COLOR_POR_CAMPANIA = {
+    'REAL TOTAL': '#FFB347',  # naranja pastel
+    'PRESUNTA': '#FFD6E0',   # rosa pastel
+    'FLUJO': '#A3CEF1',      # azul pastel
+    'REDIRECCIONAMIENTO': '#B5EAD7', # verde pastel
+}
+
+
+def colores_campanias(campanias):
+    """Color por campaña: los fijos y, para campañas adicionales, la paleta en orden."""
+    color_por_campania = dict(COLOR_POR_CAMPANIA)
+    extra_camps = sorted(c for c in set(campanias) if c not in color_por_campania)
+    for i, camp in enumerate(extra_camps):
+        color_por_campania[camp] = PALETA[i % len(PALETA)]
+    return color_por_campania
+
+
+def _sin_datos(texto, titulo):
+    return alt.Chart(pd.DataFrame({'texto': [texto]})).mark_text(size=15).encode(
+        text='texto:N'
+    ).properties(title=titulo, height=320)
+
+
+def torta_por_campania(tabla_campana, columna, titulo, color_por_campania, texto_vacio):
+    """Torta del monto `columna` por campaña, con monto y porcentaje en cada porción."""
+    datos = tabla_campana.loc[tabla_campana[columna] > 0, ['CAMPAÑA', columna]].rename(columns={columna: 'MONTO'})
+    if datos.empty:
+        # Con los filtros globales puede no haber recaudo que graficar
+        return _sin_datos(texto_vacio, titulo)
+    datos['CAMPAÑA'] = datos['CAMPAÑA'].astype(str)
+    datos['PORCENTAJE'] = datos['MONTO'] / datos['MONTO'].sum()
+    datos['ETIQUETA'] = datos['CAMPAÑA'] + ' · S/. ' + datos['MONTO'].map('{:,.2f}'.format)
+    campanias = datos['CAMPAÑA'].tolist()
+
+    base = alt.Chart(datos).encode(
+        theta=alt.Theta('MONTO:Q', stack=True),
+        order=alt.Order('CAMPAÑA:N'),
+        color=alt.Color(
+            'CAMPAÑA:N',
+            scale=alt.Scale(domain=campanias, range=[color_por_campania.get(c, '#C7CEEA') for c in campanias]),
+            legend=alt.Legend(title=None, orient='bottom', labelLimit=300),
+        ),
+        tooltip=[
+            alt.Tooltip('CAMPAÑA:N', title='Campaña'),
+            alt.Tooltip('MONTO:Q', title='Monto (S/.)', format=',.2f'),
+            alt.Tooltip('PORCENTAJE:Q', title='%', format='.1%'),
+        ],
+    )
+    porciones = base.mark_arc(outerRadius=120, stroke='#fff')
+    porcentajes = base.mark_text(radius=80, size=12, fontWeight='bold').encode(
+        text=alt.Text('PORCENTAJE:Q', format='.1%'), color=alt.value('#222')
+    )
+    etiquetas = base.mark_text(radius=150, size=11).encode(text='ETIQUETA:N', color=alt.value('#222'))
+    return (porciones + porcentajes + etiquetas).properties(title=titulo, height=360)
+
+
+def barras_por_asesor(tabla_asesor, columna, titulo, eje_x, color):
+    """Barras horizontales del monto `columna` por asesor (mayor arriba), con el monto en cada barra."""
+    datos = tabla_asesor[['ASESOR', 'NOMBRE_CORTO', columna]].rename(columns={columna: 'MONTO'})
+    datos['ASESOR'] = datos['ASESOR'].astype(str)
+    datos['TEXTO'] = 'S/. ' + datos['MONTO'].map('{:,.2f}'.format)
+    base = alt.Chart(datos).encode(
+        y=alt.Y('NOMBRE_CORTO:N', sort='-x', title='Asesor'),
+        x=alt.X('MONTO:Q', title=eje_x),
+        tooltip=[
+            alt.Tooltip('ASESOR:N', title='Asesor'),
+            alt.Tooltip('MONTO:Q', title='Monto (S/.)', format=',.2f'),
+        ],
+    )
+    barras = base.mark_bar(color=color)
+    montos = base.mark_text(align='left', dx=4, fontWeight='bold', color='black').encode(text='TEXTO:N')
+    return (barras + montos).properties(title=titulo, height=alt.Step(40))
+
+
+def mapa_de_calor(matriz, formato, eje_x, eje_y, esquema='reds'):
+    """
+    Mapa de calor de una tabla filas x columnas (en su orden), con el valor de cada
+    celda escrito con formato(valor); las celdas vacías (NaN) no se dibujan.
+    """
+    datos = matriz.rename_axis(index='FILA', columns='COLUMNA').stack().rename('VALOR').reset_index()
+    datos = datos[datos['VALOR'].notna()]
+    datos['FILA'] = datos['FILA'].astype(str)
+    datos['COLUMNA'] = datos['COLUMNA'].astype(str)
+    datos['VALOR'] = datos['VALOR'].astype('float64')
+    datos['TEXTO'] = datos['VALOR'].map(formato)
+    umbral = datos['VALOR'].max() * 0.6 if not datos.empty else 0
+    base = alt.Chart(datos).encode(
+        x=alt.X('COLUMNA:O', sort=[str(c) for c in matriz.columns], title=eje_x, axis=alt.Axis(labelAngle=0)),
+        y=alt.Y('FILA:O', sort=[str(f) for f in matriz.index], title=eje_y),
+        tooltip=[
+            alt.Tooltip('FILA:N', title=eje_y),
+            alt.Tooltip('COLUMNA:N', title=eje_x),
+            alt.Tooltip('TEXTO:N', title='Valor'),
+        ],
+    )
+    celdas = base.mark_rect().encode(color=alt.Color('VALOR:Q', scale=alt.Scale(scheme=esquema), legend=None))
+    textos = base.mark_text(size=11).encode(
+        text='TEXTO:N',
+        color=alt.condition(alt.datum.VALOR > umbral, alt.value('white'), alt.value('#222')),
+    )
+    return (celdas + textos).properties(height=alt.Step(32))
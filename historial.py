@@ -0,0 +1,183 @@
+"""
+Historial de KPIs en SQLite.
+
+Cada vez que se carga una versión nueva de los archivos se agrega una foto con los
+KPIs generales y los agregados por campaña. Las filas sólo se insertan (nunca se
+actualizan ni se borran), y la vista de tendencias las lee con consultas sobre
+índices, sin guardar los libros anteriores en memoria.
+
+Sólo registrar crea el esquema; las lecturas abren la base en modo de sólo
+lectura y, si no existe o no se puede leer (bloqueada, sin permisos, dañada),
+devuelven un resultado vacío y dejan un aviso en el log en vez de interrumpir
+el dashboard.
+"""
+import logging
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+import periodos
+
+logger = logging.getLogger(__name__)
+
+# Columna de la tabla -> clave en DatosDashboard.kpis
+COLUMNAS_KPI = {
+    'total_cuentas': 'total_cuentas',
+    'deuda_total': 'monto_deuda',
+    'gastos_admin': 'monto_gastos_admin',
+    'porcentaje_barrido': 'porcentaje_barrido',
+    'rec_planillas': 'rec_planillas',
+    'rec_gastos': 'rec_gastos',
+}
+# Columna de la tabla -> columna de DatosDashboard.tabla_campana
+COLUMNAS_CAMPANA = {
+    'total_cuentas': 'TOTAL_CUENTAS',
+    'gestionados': 'GESTIONADOS',
+    'deuda_total': 'DEUDA_TOTAL',
+    'gastos_admin': 'GASTOS_ADMIN',
+    'rec_planillas': 'REC_PLANILLAS',
+    'rec_gastos': 'REC_GASTOS',
+}
+
+_ESQUEMA = f"""
+CREATE TABLE IF NOT EXISTS fotos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    version TEXT NOT NULL UNIQUE,
+    fecha_registro TEXT NOT NULL,
+    fecha_corte TEXT,
+    {', '.join(f'{c} REAL' for c in COLUMNAS_KPI)}
+);
+CREATE INDEX IF NOT EXISTS idx_fotos_fecha_corte ON fotos (fecha_corte);
+CREATE TABLE IF NOT EXISTS fotos_campana (
+    foto_id INTEGER NOT NULL REFERENCES fotos (id),
+    campana TEXT NOT NULL,
+    {', '.join(f'{c} REAL' for c in COLUMNAS_CAMPANA)},
+    PRIMARY KEY (campana, foto_id)
+);
+"""
+
+
+def _conectar(ruta):
+    """Conexión de escritura; crea las tablas si faltan."""
+    conexion = sqlite3.connect(ruta, timeout=10)
+    conexion.executescript(_ESQUEMA)
+    return conexion
+
+
+def _conectar_lectura(ruta):
+    """
+    Conexión de sólo lectura (no crea el archivo ni el esquema). Espera poco a que
+    se libere un bloqueo: la lectura corre en cada ejecución del dashboard.
+    """
+    return sqlite3.connect(f"{Path(ruta).resolve().as_uri()}?mode=ro", uri=True, timeout=2)
+
+
+def _leer_tabla(ruta, consulta, parametros, columnas):
+    """Resultado de una consulta de lectura, o un DataFrame vacío con `columnas` si no se puede leer."""
+    if not os.path.exists(ruta):
+        return pd.DataFrame(columns=columnas)
+    try:
+        with closing(_conectar_lectura(ruta)) as conexion:
+            return pd.read_sql_query(consulta, conexion, params=parametros, parse_dates=['fecha_registro', 'fecha_corte'])
+    except (sqlite3.Error, pd.errors.DatabaseError) as e:
+        logger.warning("No se pudo leer el historial de KPIs en %s: %s", ruta, e)
+        return pd.DataFrame(columns=columnas)
+
+
+def fecha_corte(datos):
+    """
+    Fecha de corte de la foto: la misma de la proyección (datos.fecha_corte, ver
+    pronostico.corte_de_pagos), así los pagos de los primeros días del mes
+    siguiente no mueven la foto de mes. Sin pagos, la última gestión del mes más
+    frecuente entre las gestiones (periodos.mes_dominante).
+    """
+    corte = datos.fecha_corte
+    if corte is None or pd.isna(corte):
+        gestiones = datos.df['ULTIMA FECHA GESTION']
+        mes = periodos.mes_dominante(gestiones)
+        if mes is None:
+            return None
+        corte = gestiones[gestiones.dt.to_period('M') == mes].max()
+    return corte.strftime('%Y-%m-%d')
+
+
+def registrar(ruta, datos):
+    """
+    Agrega la foto de esta versión de los datos. Devuelve False si la versión ya
+    estaba registrada o si no se pudo escribir (el dashboard sigue funcionando).
+    """
+    try:
+        with closing(_conectar(ruta)) as conexion, conexion:
+            cursor = conexion.execute(
+                f"INSERT OR IGNORE INTO fotos (version, fecha_registro, fecha_corte, {', '.join(COLUMNAS_KPI)}) "
+                f"VALUES (?, ?, ?, {', '.join('?' * len(COLUMNAS_KPI))})",
+                [datos.version, datetime.now().isoformat(timespec='seconds'), fecha_corte(datos)]
+                + [float(datos.kpis[clave]) for clave in COLUMNAS_KPI.values()]
+            )
+            if cursor.rowcount == 0:
+                return False
+            campanas = datos.tabla_campana
+            conexion.executemany(
+                f"INSERT INTO fotos_campana (foto_id, campana, {', '.join(COLUMNAS_CAMPANA)}) "
+                f"VALUES (?, ?, {', '.join('?' * len(COLUMNAS_CAMPANA))})",
+                [
+                    [cursor.lastrowid, str(fila['CAMPAÑA'])] + [float(fila[c]) for c in COLUMNAS_CAMPANA.values()]
+                    for _, fila in campanas.iterrows()
+                ]
+            )
+            return True
+    except sqlite3.Error as e:
+        logger.warning("No se pudo registrar la foto de KPIs en %s: %s", ruta, e)
+        return False
+
+
+def leer_foto(ruta, version):
+    """
+    KPIs registrados para una versión de los datos (con las claves de
+    DatosDashboard.kpis), o None si no hay foto. Permite mostrar los KPIs antes
+    de terminar de construir los datos en un arranque en frío.
+    """
+    if not os.path.exists(ruta):
+        return None
+    try:
+        with closing(_conectar_lectura(ruta)) as conexion:
+            fila = conexion.execute(
+                f"SELECT {', '.join(COLUMNAS_KPI)} FROM fotos WHERE version = ?", [version]
+            ).fetchone()
+    except sqlite3.Error as e:
+        logger.warning("No se pudo leer el historial de KPIs en %s: %s", ruta, e)
+        return None
+    if fila is None:
+        return None
+    kpis = dict(zip(COLUMNAS_KPI.values(), fila))
+    kpis['total_cuentas'] = int(kpis['total_cuentas'])
+    return kpis
+
+
+def leer_kpis(ruta, desde=None):
+    """Fotos de KPIs ordenadas por fecha de corte (opcionalmente desde una fecha)."""
+    consulta = f"SELECT id, fecha_registro, fecha_corte, {', '.join(COLUMNAS_KPI)} FROM fotos"
+    parametros = []
+    if desde is not None:
+        consulta += " WHERE fecha_corte >= ?"
+        parametros.append(pd.Timestamp(desde).strftime('%Y-%m-%d'))
+    consulta += " ORDER BY fecha_corte, id"
+    return _leer_tabla(ruta, consulta, parametros, ['id', 'fecha_registro', 'fecha_corte', *COLUMNAS_KPI])
+
+
+def leer_campanas(ruta, campanas=None):
+    """Agregados por campaña de cada foto, junto con su fecha de corte."""
+    consulta = (
+        f"SELECT f.fecha_corte, f.fecha_registro, c.campana, {', '.join('c.' + col for col in COLUMNAS_CAMPANA)} "
+        "FROM fotos_campana c JOIN fotos f ON f.id = c.foto_id"
+    )
+    parametros = []
+    if campanas:
+        consulta += f" WHERE c.campana IN ({', '.join('?' * len(campanas))})"
+        parametros.extend(campanas)
+    consulta += " ORDER BY c.campana, f.fecha_corte, f.id"
+    return _leer_tabla(ruta, consulta, parametros, ['fecha_corte', 'fecha_registro', 'campana', *COLUMNAS_CAMPANA])
@@ -0,0 +1,148 @@
+"""
+Lista de trabajo de cuentas a llamar.
+
+Cada cuenta recibe un puntaje (0 a 100) calculado de forma vectorizada a partir
+de la deuda, la prioridad, la contactabilidad, los días sin gestión y el estado
+de pago. Luego las cuentas de cada asesor u operador se reparten en lotes
+diarios equilibrados con un heap (siempre se asigna al día con menos carga).
+Las cuentas que no entran en el cupo diario quedan con DIA = FUERA_DEL_CUPO y
+las que no tienen asesor u operador, aparte, con DIA = SIN_AGENTE.
+"""
+import heapq
+import zipfile
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+import antiguedad
+
+# Peso de cada factor en el puntaje (suman 1)
+PESOS = {
+    'deuda': 0.30,
+    'prioridad': 0.25,
+    'contactabilidad': 0.20,
+    'dias_sin_gestion': 0.15,
+    'estado_pago': 0.10,
+}
+FACTOR_CONTACTABILIDAD = {
+    'contacto directo': 1.0,
+    'contacto indirecto': 0.6,
+    'por determinar': 0.4,
+    'sin contacto': 0.1,
+}
+FACTOR_CONTACTABILIDAD_VACIA = 0.3
+# A partir de estos días sin gestión el factor ya es máximo
+DIAS_SIN_GESTION_MAXIMO = 30
+# Valores de DIA fuera de los lotes
+FUERA_DEL_CUPO = 0
+SIN_AGENTE = -1
+
+COLUMNAS_EXPORTE = {
+    'DIA': 'Día',
+    'ORDEN': '#',
+    'PUNTAJE': 'Puntaje',
+    'DOCUMENTO': 'Documento',
+    'RAZON SOCIAL': 'Razón Social',
+    'CAMPAÑA': 'Campaña',
+    'PRIORIDAD': 'Prioridad',
+    'CONTACTABILIDAD': 'Contactabilidad',
+    'DEUDA TOTAL': 'Deuda Total',
+    'ULTIMA FECHA GESTION': 'Última Gestión',
+    'NIVEL_RIESGO': 'Nivel de Riesgo',
+}
+
+
+def puntuar(df, fecha_referencia=None):
+    """
+    Puntaje de llamada por cuenta. fecha_referencia (por defecto la última gestión
+    registrada en los datos) se usa para contar los días sin gestión.
+    """
+    if df.empty:
+        return pd.Series(dtype='float64', index=df.index, name='PUNTAJE')
+    deuda = df['DEUDA TOTAL'].fillna(0).rank(pct=True)
+    prioridad = (df['PRIORIDAD_COD'].astype('float64') / 13).clip(0, 1).fillna(0)
+    contactabilidad = (
+        df['CONTACTABILIDAD'].astype(object).str.lower().map(FACTOR_CONTACTABILIDAD)
+        .astype('float64').fillna(FACTOR_CONTACTABILIDAD_VACIA)
+    )
+    dias = antiguedad.dias_sin_gestion(df['ULTIMA FECHA GESTION'], fecha_referencia)
+    dias_sin_gestion = (dias / DIAS_SIN_GESTION_MAXIMO).clip(0, 1).fillna(1)  # sin gestión = máximo
+    sin_planillas = df['REC. PLANILLAS'].fillna(0) <= 0
+    con_gastos = df['REC. GASTOS'].fillna(0) > 0
+    # Pagó gastos pero no planillas: cliente que ya respondió y tiene saldo pendiente
+    estado_pago = np.select([sin_planillas & con_gastos, sin_planillas], [1.0, 0.8], default=0.2)
+
+    puntaje = (
+        PESOS['deuda'] * deuda +
+        PESOS['prioridad'] * prioridad +
+        PESOS['contactabilidad'] * contactabilidad +
+        PESOS['dias_sin_gestion'] * dias_sin_gestion +
+        PESOS['estado_pago'] * estado_pago
+    ) * 100
+    return puntaje.round(2).rename('PUNTAJE')
+
+
+def _repartir(puntajes, n_dias, cuentas_por_dia):
+    """
+    Reparte cuentas ya ordenadas por puntaje entre n_dias: cada cuenta va al día
+    con menor puntaje acumulado que aún tenga cupo. Devuelve el día (1..n) o 0 si
+    no entró en ningún lote.
+    """
+    dias = np.zeros(len(puntajes), dtype=int)
+    heap = [(0.0, 0, dia) for dia in range(1, n_dias + 1)]
+    for i, puntaje in enumerate(puntajes):
+        if not heap:
+            break
+        carga, cuentas, dia = heapq.heappop(heap)
+        dias[i] = dia
+        if cuentas + 1 < cuentas_por_dia:
+            heapq.heappush(heap, (carga + puntaje, cuentas + 1, dia))
+    return dias
+
+
+def asignar_lotes(df, puntajes, por='ASESOR', n_dias=5, cuentas_por_dia=None):
+    """
+    Lista de trabajo con las columnas de df más PUNTAJE, DIA y ORDEN, agrupada por
+    `por` (ASESOR u OPERADOR). Sin cuentas_por_dia todas las cuentas del agente se
+    reparten en los n_dias; con cupo, las que no entran quedan con DIA =
+    FUERA_DEL_CUPO. Las cuentas sin `por` no se reparten: DIA = SIN_AGENTE.
+    """
+    lista = df.assign(PUNTAJE=puntajes).sort_values([por, 'PUNTAJE'], ascending=[True, False])
+    dias = np.full(len(lista), FUERA_DEL_CUPO, dtype=int)
+    dias[lista[por].isna().to_numpy()] = SIN_AGENTE
+    posiciones = lista.groupby(por, observed=True, sort=False).indices
+    valores = lista['PUNTAJE'].to_numpy()
+    for filas in posiciones.values():
+        cupo = cuentas_por_dia or int(np.ceil(len(filas) / n_dias))
+        dias[filas] = _repartir(valores[filas], n_dias, cupo)
+    lista['DIA'] = dias
+    lista = lista.sort_values([por, 'DIA', 'PUNTAJE'], ascending=[True, True, False])
+    lista['ORDEN'] = lista.groupby([por, 'DIA'], observed=True, dropna=False).cumcount() + 1
+    return lista
+
+
+def exportar_zip(lista, por='ASESOR'):
+    """
+    Un Excel por asesor/operador (sólo cuentas con día asignado) dentro de un ZIP,
+    y uno aparte con las cuentas sin asesor/operador para asignarlas a mano.
+    """
+    columnas = [c for c in COLUMNAS_EXPORTE if c in lista.columns]
+
+    def libro(grupo, columnas):
+        salida = BytesIO()
+        grupo[columnas].rename(columns=COLUMNAS_EXPORTE).to_excel(salida, index=False, sheet_name='Lista de trabajo')
+        return salida.getvalue()
+
+    salida = BytesIO()
+    with zipfile.ZipFile(salida, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        for agente, grupo in lista[lista['DIA'] > 0].groupby(por, observed=True):
+            nombre = str(agente).strip().replace(' ', '_').replace('/', '-')
+            zf.writestr(f"lista_trabajo_{nombre}.xlsx", libro(grupo, columnas))
+        sin_agente = lista[lista['DIA'] == SIN_AGENTE]
+        if not sin_agente.empty:
+            zf.writestr(
+                f"lista_trabajo_sin_{por.lower()}.xlsx",
+                libro(sin_agente, [c for c in columnas if c not in ('DIA', 'ORDEN')])
+            )
+    return salida.getvalue()
@@ -0,0 +1,38 @@
+"""
+Periodo de origen de cada cuenta y mes de referencia de los pagos.
+
+Al cargar varios exports WORLDTEL (ver procesamiento.cargar_excels) cada fila
+guarda en PERIODO el archivo (y la hoja) de la que viene. Un mismo DOCUMENTO se
+repite con normalidad entre exports y cada uno tiene su propio mes de pagos, así
+que lo que supone un único export (reglas de calidad, fecha de corte del
+pronóstico) se resuelve por periodo. df.attrs[VERSIONES] guarda la versión del
+archivo de cada periodo, con la que se reutilizan los cálculos por periodo que
+no cambiaron (ver asesores.AcumuladoIncremental).
+"""
+import os
+
+import numpy as np
+
+COLUMNA = 'PERIODO'
+VERSIONES = 'versiones_periodo'
+
+
+def etiqueta(ruta, hoja=0):
+    """Nombre del archivo sin extensión, con la hoja si no es la primera."""
+    nombre = os.path.splitext(os.path.basename(ruta))[0]
+    return nombre if hoja == 0 else f"{nombre} [{hoja}]"
+
+
+def grupos(df, columna=COLUMNA):
+    """Posiciones de las filas de cada periodo (un solo grupo si df no trae la columna)."""
+    if columna not in df.columns:
+        return [np.arange(len(df))]
+    return list(df.groupby(columna, observed=True, sort=False).indices.values())
+
+
+def mes_dominante(fechas):
+    """Mes (Period) más frecuente entre las fechas; ante un empate, el más reciente. None si no hay fechas."""
+    conteo = fechas.dropna().dt.to_period('M').value_counts()
+    if conteo.empty:
+        return None
+    return conteo[conteo == conteo.max()].index.max()
@@ -0,0 +1,642 @@
+"""
+Núcleo de cálculo del dashboard AFP PRIMA - WORLDTEL.
+
+Contiene sólo lógica de pandas (sin Streamlit) para que los datos cargados y
+todas las tablas derivadas se construyan una sola vez por proceso y se
+compartan, en modo de sólo lectura, entre todas las sesiones del dashboard.
+"""
+import importlib.util
+import logging
+import multiprocessing
+import os
+import re
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+import antiguedad
+import asesores
+import busqueda
+import calidad
+import consultas_sql
+import conversion
+import deudores
+import filtros
+import lista_trabajo
+import periodos
+import pronostico
+
+# Con Copy-on-Write cualquier modificación sobre una vista derivada copia los
+# datos en lugar de alterar los DataFrames compartidos (por defecto en pandas 3).
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option('mode.copy_on_write', True)
+
+logger = logging.getLogger(__name__)
+
+# Evita que dos sesiones construyan el mismo conjunto de datos a la vez
+_lock_construccion = threading.Lock()
+# Acumulados por asesor de cada archivo cargado: al cambiar un archivo sólo se
+# vuelve a acumular ese periodo (ver asesores.AcumuladoIncremental)
+_acumulado_asesores = asesores.AcumuladoIncremental()
+
+
+@dataclass(frozen=True)
+class DatosDashboard:
+    """
+    Conjunto de datos compartido por todas las sesiones.
+    Ninguna sección del dashboard debe modificar estos DataFrames: para
+    transformarlos se trabaja siempre sobre un filtro o una copia.
+    """
+    version: str
+    df: pd.DataFrame
+    df_analisis: pd.DataFrame
+    df_pagos: pd.DataFrame
+    tabla_campana: pd.DataFrame
+    tabla_asesor: pd.DataFrame  # acumulados y rankings por ASESOR (ver asesores.ranking)
+    tabla_resumen_asesor: pd.DataFrame
+    resumen_nivel: pd.DataFrame
+    df_solo_gastos: pd.DataFrame
+    df_critico: pd.DataFrame
+    # Una fila por deudor con su exposición total (ver deudores.consolidar)
+    deudores: pd.DataFrame
+    kpis: dict = field(default_factory=dict)
+    # Proyección de recaudo al cierre del mes (ver pronostico.pronosticar); la fecha
+    # de corte se fija con el conjunto completo y los subconjuntos filtrados la heredan
+    proyeccion_recaudo: pd.DataFrame = field(default_factory=pd.DataFrame)
+    fecha_corte: pd.Timestamp = None
+    # Cuentas y deuda por tramo de días sin gestión (ver antiguedad.resumen)
+    resumen_antiguedad: pd.DataFrame = field(default_factory=pd.DataFrame)
+    # Conversión por CONTACTABILIDAD x PRIORIDAD (ver conversion.matriz)
+    tabla_conversion: pd.DataFrame = field(default_factory=pd.DataFrame)
+    rechazos: pd.DataFrame = field(default_factory=pd.DataFrame)
+    # Puntaje de llamada por cuenta (ver lista_trabajo.puntuar), alineado con df_analisis
+    puntajes: pd.Series = field(default_factory=pd.Series)
+    # Bandera de calidad por cuenta (un bit por regla, ver calidad.REGLAS), alineada con df
+    banderas_calidad: pd.Series = field(default_factory=pd.Series)
+    # Cuentas en cuarentena y resumen por regla (sólo en el conjunto completo)
+    cuarentena: pd.DataFrame = field(default_factory=pd.DataFrame)
+    resumen_calidad: pd.DataFrame = field(default_factory=pd.DataFrame)
+    # Bitmaps de la barra de filtros globales (sólo en el conjunto completo)
+    indice: filtros.IndiceFiltros = None
+    # Índice de búsqueda por razón social y documento (sólo en el conjunto completo)
+    indice_busqueda: busqueda.IndiceBusqueda = None
+    # Motor con el que se calcularon las tablas ('pandas' o 'duckdb', ver motor_calculo)
+    motor: str = 'pandas'
+
+
+def version_archivo(*rutas):
+    """Identificador de la versión de los archivos (ruta, tamaño y fecha de modificación)."""
+    partes = []
+    for ruta in rutas:
+        stat = os.stat(ruta)
+        partes.append(f"{os.path.basename(ruta)}:{stat.st_size}:{int(stat.st_mtime)}")
+    return "|".join(partes)
+
+
+@dataclass(frozen=True)
+class Columna:
+    tipo: str  # 'texto', 'dimension', 'documento', 'prioridad', 'monto' o 'fecha'
+    requerida: bool = True
+
+
+# Columnas del export WORLDTEL que usa el dashboard; el resto no se carga
+ESQUEMA = {
+    'CAMPAÑA': Columna('dimension'),
+    'DOCUMENTO': Columna('documento'),
+    'RAZON SOCIAL': Columna('texto'),
+    'CONTACTABILIDAD': Columna('dimension'),
+    'ULTIMA FECHA GESTION': Columna('fecha'),
+    'DEUDA TOTAL': Columna('monto'),
+    'GASTOS ADMIN': Columna('monto'),
+    'FECHA DE PAGO P': Columna('fecha', requerida=False),
+    'REC. PLANILLAS': Columna('monto'),
+    'FECHA DE PAGO G': Columna('fecha', requerida=False),
+    'REC. GASTOS': Columna('monto'),
+    'PRIORIDAD': Columna('prioridad'),
+    'OPERADOR': Columna('dimension'),
+    'ASESOR': Columna('dimension'),
+}
+
+# Sólo las columnas de texto se tipan al leer: montos y fechas pueden traer
+# celdas con texto y se convierten después sin abortar la carga.
+_DTYPES_LECTURA = {
+    nombre: str for nombre, columna in ESQUEMA.items()
+    if columna.tipo in ('texto', 'documento', 'dimension', 'prioridad')
+}
+
+
+def _validar_columnas(df):
+    faltantes = [nombre for nombre, columna in ESQUEMA.items() if columna.requerida and nombre not in df.columns]
+    if faltantes:
+        raise ValueError(
+            "Faltan columnas requeridas en el archivo Excel: " + ", ".join(faltantes) +
+            ". Verifica si fueron renombradas en el export WORLDTEL."
+        )
+
+
+def motor_excel():
+    """Motor de lectura xlsx: calamine (Rust) si está instalado, si no openpyxl."""
+    if importlib.util.find_spec('python_calamine') is not None:
+        return 'calamine'
+    return 'openpyxl'
+
+
+def _leer_excel(ruta, hoja, motor=None):
+    # Con un motor pedido explícitamente no hay reintento con openpyxl
+    forzado = motor is not None
+    motor = motor or motor_excel()
+    # Proyección de columnas al leer: sólo se parsean las declaradas en ESQUEMA
+    # (se toleran espacios sobrantes en los encabezados)
+    opciones = dict(
+        sheet_name=hoja,
+        usecols=lambda nombre: str(nombre).strip() in ESQUEMA,
+        dtype=_DTYPES_LECTURA,
+    )
+    try:
+        df = pd.read_excel(ruta, engine=motor, **opciones)
+    except Exception:
+        if motor == 'openpyxl' or forzado:
+            raise
+        # Versiones antiguas de pandas no reconocen el motor calamine
+        logger.warning("Fallo la lectura con calamine, reintentando con openpyxl: %s", ruta, exc_info=True)
+        motor = 'openpyxl'
+        df = pd.read_excel(ruta, engine=motor, **opciones)
+    df.columns = [str(nombre).strip() for nombre in df.columns]
+    logger.info("Leído %s (hoja %s) con el motor %s", os.path.basename(ruta), hoja, motor)
+    return df
+
+
+def cargar_excel(ruta, hoja=0, motor=None):
+    """Lee un archivo WORLDTEL; motor fuerza 'calamine' u 'openpyxl' (por defecto motor_excel())."""
+    df = _leer_excel(ruta, hoja, motor)
+    _validar_columnas(df)
+    return df
+
+
+def _a_arrow(df):
+    # Arrow IPC es más barato de transferir entre procesos que el pickle de pandas
+    try:
+        import pyarrow as pa
+        sink = pa.BufferOutputStream()
+        tabla = pa.Table.from_pandas(df, preserve_index=False)
+        with pa.ipc.new_stream(sink, tabla.schema) as writer:
+            writer.write_table(tabla)
+        return sink.getvalue().to_pybytes()
+    except Exception:
+        # Sin pyarrow o con columnas de tipos mixtos se devuelve el DataFrame tal cual
+        return df
+
+
+def _desde_arrow(resultado):
+    if isinstance(resultado, pd.DataFrame):
+        return resultado
+    import pyarrow as pa
+    return pa.ipc.open_stream(resultado).read_all().to_pandas()
+
+
+def _leer_hoja(ruta, hoja):
+    """Tarea de un proceso del pool: parsea una hoja de un archivo."""
+    return _a_arrow(_leer_excel(ruta, hoja))
+
+
+def hojas_excel(ruta):
+    with pd.ExcelFile(ruta, engine=motor_excel()) as libro:
+        return libro.sheet_names
+
+
+def cargar_excels(rutas, todas_las_hojas=False, max_workers=None):
+    """
+    Carga varios archivos WORLDTEL (o todas las hojas de cada archivo) y los concatena.
+    Cada archivo u hoja se parsea en un proceso distinto; con una sola tarea se lee
+    directamente en el proceso actual para evitar el costo de arrancar el pool.
+    La columna PERIODO indica de qué archivo u hoja viene cada fila (ver periodos.py).
+    """
+    tareas = []
+    for ruta in rutas:
+        hojas = hojas_excel(ruta) if todas_las_hojas else [0]
+        tareas.extend((ruta, hoja) for hoja in hojas)
+
+    if len(tareas) == 1:
+        return _con_periodo([cargar_excel(*tareas[0])], tareas)
+
+    max_workers = min(len(tareas), max_workers or os.cpu_count() or 1)
+    # 'spawn': hacer fork del servidor de Streamlit, que tiene varios hilos, puede
+    # dejar el proceso hijo bloqueado en un lock que tenía tomado otro hilo
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        futuros = [pool.submit(_leer_hoja, ruta, hoja) for ruta, hoja in tareas]
+        frames = [_desde_arrow(f.result()) for f in futuros]
+    for frame in frames:
+        _validar_columnas(frame)
+    return _con_periodo(frames, tareas)
+
+
+def _con_periodo(frames, tareas):
+    etiquetas = [periodos.etiqueta(ruta, hoja) for ruta, hoja in tareas]
+    df = pd.concat(frames, ignore_index=True)
+    df[periodos.COLUMNA] = pd.Categorical(
+        np.repeat(etiquetas, [len(frame) for frame in frames]), categories=list(dict.fromkeys(etiquetas))
+    )
+    df.attrs[periodos.VERSIONES] = {
+        etiqueta: version_archivo(ruta) for etiqueta, (ruta, _) in zip(etiquetas, tareas)
+    }
+    return df
+
+
+def _rechazados(original, convertido, columna):
+    """Valores no nulos en el archivo que no se pudieron convertir al tipo declarado."""
+    mascara = original.notna() & convertido.isna()
+    return pd.DataFrame({
+        'COLUMNA': columna,
+        'FILA': original.index[mascara],
+        'VALOR': original[mascara].astype(str).to_numpy(),
+    })
+
+
+def _a_monto(serie):
+    convertido = pd.to_numeric(serie, errors='coerce')
+    # Sólo los valores con texto (p. ej. 'S/. 1,234.50') pasan por la limpieza fila a fila
+    pendientes = serie.notna() & convertido.isna()
+    if pendientes.any():
+        convertido[pendientes] = serie[pendientes].map(_clean_monto)
+    return convertido.astype('float64')
+
+
+def _a_fecha(serie):
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie
+    return _parse_fecha_serie(serie)
+
+
+def _a_texto(serie):
+    return serie.astype('str').str.strip().where(serie.notna())
+
+
+def _a_documento(serie):
+    # Texto normalizado: se conservan los ceros de los DNI y los documentos
+    # alfanuméricos (CE, pasaporte); un número leído como float pierde el '.0'
+    texto = _a_texto(serie).str.replace(r'\.0$', '', regex=True)
+    return texto.where(texto != '')
+
+
+def aplicar_esquema(df):
+    """
+    Convierte cada columna de ESQUEMA a su tipo declarado una sola vez al cargar:
+    montos a float64, fechas a datetime64, dimensiones a categorical, DOCUMENTO a
+    texto sin espacios ni '.0' y PRIORIDAD
+    con su código entero en PRIORIDAD_COD. Devuelve (df, rechazos), donde rechazos
+    lista los valores que no pudieron convertirse.
+    """
+    df = df.copy()
+    rechazos = []
+    for nombre, columna in ESQUEMA.items():
+        if nombre not in df.columns:
+            continue
+        original = df[nombre]
+        if columna.tipo == 'monto':
+            df[nombre] = _a_monto(original)
+        elif columna.tipo == 'fecha':
+            df[nombre] = _a_fecha(original)
+        elif columna.tipo == 'documento':
+            df[nombre] = _a_documento(original)
+        elif columna.tipo == 'dimension':
+            df[nombre] = _a_texto(original).astype('category')
+        else:
+            df[nombre] = _a_texto(original)
+        if columna.tipo != 'documento':
+            # Un documento siempre es texto válido; sólo se vacían las celdas en blanco
+            rechazos.append(_rechazados(original, df[nombre], nombre))
+        if columna.tipo == 'prioridad':
+            # '13. 202509' -> 13
+            codigo = df[nombre].str.extract(r'^\s*(\d+)', expand=False)
+            df['PRIORIDAD_COD'] = pd.to_numeric(codigo, errors='coerce').astype('Int64')
+            rechazos.append(_rechazados(df[nombre], df['PRIORIDAD_COD'], 'PRIORIDAD_COD'))
+    rechazos = pd.concat(rechazos, ignore_index=True) if rechazos else pd.DataFrame(columns=['COLUMNA', 'FILA', 'VALOR'])
+    if not rechazos.empty:
+        logger.warning("Valores rechazados al tipar columnas: %s", rechazos['COLUMNA'].value_counts().to_dict())
+    return df, rechazos
+
+
+def agregar_columnas_derivadas(df):
+    df = df.copy()
+    # Ajustar el nombre de la columna 'RAZON SOCIAL'
+    df['razon_social'] = df['RAZON SOCIAL'] if 'RAZON SOCIAL' in df.columns else ''
+    # Clave del deudor para consolidar sus cuentas entre campañas
+    df['DEUDOR'] = deudores.indexar(df)
+    return df
+
+
+def calcular_kpis(df):
+    total_cuentas = len(df)
+    # % Barrido (clientes gestionados)
+    casos_barridos = df['ULTIMA FECHA GESTION'].notna().sum()
+    return {
+        'total_cuentas': total_cuentas,
+        'monto_deuda': df['DEUDA TOTAL'].sum(),
+        'monto_gastos_admin': df['GASTOS ADMIN'].sum(),
+        'rec_planillas': df['REC. PLANILLAS'].sum(),
+        'rec_gastos': df['REC. GASTOS'].sum(),
+        'casos_barridos': casos_barridos,
+        'porcentaje_barrido': (casos_barridos / total_cuentas * 100) if total_cuentas > 0 else 0,
+    }
+
+
+def resumen_por_campana(df):
+    """Tabla por campaña con montos numéricos (el formato se aplica al mostrarla)."""
+    tabla_campana = df.groupby('CAMPAÑA', observed=True).agg(
+        TOTAL_CUENTAS=('CAMPAÑA', 'count'),
+        REC_PLANILLAS=('REC. PLANILLAS', 'sum'),
+        REC_GASTOS=('REC. GASTOS', 'sum'),
+        DEUDA_TOTAL=('DEUDA TOTAL', 'sum'),
+        GASTOS_ADMIN=('GASTOS ADMIN', 'sum'),
+        GESTIONADOS=('ULTIMA FECHA GESTION', 'count')
+    ).reset_index()
+
+    # % PLANILLAS y % GASTOS ADMIN
+    tabla_campana['% PLANILLAS'] = np.where(
+        tabla_campana['DEUDA_TOTAL'] > 0,
+        tabla_campana['REC_PLANILLAS'] / tabla_campana['DEUDA_TOTAL'] * 100,
+        0
+    )
+    tabla_campana['% GASTOS ADMIN'] = np.where(
+        tabla_campana['GASTOS_ADMIN'] > 0,
+        tabla_campana['REC_GASTOS'] / tabla_campana['GASTOS_ADMIN'] * 100,
+        0
+    )
+    # Añadir la columna % BARRIDO
+    tabla_campana['% BARRIDO'] = np.where(
+        tabla_campana['TOTAL_CUENTAS'] > 0,
+        tabla_campana['GESTIONADOS'] / tabla_campana['TOTAL_CUENTAS'] * 100,
+        0
+    )
+    return tabla_campana
+
+
+def fila_total_campana(tabla_campana, kpis):
+    """
+    Fila TOTAL de la tabla por campaña: cuentas y gestionados de la tabla, montos
+    de los KPIs (incluyen las cuentas sin campaña) y porcentajes sobre esos totales.
+    """
+    total_cuentas = tabla_campana['TOTAL_CUENTAS'].sum()
+    gestionados = tabla_campana['GESTIONADOS'].sum()
+    return {
+        'CAMPAÑA': 'TOTAL',
+        'TOTAL_CUENTAS': total_cuentas,
+        'REC_PLANILLAS': kpis['rec_planillas'],
+        'REC_GASTOS': kpis['rec_gastos'],
+        'DEUDA_TOTAL': kpis['monto_deuda'],
+        'GASTOS_ADMIN': kpis['monto_gastos_admin'],
+        'GESTIONADOS': gestionados,
+        '% PLANILLAS': kpis['rec_planillas'] / kpis['monto_deuda'] * 100 if kpis['monto_deuda'] > 0 else 0,
+        '% GASTOS ADMIN': kpis['rec_gastos'] / kpis['monto_gastos_admin'] * 100 if kpis['monto_gastos_admin'] > 0 else 0,
+        '% BARRIDO': gestionados / total_cuentas * 100 if total_cuentas > 0 else 0,
+    }
+
+
+def resumen_por_asesor(df):
+    tabla_resumen_asesor = df.groupby('ASESOR', observed=True).agg(
+        QdeCuentas=('ASESOR', 'count'),
+        Gestionados=('ULTIMA FECHA GESTION', 'count'),
+        DeudaTotal=('DEUDA TOTAL', 'sum'),
+        RecPlanillas=('REC. PLANILLAS', 'sum'),
+        GastosAdmin=('GASTOS ADMIN', 'sum'),
+        RecGastos=('REC. GASTOS', 'sum')
+    ).reset_index()
+    return tabla_resumen_asesor
+
+
+def resumen_por_prioridad(df):
+    return df.groupby('PRIORIDAD').agg(
+        QdeCuentas=('PRIORIDAD', 'count'),
+        Gestionados=('ULTIMA FECHA GESTION', 'count'),
+        DeudaTotal=('DEUDA TOTAL', 'sum'),
+        RecPlanillas=('REC. PLANILLAS', 'sum'),
+        GastosAdmin=('GASTOS ADMIN', 'sum'),
+        RecGastos=('REC. GASTOS', 'sum')
+    ).reset_index()
+
+
+def filtrar_solo_gastos(df):
+    # Filtrar casos con SOLO REC. GASTOS (tiene REC. GASTOS pero NO tiene REC. PLANILLAS)
+    return df[
+        ((df['REC. GASTOS'].notna()) & (df['REC. GASTOS'] > 0)) &  # Tiene REC. GASTOS
+        ((df['REC. PLANILLAS'].isna()) | (df['REC. PLANILLAS'] == 0))  # NO tiene REC. PLANILLAS
+    ].copy()
+
+
+def top_clientes(df, campana, n):
+    """Las n cuentas de mayor DEUDA TOTAL de una campaña."""
+    return df[df['CAMPAÑA'] == campana].sort_values('DEUDA TOTAL', ascending=False, kind='stable').head(n)
+
+
+def pagos_por_dia(df_pagos, tipo_pago):
+    """Monto pagado por día para un tipo de pago (fecha_dia como datetime.date)."""
+    pagos = df_pagos[(df_pagos['tipo_pago'] == tipo_pago) & df_pagos['fecha'].notna()]
+    return pagos.groupby(pagos['fecha'].dt.date.rename('fecha_dia'))['monto'].sum().reset_index()
+
+
+def clasificar_nivel_riesgo(df):
+    """Devuelve una copia de df con la columna NIVEL_RIESGO (+ALTA, ALTA, MEDIA, BAJA)."""
+    df_analisis = df.copy()
+    # CRÍTICO: PRIORIDAD inicia con "13", CONTACTABILIDAD = "Contacto Directo" y REC. PLANILLAS está vacío o cero
+    prioridad = df_analisis['PRIORIDAD_COD']
+    cond_critico = (
+        (prioridad == 13).fillna(False) &
+        (df_analisis['CONTACTABILIDAD'].str.lower() == 'contacto directo').fillna(False) &
+        ((df_analisis['REC. PLANILLAS'].isna()) | (df_analisis['REC. PLANILLAS'] == 0))
+    )
+    df_analisis['NIVEL_RIESGO'] = 'BAJA'
+    df_analisis.loc[cond_critico, 'NIVEL_RIESGO'] = '+ALTA'
+    # ALTO: PRIORIDAD inicia con "13" pero NO es crítico
+    cond_alto = (
+        (prioridad == 13).fillna(False) & (~cond_critico)
+    )
+    df_analisis.loc[cond_alto, 'NIVEL_RIESGO'] = 'ALTA'
+    # MEDIO: PRIORIDAD 05 a 12
+    cond_medio = prioridad.between(5, 12).fillna(False)
+    df_analisis.loc[cond_medio, 'NIVEL_RIESGO'] = 'MEDIA'
+    # BAJO: el resto (ya está por defecto)
+    return df_analisis
+
+
+def resumen_por_nivel(df_analisis):
+    # Métricas por nivel
+    resumen_nivel = df_analisis.groupby('NIVEL_RIESGO').agg(
+        CUENTAS=('NIVEL_RIESGO', 'count'),
+        DEUDA=('DEUDA TOTAL', 'sum'),
+        RECUPERADO=('REC. PLANILLAS', 'sum')
+    ).reset_index()
+    total_cuentas = resumen_nivel['CUENTAS'].sum()
+    resumen_nivel['% DEL TOTAL'] = resumen_nivel['CUENTAS'] / total_cuentas * 100
+
+    # Ordenar niveles
+    orden_niveles = ['+ALTA', 'ALTA', 'MEDIA', 'BAJA']
+    resumen_nivel['ORDEN'] = resumen_nivel['NIVEL_RIESGO'].apply(lambda x: orden_niveles.index(x) if x in orden_niveles else 99)
+    return resumen_nivel.sort_values('ORDEN')
+
+
+# Helpers para parseo y limpieza
+def _parse_fecha_serie(s):
+    # Si vienen como números (serial Excel), convertir desde 1899-12-30
+    try:
+        if pd.api.types.is_numeric_dtype(s):
+            origin = pd.Timestamp('1899-12-30')
+            return s.apply(lambda v: origin + pd.to_timedelta(int(v), unit='D') if not pd.isna(v) else pd.NaT)
+    except Exception:
+        pass
+    return pd.to_datetime(s, dayfirst=True, errors='coerce')
+
+
+def _clean_monto(val):
+    try:
+        if pd.isna(val):
+            return np.nan
+        s = str(val)
+        # eliminar prefijos tipo 'S/.' y cualquier caracter no numérico salvo ,.-
+        s = re.sub(r"S\s*[/.]*\s*", "", s)
+        s = re.sub(r"[^0-9,\.-]", "", s)
+        if s == '':
+            return np.nan
+        # si tiene coma y punto, asumimos coma miles y punto decimal -> eliminar comas
+        if s.count(',') > 0 and s.count('.') > 0:
+            s = s.replace(',', '')
+        # si tiene sólo comas, convertir coma decimal a punto
+        elif s.count(',') > 0 and s.count('.') == 0:
+            s = s.replace(',', '.')
+        s = s.replace(' ', '')
+        return float(s)
+    except Exception:
+        return np.nan
+
+
+def construir_df_pagos(df):
+    """
+    Historial de pagos (planillas y gastos) en formato largo: fecha, monto, campana,
+    razon_social, tipo_pago, fila (posición de la cuenta en df) y periodo si df trae PERIODO.
+    """
+    df_pagos = pd.DataFrame()
+    if df.empty:
+        return df_pagos
+
+    parts = []
+    if 'FECHA DE PAGO P' in df.columns and 'REC. PLANILLAS' in df.columns:
+        df_planillas = df[['FECHA DE PAGO P', 'REC. PLANILLAS', 'CAMPAÑA', 'RAZON SOCIAL']].rename(columns={
+            'FECHA DE PAGO P': 'fecha',
+            'REC. PLANILLAS': 'monto',
+            'CAMPAÑA': 'campana',
+            'RAZON SOCIAL': 'razon_social'
+        }).copy()
+        df_planillas['tipo_pago'] = 'PLANILLAS'
+        df_planillas['fila'] = np.arange(len(df))  # posición de la cuenta en df
+        parts.append(df_planillas)
+
+    if 'FECHA DE PAGO G' in df.columns and 'REC. GASTOS' in df.columns:
+        df_gastos = df[['FECHA DE PAGO G', 'REC. GASTOS', 'CAMPAÑA', 'RAZON SOCIAL']].rename(columns={
+            'FECHA DE PAGO G': 'fecha',
+            'REC. GASTOS': 'monto',
+            'CAMPAÑA': 'campana',
+            'RAZON SOCIAL': 'razon_social'
+        }).copy()
+        df_gastos['tipo_pago'] = 'GASTOS'
+        df_gastos['fila'] = np.arange(len(df))
+        parts.append(df_gastos)
+
+    if parts:
+        df_pagos = pd.concat(parts, ignore_index=True)
+        if periodos.COLUMNA in df.columns:
+            # Export de origen de cada pago (ver pronostico.corte_de_pagos)
+            df_pagos['periodo'] = df[periodos.COLUMNA].iloc[df_pagos['fila'].to_numpy()].to_numpy()
+
+    # Limpiar y normalizar columnas
+    if not df_pagos.empty:
+        # fecha y monto ya vienen tipados desde aplicar_esquema
+        df_pagos['razon_social'] = df_pagos['razon_social'].fillna('Desconocido').astype(str)
+        df_pagos['campana'] = df_pagos['campana'].astype(object).fillna('Sin campaña').astype(str)
+        # Filtrar sólo pagos con monto válido o fecha conocida
+        df_pagos = df_pagos.loc[(df_pagos['monto'].notna() & (df_pagos['monto'] > 0)) | df_pagos['fecha'].notna()]
+    return df_pagos
+
+
+def motor_calculo(motor='pandas'):
+    """
+    Módulo que resuelve los resúmenes, la clasificación de riesgo, los Clientes TOP
+    y los pagos por día: este mismo (pandas) o consultas_sql (DuckDB). Ambos
+    exponen las mismas funciones; si DuckDB no está instalado se usa pandas.
+    """
+    if motor == 'duckdb':
+        if consultas_sql.disponible():
+            return consultas_sql
+        logger.warning("duckdb no está instalado; se usa pandas")
+    return sys.modules[__name__]
+
+
+def construir_datos(df, version='', motor='pandas'):
+    """Calcula una sola vez todos los DataFrames derivados que usa el dashboard."""
+    with _lock_construccion:
+        versiones_periodo = df.attrs.get(periodos.VERSIONES, {})
+        df, rechazos = aplicar_esquema(df)
+        banderas_calidad = calidad.evaluar(df)
+        df = agregar_columnas_derivadas(df)
+        df_analisis = motor_calculo(motor).clasificar_nivel_riesgo(df)
+        df_analisis['TRAMO_GESTION'] = antiguedad.tramos(df_analisis['ULTIMA FECHA GESTION'])
+        df_pagos = construir_df_pagos(df)
+        return _derivar(
+            version, df, df_analisis, df_pagos,
+            motor=motor,
+            fecha_corte=pronostico.corte_de_pagos(df_pagos),
+            acumulado_asesor=_acumulado_asesores.actualizar(df, versiones_periodo),
+            rechazos=rechazos,
+            puntajes=lista_trabajo.puntuar(df_analisis),
+            banderas_calidad=banderas_calidad,
+            cuarentena=calidad.cuarentena(df, banderas_calidad),
+            resumen_calidad=calidad.resumen(df, banderas_calidad),
+            indice=filtros.construir_indice(df_analisis),
+            indice_busqueda=busqueda.construir_indice(df_analisis),
+        )
+
+
+def _derivar(version, df, df_analisis, df_pagos, motor='pandas', fecha_corte=None, acumulado_asesor=None, **extra):
+    calculo = motor_calculo(motor)
+    if acumulado_asesor is None:
+        acumulado_asesor = asesores.acumular(df)
+    return DatosDashboard(
+        version=version,
+        df=df,
+        df_analisis=df_analisis,
+        df_pagos=df_pagos,
+        tabla_campana=calculo.resumen_por_campana(df),
+        tabla_asesor=asesores.ranking(acumulado_asesor),
+        tabla_resumen_asesor=calculo.resumen_por_asesor(df),
+        resumen_nivel=calculo.resumen_por_nivel(df_analisis),
+        resumen_antiguedad=antiguedad.resumen(df_analisis),
+        tabla_conversion=conversion.matriz(df),
+        df_solo_gastos=filtrar_solo_gastos(df),
+        df_critico=df_analisis[df_analisis['NIVEL_RIESGO'] == '+ALTA'],
+        deudores=deudores.consolidar(df_analisis),
+        kpis=calcular_kpis(df),
+        proyeccion_recaudo=pronostico.pronosticar(df_pagos, fecha_corte),
+        fecha_corte=fecha_corte,
+        motor=motor,
+        **extra
+    )
+
+
+def filtrar_datos(datos, mascara):
+    """
+    Subconjunto de los datos compartidos para una máscara de la barra de filtros
+    (ver filtros.IndiceFiltros.mascara), con todas las tablas recalculadas.
+    """
+    df_pagos = datos.df_pagos
+    if not df_pagos.empty:
+        df_pagos = df_pagos[mascara[df_pagos['fila'].to_numpy()]]
+    return _derivar(
+        datos.version, datos.df[mascara], datos.df_analisis[mascara], df_pagos,
+        motor=datos.motor,
+        fecha_corte=datos.fecha_corte,
+        rechazos=datos.rechazos,
+        puntajes=datos.puntajes[mascara],
+        banderas_calidad=datos.banderas_calidad[mascara],
+    )
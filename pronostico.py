@@ -0,0 +1,118 @@
+"""
+Proyección del recaudo al cierre del mes por campaña y tipo de pago.
+
+Si hay meses anteriores en el historial se usa su perfil por día del mes (qué
+fracción del recaudo mensual ya se había cobrado a la misma fecha); si no, se
+extrapola el ritmo diario del mes en curso. El intervalo se obtiene de la
+variabilidad diaria del mes en curso.
+
+El mes proyectado es el mes más frecuente de los pagos de cada export (ver
+periodos.py), no el del último pago: un export de noviembre trae algunos pagos
+fechados a inicios de diciembre que no deben convertirlo en una proyección de
+diciembre.
+"""
+import numpy as np
+import pandas as pd
+
+import periodos
+
+CLAVES = ['campana', 'tipo_pago']
+# Por debajo de esta fracción el perfil histórico es demasiado inestable para escalar
+FRACCION_MINIMA_PERFIL = 0.1
+# Meses anteriores con pagos en menos días no se consideran representativos
+MIN_DIAS_CON_PAGO_PERFIL = 5
+Z_INTERVALO = 1.96
+
+COLUMNAS = CLAVES + ['ACUMULADO', 'PROYECCION', 'LIMITE_INF', 'LIMITE_SUP', 'METODO', 'FECHA_CORTE', 'FIN_MES']
+
+
+def _pagos_validos(df_pagos):
+    return df_pagos[df_pagos['fecha'].notna() & (df_pagos['monto'] > 0)] if not df_pagos.empty else df_pagos
+
+
+def corte_de_pagos(df_pagos):
+    """
+    Último pago del mes de referencia: el mes más frecuente entre los pagos de cada
+    periodo (el más reciente si hay varios periodos). None si no hay pagos con fecha.
+    """
+    pagos = _pagos_validos(df_pagos)
+    if pagos.empty:
+        return None
+    meses = [periodos.mes_dominante(pagos['fecha'].iloc[filas]) for filas in periodos.grupos(pagos, 'periodo')]
+    mes = max(meses)
+    return pagos.loc[pagos['fecha'].dt.to_period('M') == mes, 'fecha'].max().normalize()
+
+
+def pronosticar(df_pagos, fecha_corte=None):
+    """
+    Proyecta el recaudo de fin de mes a partir de df_pagos (ver procesamiento.construir_df_pagos).
+    Incluye una fila campana='TOTAL' por tipo de pago. fecha_corte por defecto es la de
+    corte_de_pagos(df_pagos); los pagos posteriores al corte o de otro mes no entran en ACUMULADO.
+    """
+    pagos = _pagos_validos(df_pagos)
+    if pagos.empty:
+        return pd.DataFrame(columns=COLUMNAS)
+
+    corte = pd.Timestamp(fecha_corte if fecha_corte is not None else corte_de_pagos(df_pagos)).normalize()
+    mes = corte.to_period('M')
+    fin_mes = mes.end_time.normalize()
+    dia_corte = corte.day
+    dias_restantes = mes.days_in_month - dia_corte
+
+    pagos = pd.concat([pagos, pagos.assign(campana='TOTAL')], ignore_index=True)
+    pagos = pagos.assign(mes=pagos['fecha'].dt.to_period('M'), dia=pagos['fecha'].dt.day)
+    actual = pagos[(pagos['mes'] == mes) & (pagos['fecha'] <= corte)]
+    previos = pagos[pagos['mes'] < mes]
+    dias_con_pago = previos.groupby(CLAVES + ['mes'])['dia'].transform('nunique')
+    previos = previos[dias_con_pago >= MIN_DIAS_CON_PAGO_PERFIL]
+
+    # Ritmo diario del mes en curso (los días sin pagos cuentan como cero)
+    sin_claves = pd.MultiIndex.from_arrays([[], []], names=CLAVES)
+    diario = (
+        actual.groupby(CLAVES + ['dia'])['monto'].sum()
+        .unstack('dia', fill_value=0)
+        .reindex(columns=range(1, dia_corte + 1), fill_value=0)
+    ) if not actual.empty else pd.DataFrame(index=sin_claves, columns=range(1, dia_corte + 1), dtype='float64')
+    acumulado = diario.sum(axis=1)
+    media = diario.mean(axis=1)
+    desviacion = diario.std(axis=1, ddof=1).fillna(0) if dia_corte > 1 else media * 0
+
+    # Perfil de meses anteriores: fracción del total mensual cobrada hasta el mismo día
+    if not previos.empty:
+        dia_equivalente = np.minimum(dia_corte, previos['mes'].dt.days_in_month)
+        hasta_dia = previos[previos['dia'] <= dia_equivalente].groupby(CLAVES)['monto'].sum()
+        fraccion = hasta_dia.reindex(previos.groupby(CLAVES).size().index, fill_value=0) / previos.groupby(CLAVES)['monto'].sum()
+    else:
+        fraccion = pd.Series(index=sin_claves, dtype='float64')
+
+    resultado = pd.DataFrame({'ACUMULADO': acumulado}).join(fraccion.rename('FRACCION'), how='outer')
+    resultado['ACUMULADO'] = resultado['ACUMULADO'].fillna(0)
+    media = media.reindex(resultado.index, fill_value=0)
+    desviacion = desviacion.reindex(resultado.index, fill_value=0)
+
+    usa_perfil = resultado['FRACCION'].fillna(0) >= FRACCION_MINIMA_PERFIL
+    resultado['PROYECCION'] = np.where(
+        usa_perfil,
+        resultado['ACUMULADO'] / resultado['FRACCION'].where(usa_perfil, 1),
+        resultado['ACUMULADO'] + media * dias_restantes
+    )
+    margen = Z_INTERVALO * desviacion * np.sqrt(dias_restantes)
+    resultado['LIMITE_INF'] = np.maximum(resultado['ACUMULADO'], resultado['PROYECCION'] - margen)
+    resultado['LIMITE_SUP'] = resultado['PROYECCION'] + margen
+    resultado['METODO'] = np.where(usa_perfil, 'perfil meses anteriores', 'ritmo diario')
+    resultado['FECHA_CORTE'] = corte
+    resultado['FIN_MES'] = fin_mes
+    return resultado.reset_index()[COLUMNAS]
+
+
+def serie_proyeccion(fila, acumulado_al_corte):
+    """
+    Trayectoria diaria entre la fecha de corte y el fin de mes para graficar sobre
+    una curva acumulada que vale acumulado_al_corte en la fecha de corte.
+    """
+    fechas = pd.date_range(fila['FECHA_CORTE'], fila['FIN_MES'], freq='D')
+    avance = np.linspace(0, 1, len(fechas)) if len(fechas) > 1 else np.ones(1)
+    return pd.DataFrame({
+        nombre.lower(): acumulado_al_corte + (fila[nombre] - fila['ACUMULADO']) * avance
+        for nombre in ['PROYECCION', 'LIMITE_INF', 'LIMITE_SUP']
+    }, index=fechas.date)
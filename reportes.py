@@ -0,0 +1,384 @@
+"""
+Exportes a Excel del dashboard.
+
+Cada layout se escribe sobre una hoja (hoja_*), de modo que sirve tanto para la
+descarga de cada sección (excel_*) como para el libro por asesor que arma
+zip_por_asesor, que genera los libros en paralelo en un pool de procesos.
+"""
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+from io import BytesIO
+
+import pandas as pd
+
+# Versión de los layouts: subirla al cambiar columnas, formatos o hojas de
+# cualquier exporte, para que exportes.py no sirva libros viejos ya en disco
+VERSION_FORMATO = 1
+
+# Clientes TOP por asesor en el libro de reportes por asesor
+TOP_POR_ASESOR = 20
+
+# Columna del DataFrame -> encabezado de cada tabla exportada
+COLUMNAS_TOP = {
+    'DOCUMENTO': 'Documento',
+    'RAZON SOCIAL': 'Razón Social',
+    'ASESOR': 'Asesor',
+    'DEUDA TOTAL': 'Deuda Total',
+    'REC. PLANILLAS': 'Recuperado',
+    'CONTACTABILIDAD': 'Contactabilidad',
+    'ULTIMA FECHA GESTION': 'Última Gestión',
+    'CAMPAÑA': 'Campaña',
+}
+COLUMNAS_SOLO_GASTOS = {
+    'DOCUMENTO': 'Documento',
+    'RAZON SOCIAL': 'Razón Social',
+    'ULTIMA FECHA GESTION': 'Última Fecha de Gestión',
+    'ASESOR': 'Asesor',
+    'DEUDA TOTAL': 'Deuda Total',
+    'CONTACTABILIDAD': 'Contactabilidad',
+}
+COLUMNAS_CRITICO = {
+    'DOCUMENTO': 'Documento',
+    'RAZON SOCIAL': 'Razón Social',
+    'DEUDA TOTAL': 'Deuda Total',
+    'OPERADOR': 'Operador',
+    'CAMPAÑA': 'Campaña',
+}
+
+
+# openpyxl se importa recién al escribir un libro: el dashboard importa este módulo
+# al arrancar para las tablas y los libros sólo se arman al pedir una descarga.
+@lru_cache(maxsize=None)
+def _borde_fino():
+    from openpyxl.styles import Border, Side
+    return Border(
+        left=Side(style='thin'),
+        right=Side(style='thin'),
+        top=Side(style='thin'),
+        bottom=Side(style='thin')
+    )
+
+
+def _monto(valor):
+    return float(str(valor).replace('S/. ', '').replace(',', ''))
+
+
+def _fecha(valor):
+    return valor.strftime('%d/%m/%Y') if pd.notnull(valor) else "Sin gestión"
+
+
+# ---------------------------------------------------------------- tablas
+
+def tabla_clientes_top(df_top):
+    """Tabla de Clientes TOP con montos y fechas ya formateados para mostrar/exportar."""
+    tabla = df_top[[c for c in COLUMNAS_TOP if c in df_top.columns]].rename(columns=COLUMNAS_TOP)
+    tabla['Deuda Total'] = tabla['Deuda Total'].apply(lambda x: f"S/. {x:,.2f}" if pd.notnull(x) else "N/A")
+    tabla['Recuperado'] = tabla['Recuperado'].apply(lambda x: f"S/. {x:,.2f}" if pd.notnull(x) and x > 0 else "S/. 0.00")
+    tabla['Última Gestión'] = tabla['Última Gestión'].apply(_fecha)
+    return tabla
+
+
+def tabla_solo_gastos(df_solo_gastos):
+    tabla = df_solo_gastos[list(COLUMNAS_SOLO_GASTOS)].rename(columns=COLUMNAS_SOLO_GASTOS)
+    tabla['Deuda Total'] = tabla['Deuda Total'].apply(lambda x: f"S/. {x:,.2f}" if pd.notnull(x) else "N/A")
+    tabla['Última Fecha de Gestión'] = tabla['Última Fecha de Gestión'].apply(_fecha)
+    return tabla
+
+
+def tabla_critico(df_critico):
+    return df_critico[list(COLUMNAS_CRITICO)].rename(columns=COLUMNAS_CRITICO)
+
+
+# ---------------------------------------------------------------- layouts
+
+def _titulo(ws, texto, color, rango):
+    from openpyxl.styles import Font, PatternFill, Alignment
+    ws['A1'] = texto
+    ws['A1'].font = Font(bold=True, size=14, color="FFFFFF")
+    ws['A1'].fill = PatternFill(start_color=color, end_color=color, fill_type="solid")
+    ws.merge_cells(rango.format(1))
+    ws['A1'].alignment = Alignment(horizontal="center", vertical="center")
+    ws.row_dimensions[1].height = 25
+
+    # Fecha de generación
+    ws['A2'] = f"Fecha de generación: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}"
+    ws['A2'].font = Font(italic=True, size=10)
+    ws.merge_cells(rango.format(2))
+    ws.row_dimensions[2].height = 18
+
+
+def _encabezados(ws, headers, fila):
+    from openpyxl.styles import Font, PatternFill, Alignment
+    for col_idx, header in enumerate(headers, 1):
+        cell = ws.cell(row=fila, column=col_idx)
+        cell.value = header
+        cell.font = Font(bold=True, color="FFFFFF", size=11)
+        cell.fill = PatternFill(start_color="23395D", end_color="23395D", fill_type="solid")
+        cell.alignment = Alignment(horizontal="center", vertical="center")
+        cell.border = _borde_fino()
+    ws.row_dimensions[fila].height = 20
+
+
+def _anchos(ws, anchos):
+    for letra, ancho in zip('ABCDEFGH', anchos):
+        ws.column_dimensions[letra].width = ancho
+
+
+def hoja_clientes_top(ws, df_export, campania):
+    from openpyxl.styles import Font, PatternFill, Alignment
+    ws.title = "Clientes TOP"
+    _titulo(ws, f"CLIENTES TOP - MAYORES MONTOS DE DEUDA - {campania.upper()}", "D4AF37", 'A{0}:G{0}')
+    headers = ['Documento', 'Razón Social', 'Asesor', 'Deuda Total', 'Recuperado', 'Contactabilidad', 'Última Gestión', 'Campaña']
+    _encabezados(ws, headers, 4)
+
+    # Datos
+    for row_idx, (_, row) in enumerate(df_export.iterrows(), 5):
+        ws.cell(row=row_idx, column=1).value = row['Documento']
+        ws.cell(row=row_idx, column=2).value = row['Razón Social']
+        ws.cell(row=row_idx, column=3).value = row['Asesor']
+        ws.cell(row=row_idx, column=4).value = _monto(row['Deuda Total'])
+        ws.cell(row=row_idx, column=5).value = _monto(row['Recuperado'])
+        ws.cell(row=row_idx, column=6).value = row['Contactabilidad']
+        ws.cell(row=row_idx, column=7).value = row['Última Gestión']
+        ws.cell(row=row_idx, column=8).value = row.get('Campaña', campania)
+
+        for col_idx in range(1, 9):
+            cell = ws.cell(row=row_idx, column=col_idx)
+            cell.border = _borde_fino()
+            if col_idx in [4, 5]:  # Alinear números a la derecha
+                cell.alignment = Alignment(horizontal="right")
+                cell.number_format = '#,##0.00'
+            else:
+                cell.alignment = Alignment(horizontal="left")
+
+    _anchos(ws, [15, 45, 20, 15, 15, 18, 15, 18])
+
+    # Fila de totales
+    total_row = len(df_export) + 5
+    ws.cell(row=total_row, column=1).value = "TOTAL"
+    ws.cell(row=total_row, column=2).value = len(df_export)
+    ws.cell(row=total_row, column=4).value = sum(_monto(val) for val in df_export['Deuda Total'])
+    ws.cell(row=total_row, column=4).number_format = '#,##0.00'
+    ws.cell(row=total_row, column=5).value = sum(_monto(val) for val in df_export['Recuperado'])
+    ws.cell(row=total_row, column=5).number_format = '#,##0.00'
+    for col_idx in range(1, 9):
+        cell = ws.cell(row=total_row, column=col_idx)
+        cell.fill = PatternFill(start_color="FFE082", end_color="FFE082", fill_type="solid")
+        cell.border = _borde_fino()
+        cell.font = Font(bold=True)
+
+
+def hoja_solo_gastos(ws, df_export):
+    from openpyxl.styles import Font, PatternFill, Alignment
+    ws.title = "Solo REC. Gastos"
+    _titulo(ws, "CASOS CON SOLO REC. GASTOS (SIN REC. PLANILLAS) - URGENCIA", "D32F2F", 'A{0}:F{0}')
+
+    # Leyenda
+    ws['A3'] = "⚡ URGENCIA: Estos casos necesitan REC. PLANILLAS primero. Los gastos no se considerarán sin planillas."
+    ws['A3'].font = Font(italic=True, size=10, color="C62828")
+    ws.merge_cells('A3:F3')
+    ws.row_dimensions[3].height = 18
+
+    headers = ['Documento', 'Razón Social', 'Última Fecha de Gestión', 'Asesor', 'Deuda Total', 'Contactabilidad']
+    _encabezados(ws, headers, 5)
+
+    # Datos
+    for row_idx, (_, row) in enumerate(df_export.iterrows(), 6):
+        ws.cell(row=row_idx, column=1).value = row['Documento']
+        ws.cell(row=row_idx, column=2).value = row['Razón Social']
+        ws.cell(row=row_idx, column=3).value = row['Última Fecha de Gestión']
+        ws.cell(row=row_idx, column=4).value = row['Asesor']
+        ws.cell(row=row_idx, column=5).value = _monto(row['Deuda Total'])
+        ws.cell(row=row_idx, column=6).value = row['Contactabilidad']
+
+        for col_idx in range(1, 7):
+            cell = ws.cell(row=row_idx, column=col_idx)
+            cell.border = _borde_fino()
+            if col_idx == 5:  # Alinear números a la derecha
+                cell.alignment = Alignment(horizontal="right")
+                cell.number_format = '#,##0.00'
+            else:
+                cell.alignment = Alignment(horizontal="left")
+
+    _anchos(ws, [15, 45, 18, 15, 15, 18])
+
+    # Fila de totales
+    total_row = len(df_export) + 6
+    ws.cell(row=total_row, column=1).value = "TOTAL"
+    ws.cell(row=total_row, column=2).value = len(df_export)
+    ws.cell(row=total_row, column=5).value = sum(_monto(val) for val in df_export['Deuda Total'])
+    ws.cell(row=total_row, column=5).number_format = '#,##0.00'
+    for col_idx in range(1, 7):
+        cell = ws.cell(row=total_row, column=col_idx)
+        cell.fill = PatternFill(start_color="FFB3BA", end_color="FFB3BA", fill_type="solid")
+        cell.border = _borde_fino()
+        cell.font = Font(bold=True)
+
+
+def hoja_critico(ws, df_export):
+    from openpyxl.styles import Font, PatternFill, Alignment
+    ws.title = "Casos Críticos"
+    _titulo(ws, "CASOS CRÍTICOS - PRIORIDAD 13 + CONTACTO DIRECTO + SIN PAGO", "C62828", 'A{0}:E{0}')
+    headers = ['Documento', 'Razón Social', 'Deuda Total', 'Operador', 'Campaña']
+    _encabezados(ws, headers, 4)
+
+    # Datos
+    for row_idx, (_, row) in enumerate(df_export.iterrows(), 5):
+        ws.cell(row=row_idx, column=1).value = row['Documento']
+        ws.cell(row=row_idx, column=2).value = row['Razón Social']
+        ws.cell(row=row_idx, column=3).value = row['Deuda Total']
+        ws.cell(row=row_idx, column=4).value = row['Operador']
+        ws.cell(row=row_idx, column=5).value = row['Campaña']
+
+        for col_idx in range(1, 6):
+            cell = ws.cell(row=row_idx, column=col_idx)
+            cell.border = _borde_fino()
+            if col_idx == 3:  # Alinear números a la derecha
+                cell.alignment = Alignment(horizontal="right")
+            else:
+                cell.alignment = Alignment(horizontal="left")
+
+    _anchos(ws, [15, 45, 15, 12, 18])
+
+    # Fila de totales
+    total_row = len(df_export) + 5
+    ws.cell(row=total_row, column=1).value = "TOTAL"
+    ws.cell(row=total_row, column=1).font = Font(bold=True)
+    ws.cell(row=total_row, column=2).value = len(df_export)
+    ws.cell(row=total_row, column=2).font = Font(bold=True)
+    for col_idx in range(1, 6):
+        cell = ws.cell(row=total_row, column=col_idx)
+        cell.fill = PatternFill(start_color="FFE082", end_color="FFE082", fill_type="solid")
+        cell.border = _borde_fino()
+
+
+def hoja_resumen_asesor(ws, asesor, indicadores):
+    """indicadores: lista de (indicador, valor, formato, posición); formato es "monto", "porcentaje" o "entero"."""
+    from openpyxl.styles import Alignment
+    ws.title = "Resumen"
+    _titulo(ws, f"RESUMEN DEL ASESOR - {asesor.upper()}", "23395D", 'A{0}:C{0}')
+    _encabezados(ws, ['Indicador', 'Valor', 'Posición en el ranking'], 4)
+    formatos = {'monto': '#,##0.00', 'porcentaje': '0.00"%"', 'entero': '#,##0'}
+    for row_idx, (indicador, valor, formato, posicion) in enumerate(indicadores, 5):
+        ws.cell(row=row_idx, column=1).value = indicador
+        ws.cell(row=row_idx, column=2).value = valor
+        ws.cell(row=row_idx, column=2).number_format = formatos[formato]
+        ws.cell(row=row_idx, column=3).value = posicion
+        for col_idx in range(1, 4):
+            cell = ws.cell(row=row_idx, column=col_idx)
+            cell.border = _borde_fino()
+            cell.alignment = Alignment(horizontal="left" if col_idx == 1 else "right")
+    _anchos(ws, [30, 20, 22])
+
+
+# ---------------------------------------------------------------- libros
+
+def _guardar(wb):
+    output = BytesIO()
+    wb.save(output)
+    return output.getvalue()
+
+
+def excel_clientes_top(df_export, campania):
+    from openpyxl import Workbook
+    wb = Workbook()
+    hoja_clientes_top(wb.active, df_export, campania)
+    return _guardar(wb)
+
+
+def excel_solo_gastos(df_export):
+    from openpyxl import Workbook
+    wb = Workbook()
+    hoja_solo_gastos(wb.active, df_export)
+    return _guardar(wb)
+
+
+def excel_critico(df_export):
+    from openpyxl import Workbook
+    wb = Workbook()
+    hoja_critico(wb.active, df_export)
+    return _guardar(wb)
+
+
+def libro_asesor(asesor, indicadores, df_top, df_critico, df_solo_gastos):
+    """Libro de un asesor: resumen, Clientes TOP, casos críticos y casos solo gastos."""
+    from openpyxl import Workbook
+    wb = Workbook()
+    hoja_resumen_asesor(wb.active, asesor, indicadores)
+    hoja_clientes_top(wb.create_sheet(), df_top, asesor)
+    hoja_critico(wb.create_sheet(), df_critico)
+    hoja_solo_gastos(wb.create_sheet(), df_solo_gastos)
+    return _guardar(wb)
+
+
+def _libro_asesor(tarea):
+    asesor = tarea[0]
+    nombre = asesor.strip().replace(' ', '_').replace('/', '-')
+    return f"reporte_{nombre}.xlsx", libro_asesor(*tarea)
+
+
+def _indicadores(fila, metricas_ranking):
+    indicadores = [
+        ('Cuentas', fila['CUENTAS'], 'entero', None),
+        ('Gestionados', fila['GESTIONADOS'], 'entero', None),
+        ('Gastos admin', fila['GASTOS_ADMIN'], 'monto', None),
+    ]
+    for metrica, (etiqueta, formato) in metricas_ranking.items():
+        indicadores.append((etiqueta, fila[metrica], formato, int(fila[f'POS_{metrica}'])))
+    return indicadores
+
+
+def _nombre_unico(nombre, usados):
+    """
+    `nombre` o, si ya está en el ZIP, el mismo con sufijo _2, _3... Dos asesores
+    distintos pueden dar el mismo nombre de archivo ('ANA PEREZ' y 'ANA_PEREZ');
+    se compara sin mayúsculas porque al extraer en Windows también chocan.
+    """
+    base, extension = os.path.splitext(nombre)
+    candidato, n = nombre, 1
+    while candidato.lower() in usados:
+        n += 1
+        candidato = f"{base}_{n}{extension}"
+    usados.add(candidato.lower())
+    return candidato
+
+
+def zip_por_asesor(df, df_critico, df_solo_gastos, tabla_asesor, metricas_ranking, max_workers=None):
+    """
+    ZIP con un libro por ASESOR. Las tablas de cada asesor se preparan aquí y los
+    libros (la parte lenta, celda por celda con openpyxl) se escriben en paralelo.
+    """
+    top = df.sort_values('DEUDA TOTAL', ascending=False)
+    top_por_asesor = dict(tuple(top.groupby('ASESOR', observed=True)))
+    critico_por_asesor = dict(tuple(df_critico.groupby('ASESOR', observed=True)))
+    gastos_por_asesor = dict(tuple(df_solo_gastos.groupby('ASESOR', observed=True)))
+    tareas = []
+    for _, fila in tabla_asesor.iterrows():
+        asesor = fila['ASESOR']
+        vacio = df.iloc[:0]
+        tareas.append((
+            asesor,
+            _indicadores(fila, metricas_ranking),
+            tabla_clientes_top(top_por_asesor.get(asesor, vacio).head(TOP_POR_ASESOR)),
+            tabla_critico(critico_por_asesor.get(asesor, df_critico.iloc[:0])),
+            tabla_solo_gastos(gastos_por_asesor.get(asesor, df_solo_gastos.iloc[:0])),
+        ))
+
+    if len(tareas) <= 1:
+        libros = [_libro_asesor(t) for t in tareas]
+    else:
+        max_workers = min(len(tareas), max_workers or os.cpu_count() or 1)
+        # 'spawn': el servidor de Streamlit tiene varios hilos y hacer fork puede bloquear al hijo
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            libros = list(pool.map(_libro_asesor, tareas))
+
+    salida = BytesIO()
+    usados = set()
+    with zipfile.ZipFile(salida, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        for nombre, contenido in libros:
+            zf.writestr(_nombre_unico(nombre, usados), contenido)
+    return salida.getvalue()
@@ -0,0 +1,112 @@
+"""
+Núcleo de cálculo contra las salidas de referencia de verificacion/.
+
+Las tablas se calculan con el conjunto sintético de verificar_calculos.py (mismas
+filas y semilla que al escribir las referencias) con cada motor de cálculo, y se
+comparan con el CSV de referencia. Además se comprueba que la lectura xlsx da lo
+mismo con calamine y con openpyxl, y que el acumulado incremental por asesor
+coincide con recalcularlo completo.
+
+    python -m pytest
+"""
+import difflib
+import os
+
+import pandas as pd
+import pytest
+
+import asesores
+import consultas_sql
+import periodos
+import procesamiento
+import verificar_calculos
+
+REFERENCIAS = sorted(
+    os.path.splitext(archivo)[0]
+    for archivo in os.listdir(verificar_calculos.DIRECTORIO_REFERENCIAS)
+    if archivo.endswith('.csv')
+)
+MOTORES = [
+    'pandas',
+    pytest.param('duckdb', marks=pytest.mark.skipif(not consultas_sql.disponible(), reason="duckdb no instalado")),
+]
+
+
+@pytest.fixture(scope='module')
+def df():
+    return verificar_calculos.datos_sinteticos(verificar_calculos.FILAS_REFERENCIA)
+
+
+@pytest.fixture(scope='module', params=MOTORES)
+def tablas(request, df):
+    return verificar_calculos.tablas_verificadas(df, request.param)
+
+
+def test_todas_las_tablas_tienen_referencia(df):
+    assert sorted(verificar_calculos.tablas_verificadas(df)) == REFERENCIAS
+
+
+@pytest.mark.parametrize('nombre', REFERENCIAS)
+def test_tabla_coincide_con_referencia(tablas, nombre):
+    with open(os.path.join(verificar_calculos.DIRECTORIO_REFERENCIAS, f'{nombre}.csv'), encoding='utf-8', newline='') as f:
+        esperado = f.read()
+    actual = verificar_calculos.a_csv(tablas[nombre])
+    diferencia = ''.join(difflib.unified_diff(
+        esperado.splitlines(keepends=True), actual.splitlines(keepends=True), 'referencia', 'actual', n=1,
+    ))
+    assert actual == esperado, f"{nombre} difiere de la referencia:\n{diferencia[:4000]}"
+
+
+# ---------------------------------------------------------------- motores xlsx
+
+@pytest.fixture(scope='module')
+def lecturas_xlsx(df, tmp_path_factory):
+    """df escrito como xlsx y leído con calamine y con openpyxl, al leer y después de aplicar_esquema."""
+    if procesamiento.motor_excel() != 'calamine':
+        pytest.skip("python-calamine no instalado")
+    ruta = str(tmp_path_factory.mktemp('xlsx') / 'paridad.xlsx')
+    df.to_excel(ruta, index=False)
+    calamine = procesamiento.cargar_excel(ruta, motor='calamine')
+    openpyxl = procesamiento.cargar_excel(ruta, motor='openpyxl')
+    return {
+        'lectura': (calamine, openpyxl),
+        'tipado': (procesamiento.aplicar_esquema(calamine)[0], procesamiento.aplicar_esquema(openpyxl)[0]),
+    }
+
+
+@pytest.mark.parametrize('etapa', ['lectura', 'tipado'])
+@pytest.mark.parametrize('columna', list(procesamiento.ESQUEMA))
+def test_motores_excel_leen_lo_mismo(lecturas_xlsx, etapa, columna):
+    calamine, openpyxl = lecturas_xlsx[etapa]
+    assert (columna in calamine.columns) == (columna in openpyxl.columns), "sólo la lee uno de los motores"
+    if columna not in calamine.columns:
+        pytest.skip(f"{columna} no está en los datos")
+    pd.testing.assert_series_equal(calamine[columna], openpyxl[columna])
+
+
+# ---------------------------------------------------------------- acumulado incremental
+
+def test_acumulado_incremental_coincide_con_completo(df):
+    """
+    Carga df como dos periodos paso a paso (llega el primer archivo, llega el
+    segundo, cambia el segundo, se quita el primero): cada resultado es el de
+    asesores.acumular y un periodo con la misma versión no se vuelve a acumular.
+    """
+    df = procesamiento.aplicar_esquema(verificar_calculos.dos_periodos(df))[0]
+    cambiado = df.copy()
+    actual = cambiado[periodos.COLUMNA] == 'ACTUAL'
+    cambiado.loc[actual, 'REC. PLANILLAS'] = cambiado.loc[actual, 'REC. PLANILLAS'].fillna(0) + 100
+    pasos = [
+        ('primer archivo', df[df[periodos.COLUMNA] == 'ANTERIOR'], {'ANTERIOR': 'v1'}),
+        ('segundo archivo', df, {'ANTERIOR': 'v1', 'ACTUAL': 'v1'}),
+        ('archivo cambiado', cambiado, {'ANTERIOR': 'v1', 'ACTUAL': 'v2'}),
+        ('archivo quitado', cambiado[actual], {'ACTUAL': 'v2'}),
+    ]
+    incremental = asesores.AcumuladoIncremental()
+    for paso, datos, versiones in pasos:
+        previos = dict(incremental.parciales)
+        resultado = incremental.actualizar(datos, versiones)
+        pd.testing.assert_frame_equal(resultado, asesores.acumular(datos), check_exact=False, rtol=1e-9, obj=paso)
+        for lote, version in versiones.items():
+            if lote in previos and previos[lote][0] == version:
+                assert incremental.parciales[lote] is previos[lote], f"{paso}: {lote} se volvió a acumular con la misma versión"
@@ -0,0 +1,267 @@
+"""
+Datos sintéticos y salidas de referencia del núcleo de cálculo, y presupuestos de
+tiempo y memoria.
+
+1. Salidas de referencia: con un conjunto sintético fijo con la forma del export
+   WORLDTEL (FILAS_REFERENCIA filas, semilla fija) se calculan las tablas del
+   dashboard y se guardan como CSV en verificacion/: tabla por campaña con su
+   fila TOTAL, resumen por asesor y por prioridad, cuentas por NIVEL_RIESGO,
+   casos críticos, casos solo REC. GASTOS, historial de pagos, conversión por
+   CONTACTABILIDAD x PRIORIDAD; además el resumen por regla y la cuarentena de
+   calidad.py sobre una copia con anomalías sembradas, también cargada como dos
+   periodos. tests/test_calculos.py (pytest) las compara con ambos motores,
+   junto con la lectura xlsx con calamine y con openpyxl y el acumulado
+   incremental por asesor.
+2. Presupuestos: con el mismo generador a 100.000 filas se mide el tiempo y el
+   pico de memoria (tracemalloc) de cada etapa (tipado, reglas de calidad,
+   construcción completa, filtro) y se comparan con PRESUPUESTOS.
+
+    python verificar_calculos.py                 # mide los presupuestos
+    python verificar_calculos.py --motor duckdb  # con DuckDB
+    python verificar_calculos.py --actualizar    # reescribe las referencias
+
+Devuelve código 1 si se supera algún presupuesto, para correrlo antes de
+publicar una optimización (las tablas se verifican con python -m pytest). Las
+referencias sólo deben actualizarse cuando un cambio de resultados es
+intencional.
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import calidad
+import periodos
+import procesamiento
+
+DIRECTORIO_REFERENCIAS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'verificacion')
+FILAS_REFERENCIA = 600
+FILAS_PRESUPUESTO = 100_000
+SEMILLA = 20251101
+
+# Etapa -> (ms, MB de pico) a FILAS_PRESUPUESTO filas
+# (del orden de 1,5 veces lo medido al fijarlos, para detectar regresiones)
+PRESUPUESTOS = {
+    'aplicar_esquema': (1_000, 40),
+    'calidad.evaluar': (100, 15),
+    'construir_datos': (8_500, 130),
+    'filtrar_datos': (1_500, 15),
+}
+
+CAMPANIAS = ['REDIRECCIONAMIENTO', 'PRESUNTA', 'FLUJO', 'REAL TOTAL']
+CONTACTABILIDADES = ['Por Determinar', 'Contacto Directo', 'Contacto Indirecto', 'Sin Contacto']
+PRIORIDADES = [
+    '01. Menor a 2000', '02. 2000 al 2010', '03. 2010 al 2020', '04. 2020 al 2024',
+    '05. 202501', '06. 202502', '07. 202503', '08. 202504', '09. 202505',
+    '10. 202506', '11. 202507', '12. 202508', '13. 202509',
+]
+PESOS_PRIORIDAD = [2, 15, 40, 4, 1, 1, 1, 1, 1, 1, 1, 2, 30]
+ASESORES = [
+    'Laura Villanueva Solayo', 'Carlos Ramos Quispe', 'Ana Torres Lima', 'Jorge Salas Paredes',
+    'María Huamán Rojas', 'Luis Castillo Vega', 'Rosa Medina Flores',
+]
+OPERADORES = [f'PRIM{n:02d}' for n in range(10, 17)]
+
+
+def datos_sinteticos(filas, semilla=SEMILLA):
+    """
+    DataFrame con las columnas de procesamiento.ESQUEMA tal como llegan del Excel:
+    además de valores ya tipados incluye montos y fechas como texto, celdas
+    vacías, documentos repetidos entre campañas y algunas cuentas sin campaña.
+    """
+    rnd = np.random.default_rng(semilla)
+    inicio_mes = pd.Timestamp('2025-11-01')
+
+    def fechas(probabilidad):
+        dias = rnd.integers(0, 30, filas)
+        serie = pd.Series(inicio_mes + pd.to_timedelta(dias, unit='D'))
+        return serie.where(rnd.random(filas) < probabilidad)
+
+    def montos(escala, probabilidad):
+        return pd.Series(np.round(rnd.gamma(2.0, escala, filas), 2)).where(rnd.random(filas) < probabilidad)
+
+    documentos = rnd.integers(10_000_000_000, 20_999_999_999, filas)
+    # Uno de cada diez deudores tiene cuentas en otra campaña
+    repetidos = rnd.random(filas) < 0.1
+    documentos[repetidos] = rnd.choice(documentos, repetidos.sum())
+    df = pd.DataFrame({
+        'CAMPAÑA': rnd.choice(CAMPANIAS, filas, p=[0.44, 0.32, 0.15, 0.09]),
+        'DOCUMENTO': documentos,
+        'RAZON SOCIAL': [f'EMPRESA {d % 100_000:05d} SAC' for d in documentos],
+        'CONTACTABILIDAD': pd.Series(rnd.choice(CONTACTABILIDADES, filas, p=[0.7, 0.15, 0.09, 0.06])).where(rnd.random(filas) < 0.35),
+        'ULTIMA FECHA GESTION': fechas(0.35),
+        'DEUDA TOTAL': montos(4_000, 1.0),
+        'GASTOS ADMIN': montos(300, 1.0),
+        'FECHA DE PAGO P': fechas(0.08),
+        'REC. PLANILLAS': montos(900, 0.08),
+        'FECHA DE PAGO G': fechas(0.03),
+        'REC. GASTOS': montos(150, 0.03),
+        'PRIORIDAD': rnd.choice(PRIORIDADES, filas, p=np.array(PESOS_PRIORIDAD) / sum(PESOS_PRIORIDAD)),
+        'OPERADOR': rnd.choice(OPERADORES, filas),
+        'ASESOR': rnd.choice(ASESORES, filas),
+    })
+    # Celdas con texto, como las que deja el export cuando alguien edita a mano
+    for columna in ['DEUDA TOTAL', 'REC. PLANILLAS']:
+        texto = df[columna].notna() & (rnd.random(filas) < 0.02)
+        df[columna] = df[columna].astype(object)
+        df.loc[texto, columna] = df.loc[texto, columna].map(lambda v: f'S/. {v:,.2f}')
+    texto = df['ULTIMA FECHA GESTION'].notna() & (rnd.random(filas) < 0.02)
+    df['ULTIMA FECHA GESTION'] = df['ULTIMA FECHA GESTION'].astype(object)
+    df.loc[texto, 'ULTIMA FECHA GESTION'] = df.loc[texto, 'ULTIMA FECHA GESTION'].map(lambda f: f.strftime('%d/%m/%Y'))
+    df.loc[rnd.random(filas) < 0.005, 'CAMPAÑA'] = None
+    df['DOCUMENTO'] = df['DOCUMENTO'].astype(str)
+    return df
+
+
+def con_anomalias(df, semilla=SEMILLA):
+    """Copia de df con cuentas que incumplen cada regla de calidad.py."""
+    rnd = np.random.default_rng(semilla + 1)
+    df = df.copy()
+    filas = rnd.choice(len(df), 40, replace=False)
+    negativos, fuera_del_mes, sin_gastos_admin, duplicados = np.split(filas, 4)
+    df.loc[negativos, 'GASTOS ADMIN'] = -df.loc[negativos, 'GASTOS ADMIN']
+    df.loc[fuera_del_mes, 'FECHA DE PAGO P'] = pd.Timestamp('2025-10-15')
+    df.loc[sin_gastos_admin, 'REC. GASTOS'] = 50.0
+    df.loc[sin_gastos_admin, 'GASTOS ADMIN'] = None
+    for columna in ['CAMPAÑA', 'DOCUMENTO']:
+        df.loc[duplicados, columna] = df.loc[duplicados[0], columna]
+    return df
+
+
+def dos_periodos(df):
+    """df como dos exports (PERIODO) de meses consecutivos, con los mismos documentos."""
+    anterior = df.copy()
+    for columna in calidad.FECHAS_PAGO:
+        anterior[columna] = anterior[columna] - pd.DateOffset(months=1)
+    return pd.concat([
+        anterior.assign(**{periodos.COLUMNA: 'ANTERIOR'}),
+        df.assign(**{periodos.COLUMNA: 'ACTUAL'}),
+    ], ignore_index=True)
+
+
+# ---------------------------------------------------------------- referencias
+
+def tablas_de_referencia(datos):
+    """Nombre -> DataFrame de cada salida que se compara."""
+    calculo = procesamiento.motor_calculo(datos.motor)
+    tabla_campana = pd.concat([
+        datos.tabla_campana.astype({'CAMPAÑA': str}),
+        pd.DataFrame([procesamiento.fila_total_campana(datos.tabla_campana, datos.kpis)]),
+    ], ignore_index=True)
+    return {
+        'tabla_campana': tabla_campana,
+        'tabla_resumen_asesor': datos.tabla_resumen_asesor,
+        'tabla_resumen_prioridad': calculo.resumen_por_prioridad(datos.df),
+        'niveles_riesgo': datos.resumen_nivel.drop(columns='ORDEN'),
+        'df_critico': datos.df_critico.sort_values('DOCUMENTO', kind='stable'),
+        'df_solo_gastos': datos.df_solo_gastos.sort_values('DOCUMENTO', kind='stable'),
+        'df_pagos': datos.df_pagos,
+        'conversion': datos.tabla_conversion,
+    }
+
+
+def tablas_de_calidad(df):
+    """
+    Resumen por regla y cuarentena de calidad.py sobre df (sin tipar), y el resumen
+    con df cargado como dos periodos (cada regla debe marcar el doble de cuentas).
+    """
+    tipado, _ = procesamiento.aplicar_esquema(df)
+    banderas = calidad.evaluar(tipado)
+    tipado_periodos, _ = procesamiento.aplicar_esquema(dos_periodos(df))
+    return {
+        'resumen_calidad': calidad.resumen(tipado, banderas),
+        'cuarentena': calidad.cuarentena(tipado, banderas),
+        'resumen_calidad_periodos': calidad.resumen(tipado_periodos, calidad.evaluar(tipado_periodos)),
+    }
+
+
+def a_csv(tabla):
+    """Texto estable de una tabla: sin índice, floats con 6 decimales y fechas ISO."""
+    return tabla.to_csv(index=False, float_format='%.6f', date_format='%Y-%m-%d', lineterminator='\n')
+
+
+def escribir_referencias(tablas):
+    """Reescribe el CSV de referencia de cada tabla."""
+    os.makedirs(DIRECTORIO_REFERENCIAS, exist_ok=True)
+    for nombre, tabla in tablas.items():
+        with open(os.path.join(DIRECTORIO_REFERENCIAS, f'{nombre}.csv'), 'w', encoding='utf-8', newline='') as f:
+            f.write(a_csv(tabla))
+        print(f"  {nombre}: referencia escrita ({len(tabla)} filas)")
+
+
+def tablas_verificadas(df, motor='pandas'):
+    """Todas las tablas con referencia en verificacion/, calculadas sobre df."""
+    datos = procesamiento.construir_datos(df, version='verificacion', motor=motor)
+    return {**tablas_de_referencia(datos), **tablas_de_calidad(con_anomalias(df))}
+
+
+# ---------------------------------------------------------------- presupuestos
+
+def medir(funcion, *args):
+    """
+    (resultado, ms, MB de pico) de funcion(*args). El pico se mide en una segunda
+    corrida con tracemalloc, que hace varias veces más lento el código Python.
+    """
+    inicio = time.perf_counter()
+    resultado = funcion(*args)
+    ms = (time.perf_counter() - inicio) * 1000
+    tracemalloc.start()
+    try:
+        funcion(*args)
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return resultado, ms, pico / 1024 / 1024
+
+
+def etapas(df, motor):
+    """(etapa, ms, MB) de cada etapa del núcleo sobre df."""
+    (tipado, _), ms_esquema, mb_esquema = medir(procesamiento.aplicar_esquema, df)
+    _, ms_calidad, mb_calidad = medir(calidad.evaluar, tipado)
+    datos, ms_datos, mb_datos = medir(procesamiento.construir_datos, df, 'verificacion', motor)
+    mascara = datos.indice.mascara({'CAMPAÑA': ('PRESUNTA',), 'NIVEL_RIESGO': ('ALTA', 'MEDIA')}, None)
+    _, ms_filtro, mb_filtro = medir(procesamiento.filtrar_datos, datos, mascara)
+    return [
+        ('aplicar_esquema', ms_esquema, mb_esquema),
+        ('calidad.evaluar', ms_calidad, mb_calidad),
+        ('construir_datos', ms_datos, mb_datos),
+        ('filtrar_datos', ms_filtro, mb_filtro),
+    ]
+
+
+def verificar_presupuestos(mediciones, holgura=1.0):
+    excedidos = []
+    for etapa, ms, mb in mediciones:
+        max_ms, max_mb = PRESUPUESTOS[etapa]
+        max_ms, max_mb = max_ms * holgura, max_mb * holgura
+        estado = 'OK' if ms <= max_ms and mb <= max_mb else 'EXCEDIDO'
+        if estado != 'OK':
+            excedidos.append(etapa)
+        print(f"  {etapa:<16} {ms:9,.0f} ms (máx {max_ms:,.0f})  {mb:8,.1f} MB (máx {max_mb:,.0f})  {estado}")
+    return excedidos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Presupuestos de tiempo y memoria del núcleo de cálculo")
+    parser.add_argument('--actualizar', action='store_true', help="Reescribir las salidas de referencia")
+    parser.add_argument('--motor', choices=['pandas', 'duckdb'], default='pandas')
+    parser.add_argument('--filas', type=int, default=FILAS_PRESUPUESTO, help="Filas para medir los presupuestos")
+    parser.add_argument('--holgura', type=float, default=1.0, help="Multiplica los presupuestos (máquinas más lentas)")
+    args = parser.parse_args()
+
+    if args.actualizar:
+        print(f"Salidas de referencia ({FILAS_REFERENCIA} filas, motor {args.motor}):")
+        escribir_referencias(tablas_verificadas(datos_sinteticos(FILAS_REFERENCIA), args.motor))
+        return
+
+    print(f"Presupuestos ({args.filas:,} filas, motor {args.motor}):")
+    if verificar_presupuestos(etapas(datos_sinteticos(args.filas), args.motor), args.holgura):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,198 @@
+"""
+Verificación de que los fragmentos del dashboard se ejecutan aislados.
+
+Con streamlit.testing (AppTest) se ejecuta el dashboard completo y, por cada
+fragmento (@st.fragment), se cambia uno de sus widgets y se vuelve a ejecutar
+como lo pide el navegador: sólo el fragmento dueño del widget (el fragment_id
+que trae el delta del widget). Se registra qué funciones fragmento corren y qué
+secciones del flujo principal (envio.MedidorEnvio.seccion) se alcanzan; la
+interacción debe ejecutar sólo ese fragmento (y los anidados en él), sin
+ninguna sección del flujo principal ni otro fragmento.
+
+La base del historial y los exportes precalculados se escriben en un directorio
+temporal (DASHBOARD_HISTORIAL y DASHBOARD_EXPORTES), no en los del dashboard.
+
+    python verificar_fragmentos.py
+    python verificar_fragmentos.py --timeout 600
+
+Devuelve código 1 si alguna interacción ejecuta algo más que su fragmento, si
+lanza una excepción o si hay fragmentos del dashboard sin caso en CASOS.
+"""
+import argparse
+import functools
+import logging
+import os
+import sys
+import tempfile
+import threading
+
+import streamlit as st
+import streamlit.testing.v1.local_script_runner as local_script_runner
+from streamlit.testing.v1 import AppTest
+
+import envio
+
+DASHBOARD = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dashboardNoviembre.py')
+
+# (fragmento, tipo de widget, key, valor, fragmentos anidados que también corren)
+CASOS = [
+    ('grafico_pagos_por_dia', 'selectbox', 'tipo_grafico_planillas', 'Recaudo Acumulado', ()),
+    ('render_historial_pagos', 'selectbox', 'tipo_pagos_historial', 'GASTOS', ('grafico_pagos_por_dia',)),
+    ('render_buscar_cliente', 'text_input', 'buscar_cliente', 'universidad', ()),
+    ('render_clientes_top', 'slider', 'slider_top_clientes', 20, ()),
+    ('render_conversion', 'selectbox', 'indicador_conversion', 'CUENTAS', ()),
+    ('render_antiguedad', 'radio', 'valor_antiguedad', 'DEUDA', ()),
+    ('render_lista_trabajo', 'number_input', 'lista_trabajo_dias', 3, ()),
+]
+
+
+class Registro:
+    """Fragmentos y secciones del flujo principal ejecutados, y el fragmento de cada widget."""
+
+    def __init__(self):
+        self.fragmentos = []
+        self.secciones = []
+        self.fragmento_de_widget = {}
+        self.fragmento_pendiente = None
+
+    def limpiar(self):
+        self.fragmentos.clear()
+        self.secciones.clear()
+
+
+def instrumentar(registro):
+    """
+    Parchea streamlit y envio para registrar la ejecución; los cambios viven en
+    este proceso y no tocan el dashboard.
+    """
+    fragment_original = st.fragment
+
+    def fragment(func=None, **kwargs):
+        if func is None:
+            return lambda f: fragment(f, **kwargs)
+
+        @functools.wraps(func)
+        def registrada(*args, **kw):
+            registro.fragmentos.append(func.__name__)
+            return func(*args, **kw)
+        return fragment_original(registrada, **kwargs)
+    st.fragment = fragment
+
+    seccion_original = envio.MedidorEnvio.seccion
+
+    def seccion(self, nombre):
+        registro.secciones.append(nombre)
+        return seccion_original(self, nombre)
+    envio.MedidorEnvio.seccion = seccion
+
+    # El navegador guarda el fragment_id de cada widget (viene en su delta)
+    parse_original = local_script_runner.parse_tree_from_messages
+
+    def parse_tree_from_messages(mensajes):
+        for mensaje in mensajes:
+            if not mensaje.HasField('delta') or not mensaje.delta.fragment_id:
+                continue
+            if not mensaje.delta.HasField('new_element'):
+                continue
+            elemento = mensaje.delta.new_element
+            tipo = elemento.WhichOneof('type')
+            widget_id = getattr(getattr(elemento, tipo), 'id', None) if tipo else None
+            if widget_id:
+                registro.fragmento_de_widget[widget_id] = mensaje.delta.fragment_id
+        return parse_original(mensajes)
+    local_script_runner.parse_tree_from_messages = parse_tree_from_messages
+
+    # ...y al cambiar un widget pide ejecutar sólo ese fragmento
+    rerun_data_original = local_script_runner.RerunData
+
+    def rerun_data(*args, **kwargs):
+        if registro.fragmento_pendiente is not None:
+            kwargs['fragment_id_queue'] = [registro.fragmento_pendiente]
+        return rerun_data_original(*args, **kwargs)
+    local_script_runner.RerunData = rerun_data
+
+
+def probar(at, registro, caso):
+    """Lista de problemas de un caso (vacía si sólo corrió su fragmento)."""
+    nombre, tipo, key, valor, anidados = caso
+    at.run()
+    if at.exception:
+        return [f"la ejecución completa lanzó {at.exception[0].value}"]
+    widget = getattr(at, tipo)(key=key)
+    fragment_id = registro.fragmento_de_widget.get(widget.id)
+    if fragment_id is None:
+        return [f"el widget {key!r} no está dentro de un fragmento"]
+
+    registro.limpiar()
+    registro.fragmento_pendiente = fragment_id
+    try:
+        if tipo == 'text_input':
+            widget.input(valor).run()
+        else:
+            widget.set_value(valor).run()
+    finally:
+        registro.fragmento_pendiente = None
+
+    problemas = []
+    if at.exception:
+        problemas.append(f"lanzó {at.exception[0].value}")
+    if registro.secciones:
+        problemas.append(f"ejecutó el flujo principal ({', '.join(registro.secciones)})")
+    if not registro.fragmentos or registro.fragmentos[0] != nombre:
+        problemas.append(f"no empezó por {nombre} ({registro.fragmentos})")
+    otros = sorted({f for f in registro.fragmentos[1:] if f not in anidados})
+    if otros:
+        problemas.append(f"ejecutó otros fragmentos ({', '.join(otros)})")
+    return problemas
+
+
+def verificar(timeout):
+    """Ejecuta el dashboard y cada caso; devuelve los fragmentos que fallaron."""
+    registro = Registro()
+    instrumentar(registro)
+    at = AppTest.from_file(DASHBOARD, default_timeout=timeout)
+    at.run()
+    if at.exception:
+        print(f"El dashboard lanzó una excepción: {at.exception[0].value}")
+        return ['dashboard']
+
+    fallidos = []
+    sin_caso = sorted(set(registro.fragmentos) - {caso[0] for caso in CASOS})
+    if sin_caso:
+        fallidos.append('sin caso')
+        print(f"Fragmentos sin caso en CASOS: {', '.join(sin_caso)}")
+
+    print(f"Fragmentos ({len(CASOS)} casos):")
+    for caso in CASOS:
+        problemas = probar(at, registro, caso)
+        estado = 'OK' if not problemas else '; '.join(problemas)
+        print(f"  {caso[0]:<24} {caso[2]:<24} {estado}")
+        if problemas:
+            fallidos.append(caso[0])
+    return fallidos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verifica que cada fragmento del dashboard se ejecuta aislado")
+    parser.add_argument('--timeout', type=float, default=300, help="Segundos por ejecución del dashboard")
+    args = parser.parse_args()
+
+    # Sin los avisos de deprecación de cada ejecución, sólo el resultado
+    logging.getLogger('streamlit.deprecation_util').disabled = True
+    with tempfile.TemporaryDirectory() as directorio:
+        os.environ['DASHBOARD_HISTORIAL'] = os.path.join(directorio, 'historial_kpis.sqlite')
+        os.environ['DASHBOARD_EXPORTES'] = os.path.join(directorio, 'exportes_cache')
+        try:
+            fallidos = verificar(args.timeout)
+        finally:
+            # Los exportes se escriben en un hilo; se espera antes de borrar el directorio
+            for hilo in threading.enumerate():
+                if hilo.name == 'exportes':
+                    hilo.join()
+
+    if fallidos:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()